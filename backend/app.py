@@ -6,12 +6,8 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 
-from services.document_service import DocumentService
-from services.embedding_service import EmbeddingService
-from services.rag_service import RAGService
-from services.semantic_router_service import SemanticRouterService
-from services.reflection_service import ReflectionService
-from services.chat_service import ChatService
+from services.container import ServiceContainer
+from services.admission_control import AdmissionController, Overloaded, overloaded_payload, resolve_priority
 
 
 from models.document import Document
@@ -21,12 +17,13 @@ from models.user import User
 
 
 from utils.file_utils import save_temporary_file, save_uploaded_file
-from utils.text_processor import clean_text, detect_language
+from utils.text_processor import clean_text, detect_language, ensure_nltk_data
+from utils.metrics import metrics, process_memory
+from utils.deadline import Deadline
 
 
 from config.settings import Config
 from auth.jwt_manager import JWTManager, jwt_required, admin_required
-from db.mysql_manager import MySQLManager
 
 
 load_dotenv()
@@ -37,45 +34,223 @@ CORS(app)
 app.config.from_object(Config)
 
 
-from llm.gemini_client import GeminiClient
-from vector_store.chroma_client import ChromaManager
-from vector_store.embedding_manager import EmbeddingManager
-from vector_store.query_processor import QueryProcessor
-
-
 jwt_manager = JWTManager(
     secret_key=app.config["JWT_SECRET_KEY"],
     expires_delta=app.config["JWT_ACCESS_TOKEN_EXPIRES"],
     refresh_expires_delta=app.config["JWT_REFRESH_TOKEN_EXPIRES"]
 )
 
+os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
-db_manager = MySQLManager()
+services = ServiceContainer()
 
-os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+admission_controller = None
+if app.config["ADMISSION_ENABLED"]:
+    admission_controller = AdmissionController(
+        max_concurrent=app.config["ADMISSION_MAX_CONCURRENT"],
+        max_queue=app.config["ADMISSION_MAX_QUEUE"],
+        queue_timeout_ms=app.config["ADMISSION_QUEUE_TIMEOUT_MS"],
+        degrade_queue_depths=app.config["ADMISSION_DEGRADE_DEPTHS"]
+    )
 
-llm_client = GeminiClient(api_key=app.config["GEMINI_API_KEY"])
 
-embedding_service = EmbeddingService(model_name=app.config["EMBEDDING_MODEL"])
+def new_deadline(header_value=None):
+    if not header_value and app.config["CHAT_DEADLINE_MS"] <= 0:
+        return None
+    
+    return Deadline.from_header(
+        header_value,
+        app.config["CHAT_DEADLINE_MS"],
+        app.config["CHAT_DEADLINE_MAX_MS"],
+        stage_costs_ms=app.config["DEADLINE_STAGE_COSTS_MS"],
+        tokens_per_second=app.config["GENERATION_TOKENS_PER_SECOND"],
+        min_generation_ms=app.config["GENERATION_MIN_MS"]
+    )
 
-chroma_manager = ChromaManager(
-    persist_directory=app.config["CHROMA_DB_PATH"],
-    embedding_model=app.config["EMBEDDING_MODEL"]
-)
 
-embedding_manager = EmbeddingManager(model_name=app.config["EMBEDDING_MODEL"])
+def parse_mmr_lambda(value):
+    if value is None:
+        return None
+    
+    mmr_lambda = float(value)
+    if not 0.0 <= mmr_lambda <= 1.0:
+        raise ValueError("mmr_lambda must be between 0 and 1")
+    return mmr_lambda
+
+
+def _create_db_manager():
+    from db.mysql_manager import MySQLManager
+    
+    manager = MySQLManager()
+    with app.app_context():
+        try:
+            manager.setup_database()
+        except Exception as e:
+            app.logger.error(f"Error setting up database: {str(e)}")
+    return manager
+
+
+def _create_llm_client():
+    from llm.gemini_client import GeminiClient
+    
+    return GeminiClient(api_key=app.config["GEMINI_API_KEY"])
+
+
+def _create_embedding_service():
+    from services.embedding_service import EmbeddingService
+    
+    return EmbeddingService(
+        model_name=app.config["EMBEDDING_MODEL"],
+        cache_size=app.config["EMBEDDING_CACHE_SIZE"],
+        backend=app.config["EMBEDDING_BACKEND"],
+        server_socket=app.config["EMBEDDING_SERVER_SOCKET"],
+        runtime=app.config["EMBEDDING_RUNTIME"]
+    )
 
-query_processor = QueryProcessor(chroma_manager, embedding_manager)
 
-document_service = DocumentService(chroma_manager, db_manager=db_manager)
-rag_service = RAGService(chroma_manager, llm_client)
-semantic_router = SemanticRouterService(llm_client)
-reflection_service = ReflectionService(llm_client)
-chat_service = ChatService(semantic_router, reflection_service, rag_service, llm_client, db_manager)
+def _create_chroma_manager():
+    from vector_store.chroma_client import ChromaManager
+    
+    return ChromaManager(
+        persist_directory=app.config["CHROMA_DB_PATH"],
+        embedding_model=app.config["EMBEDDING_MODEL"],
+        chunk_size=app.config["CHUNK_SIZE"],
+        chunk_overlap=app.config["CHUNK_OVERLAP"],
+        length_unit=app.config["CHUNK_LENGTH_UNIT"],
+        parent_chunk_size=app.config["PARENT_CHUNK_SIZE"],
+        backend=app.config["VECTOR_BACKEND"],
+        quantization=app.config["VECTOR_QUANTIZATION"],
+        rescore_factor=app.config["QUANTIZATION_RESCORE_FACTOR"],
+        ivf_nlist=app.config["IVF_NLIST"],
+        ivf_nprobe=app.config["IVF_NPROBE"],
+        shard_by=app.config["SHARD_BY"],
+        num_shards=app.config["NUM_SHARDS"],
+        shard_categories=app.config["SHARD_CATEGORIES"],
+        language_models=app.config["LANGUAGE_EMBEDDING_MODELS"],
+        language_fallback=app.config["LANGUAGE_FALLBACK"],
+        retrieval_cache_size=app.config["RETRIEVAL_CACHE_SIZE"],
+        retrieval_cache_disk_size=app.config["RETRIEVAL_CACHE_DISK_SIZE"],
+        retrieval_cache_ttl=app.config["RETRIEVAL_CACHE_TTL"],
+        embedding_cache_size=app.config["EMBEDDING_CACHE_SIZE"],
+        embedding_backend=app.config["EMBEDDING_BACKEND"],
+        embedding_server_socket=app.config["EMBEDDING_SERVER_SOCKET"],
+        embedding_runtime=app.config["EMBEDDING_RUNTIME"],
+        store_mode=app.config["VECTOR_STORE_MODE"],
+        retrieval_server_socket=app.config["RETRIEVAL_SERVER_SOCKET"]
+    )
+
+
+def _create_query_processor():
+    from vector_store.embedding_manager import EmbeddingManager
+    from vector_store.query_processor import QueryProcessor
+    
+    embedding_manager = EmbeddingManager(
+        model_name=app.config["EMBEDDING_MODEL"],
+        service=services.get("embedding_service")
+    )
+    return QueryProcessor(services.get("chroma_manager"), embedding_manager)
+
+
+def _create_hash_index():
+    from vector_store.dedup_index import ContentHashIndex
+    
+    if not app.config["DEDUP_ENABLED"]:
+        return None
+    return ContentHashIndex(os.path.join(app.config["CHROMA_DB_PATH"], "content_hashes.sqlite3"))
+
+
+def _create_document_service():
+    from services.document_service import DocumentService
+    from vector_store.near_duplicate import MinHashLSHIndex
+    
+    hash_index = services.get("hash_index")
+    near_duplicate_index = None
+    if hash_index is not None:
+        if app.config["NEAR_DEDUP_ENABLED"]:
+            near_duplicate_index = MinHashLSHIndex(
+                os.path.join(app.config["CHROMA_DB_PATH"], "near_duplicates.sqlite3"),
+                num_perm=app.config["MINHASH_NUM_PERM"],
+                bands=app.config["MINHASH_BANDS"],
+                threshold=app.config["NEAR_DEDUP_THRESHOLD"]
+            )
+    
+    return DocumentService(
+        services.get("chroma_manager"),
+        db_manager=services.get("db_manager"),
+        hash_index=hash_index,
+        near_duplicate_index=near_duplicate_index,
+        csv_mode=app.config["CSV_INGEST_MODE"],
+        batch_size=app.config["INGEST_BATCH_SIZE"]
+    )
+
+
+def _create_rag_service():
+    from services.rag_service import RAGService
+    from services.context_builder import ContextBuilder
+    from services.context_compressor import ContextCompressor
+    
+    chroma_manager = services.get("chroma_manager")
+    token_counter = chroma_manager.token_counter
+    context_builder = ContextBuilder(
+        token_counter=token_counter,
+        model_budgets=app.config["CONTEXT_MODEL_BUDGETS"],
+        default_budget=app.config["CONTEXT_TOKEN_BUDGET"],
+        min_k=app.config["CONTEXT_MIN_K"],
+        max_k=app.config["CONTEXT_MAX_K"],
+        score_gap=app.config["CONTEXT_SCORE_GAP"],
+        relative_floor=app.config["CONTEXT_RELATIVE_FLOOR"]
+    )
+    context_compressor = None
+    if app.config["CONTEXT_COMPRESSION_ENABLED"]:
+        context_compressor = ContextCompressor(
+            chroma_manager.get_embeddings_model,
+            token_counter=token_counter,
+            budget_tokens=app.config["CONTEXT_COMPRESSION_TOKENS"],
+            prompt_tokens_per_second=app.config["PROMPT_TOKENS_PER_SECOND"]
+        )
+    return RAGService(
+        chroma_manager,
+        services.get("llm_client"),
+        relevance_threshold=app.config["RELEVANCE_SCORE_THRESHOLD"],
+        context_builder=context_builder,
+        context_compressor=context_compressor,
+        chunk_sources=services.get("hash_index"),
+        mmr_lambda=app.config["MMR_LAMBDA"],
+        mmr_fetch_k=app.config["MMR_FETCH_K"]
+    )
+
+
+def _create_chat_service():
+    from services.semantic_router_service import SemanticRouterService
+    from services.reflection_service import ReflectionService
+    from services.chat_service import ChatService
+    
+    llm = services.get("llm_client")
+    return ChatService(
+        SemanticRouterService(llm),
+        ReflectionService(llm),
+        services.get("rag_service"),
+        llm,
+        services.get("db_manager"),
+        coalesce=app.config["CHAT_COALESCING_ENABLED"]
+    )
+
+
+services.register("nltk_data", ensure_nltk_data)
+db_manager = services.register("db_manager", _create_db_manager)
+llm_client = services.register("llm_client", _create_llm_client)
+embedding_service = services.register("embedding_service", _create_embedding_service)
+chroma_manager = services.register("chroma_manager", _create_chroma_manager)
+query_processor = services.register("query_processor", _create_query_processor)
+hash_index = services.register("hash_index", _create_hash_index)
+document_service = services.register("document_service", _create_document_service)
+rag_service = services.register("rag_service", _create_rag_service)
+chat_service = services.register("chat_service", _create_chat_service)
 
 
 app.jwt_manager = jwt_manager
 app.db_manager = db_manager
+app.services = services
 
 
 @app.route("/api/health", methods=["GET"])
@@ -83,17 +258,69 @@ def health_check():
     return jsonify({
         "status": "healthy", 
         "version": "1.0.0",
+        "timestamp": datetime.now().isoformat(),
+        "pid": os.getpid(),
+        "memory": process_memory()
+    })
+
+
+@app.route("/api/health/live", methods=["GET"])
+def liveness_check():
+    return jsonify({
+        "status": "alive",
+        "pid": os.getpid(),
         "timestamp": datetime.now().isoformat()
     })
 
 
+@app.route("/api/health/ready", methods=["GET"])
+def readiness_check():
+    ready = services.is_ready()
+    if not ready:
+        services.start_warm_up()
+    
+    status = services.status()
+    status["status"] = "ready" if ready else "starting"
+    status["loaded"] = services.loaded()
+    return jsonify(status), 200 if ready else 503
+
+
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics():
+    snapshot = metrics.snapshot()
+    if hasattr(chroma_manager.backend, "shard_counts"):
+        snapshot["shard_counts"] = chroma_manager.backend.shard_counts()
+    from services.embedding_cache import embedding_cache_stats
+    snapshot["embedding_cache"] = embedding_cache_stats()
+    
+    if hasattr(chroma_manager.backend, "stats"):
+        try:
+            snapshot["retrieval_server"] = chroma_manager.backend.stats()
+        except Exception as e:
+            app.logger.error(f"Error fetching retrieval server stats: {str(e)}")
+    
+    if admission_controller is not None:
+        snapshot["admission"] = admission_controller.stats()
+    
+    embedding_server_stats = embedding_service.get_server_stats()
+    if embedding_server_stats:
+        snapshot["embedding_server"] = embedding_server_stats
+    return jsonify(snapshot)
+
+
 @app.route("/api/chat", methods=["POST"])
 def chat():
+    deadline = new_deadline(request.headers.get("X-Request-Deadline-Ms"))
     data = request.json
     query = data.get("query", "")
     session_id = data.get("session_id", "default")
     language = data.get("language", "vi")
     
+    try:
+        mmr_lambda = parse_mmr_lambda(data.get("mmr_lambda"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "mmr_lambda must be a number between 0 and 1"}), 400
+    
 
     user_id = None
     token = jwt_manager.get_token_from_header()
@@ -112,12 +339,33 @@ def chat():
     if not language:
         language = detect_language(query)
     
-    result = chat_service.process_query(
-        query_text=query,
-        session_id=session_id,
-        user_id=user_id,
-        language=language
-    )
+    if admission_controller is None:
+        result = chat_service.process_query(
+            query_text=query,
+            session_id=session_id,
+            user_id=user_id,
+            language=language,
+            deadline=deadline,
+            mmr_lambda=mmr_lambda
+        )
+        return jsonify(result)
+    
+    priority = resolve_priority(request.headers.get("X-Request-Priority"), user_id is not None)
+    try:
+        with admission_controller.admit(priority) as ticket:
+            result = chat_service.process_query(
+                query_text=query,
+                session_id=session_id,
+                user_id=user_id,
+                language=language,
+                degradation=ticket.degradation,
+                deadline=deadline,
+                mmr_lambda=mmr_lambda
+            )
+    except Overloaded as e:
+        response = jsonify(overloaded_payload(e, language))
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response, 503
     
     return jsonify(result)
 
@@ -243,9 +491,12 @@ def reindex_documents():
 def get_settings():
     try:
         settings = {
-            "chunk_size": app.config["CHUNK_SIZE"],
-            "chunk_overlap": app.config["CHUNK_OVERLAP"],
+            "chunk_size": chroma_manager.chunk_size,
+            "chunk_overlap": chroma_manager.chunk_overlap,
+            "chunk_length_unit": chroma_manager.length_unit,
             "embedding_model": app.config["EMBEDDING_MODEL"],
+            "embedding_runtime": app.config["EMBEDDING_RUNTIME"],
+            "language_embedding_models": app.config["LANGUAGE_EMBEDDING_MODELS"],
             "supported_languages": ["vi", "en"]
         }
         
@@ -266,8 +517,7 @@ def update_settings():
         if "chunk_overlap" in data:
             app.config["CHUNK_OVERLAP"] = int(data["chunk_overlap"])
             
-        chroma_manager.text_splitter.chunk_size = app.config["CHUNK_SIZE"]
-        chroma_manager.text_splitter.chunk_overlap = app.config["CHUNK_OVERLAP"]
+        chroma_manager.configure_splitter(app.config["CHUNK_SIZE"], app.config["CHUNK_OVERLAP"])
         
         return jsonify({"success": True})
     except Exception as e:
@@ -283,11 +533,10 @@ admin_blueprint = init_routes(document_service)
 app.register_blueprint(admin_blueprint)
 
 
-with app.app_context():
-    try:
-        db_manager.setup_database()
-    except Exception as e:
-        app.logger.error(f"Error setting up database: {str(e)}")
+if app.config["STARTUP_WARMUP"] == "eager":
+    services.warm_up()
+elif app.config["STARTUP_WARMUP"] == "background":
+    services.start_warm_up()
 
 if __name__ == "__main__":
     app.run(debug=app.config["DEBUG"], host="0.0.0.0", port=5000)
\ No newline at end of file
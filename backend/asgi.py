@@ -0,0 +1,137 @@
+import json
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from a2wsgi import WSGIMiddleware
+
+from app import app as flask_app, services, jwt_manager, admission_controller, new_deadline, parse_mmr_lambda
+from config.settings import Config
+from services.admission_control import Overloaded, overloaded_payload, resolve_priority
+from utils.text_processor import detect_language
+
+logger = logging.getLogger(__name__)
+
+wsgi_app = WSGIMiddleware(flask_app, workers=Config.ASGI_WSGI_THREADS)
+
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope.get("headers", []):
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return ""
+
+
+async def _read_json(receive):
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return json.loads(body) if body else {}
+
+
+async def _send_json(send, payload, status: int = 200, headers=None):
+    body = json.dumps(payload, default=str).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"access-control-allow-origin", b"*")
+        ] + list(headers or [])
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def chat(scope, receive, send):
+    deadline = new_deadline(_header(scope, b"x-request-deadline-ms"))
+    try:
+        data = await _read_json(receive)
+    except ValueError:
+        await _send_json(send, {"error": "Invalid JSON body"}, 400)
+        return
+
+    query = data.get("query", "")
+    session_id = data.get("session_id", "default")
+    language = data.get("language", "vi")
+
+    try:
+        mmr_lambda = parse_mmr_lambda(data.get("mmr_lambda"))
+    except (TypeError, ValueError):
+        await _send_json(send, {"error": "mmr_lambda must be a number between 0 and 1"}, 400)
+        return
+
+
+    user_id = None
+    token = jwt_manager.get_token_from_header(_header(scope, b"authorization"))
+    if token:
+        try:
+            payload = jwt_manager.decode_token(token)
+            user_data = payload.get('data', {})
+            user_id = user_data.get('id')
+        except:
+            pass
+
+    if not query:
+        await _send_json(send, {"error": "Query is required"}, 400)
+        return
+
+
+    if not language:
+        language = detect_language(query)
+
+    chat_service = await asyncio.to_thread(services.get, "chat_service")
+    if admission_controller is None:
+        result = await chat_service.aprocess_query(
+            query_text=query,
+            session_id=session_id,
+            user_id=user_id,
+            language=language,
+            deadline=deadline,
+            mmr_lambda=mmr_lambda
+        )
+        await _send_json(send, result)
+        return
+
+    priority = resolve_priority(_header(scope, b"x-request-priority"), user_id is not None)
+    try:
+        async with admission_controller.aadmit(priority) as ticket:
+            result = await chat_service.aprocess_query(
+                query_text=query,
+                session_id=session_id,
+                user_id=user_id,
+                language=language,
+                degradation=ticket.degradation,
+                deadline=deadline,
+                mmr_lambda=mmr_lambda
+            )
+    except Overloaded as e:
+        await _send_json(send, overloaded_payload(e, language), 503, [(b"retry-after", str(e.retry_after).encode("latin-1"))])
+        return
+
+    await _send_json(send, result)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=Config.ASYNC_EXECUTOR_WORKERS, thread_name_prefix="async-offload")
+            )
+            logger.info(f"ASGI app started with {Config.ASYNC_EXECUTOR_WORKERS} offload threads")
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    elif scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/api/chat":
+        await chat(scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
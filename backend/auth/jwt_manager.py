@@ -45,8 +45,9 @@ class JWTManager:
             algorithms=['HS256']
         )
     
-    def get_token_from_header(self) -> Optional[str]:
-        auth_header = request.headers.get('Authorization')
+    def get_token_from_header(self, auth_header: Optional[str] = None) -> Optional[str]:
+        if auth_header is None:
+            auth_header = request.headers.get('Authorization')
         if not auth_header:
             return None
             
@@ -9,10 +9,52 @@ class Config:
     
     # ChromaDB
     CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+    VECTOR_STORE_MODE = os.getenv("VECTOR_STORE_MODE", "local")
+    RETRIEVAL_SERVER_SOCKET = os.getenv("RETRIEVAL_SERVER_SOCKET", "/tmp/rag_retrieval.sock")
+    RETRIEVAL_BATCH_SIZE = int(os.getenv("RETRIEVAL_BATCH_SIZE", "16"))
+    RETRIEVAL_BATCH_WAIT_MS = float(os.getenv("RETRIEVAL_BATCH_WAIT_MS", "2"))
+    VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
+    QUANTIZATION_RESCORE_FACTOR = int(os.getenv("QUANTIZATION_RESCORE_FACTOR", "10"))
+    IVF_NLIST = int(os.getenv("IVF_NLIST", "1024"))
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+    SHARD_BY = os.getenv("SHARD_BY", "none")
+    NUM_SHARDS = int(os.getenv("NUM_SHARDS", "4"))
+    SHARD_CATEGORIES = [category.strip() for category in os.getenv("SHARD_CATEGORIES", "general,technical,policy,faq").split(",") if category.strip()]
+    RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+    RETRIEVAL_CACHE_DISK_SIZE = int(os.getenv("RETRIEVAL_CACHE_DISK_SIZE", "10000"))
+    RETRIEVAL_CACHE_TTL = int(os.getenv("RETRIEVAL_CACHE_TTL", "0"))
+    RELEVANCE_SCORE_THRESHOLD = float(os.getenv("RELEVANCE_SCORE_THRESHOLD", "0.25"))
+    MMR_LAMBDA = float(os.getenv("MMR_LAMBDA")) if os.getenv("MMR_LAMBDA") else None
+    MMR_FETCH_K = int(os.getenv("MMR_FETCH_K", "20"))
+    CONTEXT_MIN_K = int(os.getenv("CONTEXT_MIN_K", "1"))
+    CONTEXT_MAX_K = int(os.getenv("CONTEXT_MAX_K", "8"))
+    CONTEXT_SCORE_GAP = float(os.getenv("CONTEXT_SCORE_GAP", "0.1"))
+    CONTEXT_RELATIVE_FLOOR = float(os.getenv("CONTEXT_RELATIVE_FLOOR", "0.8"))
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+    CONTEXT_COMPRESSION_ENABLED = os.getenv("CONTEXT_COMPRESSION_ENABLED", "true").lower() == "true"
+    CONTEXT_COMPRESSION_TOKENS = int(os.getenv("CONTEXT_COMPRESSION_TOKENS", "1500"))
+    PROMPT_TOKENS_PER_SECOND = float(os.getenv("PROMPT_TOKENS_PER_SECOND", "2000"))
+    CONTEXT_MODEL_BUDGETS = {
+        model.strip(): int(budget) for model, budget in (
+            item.split("=", 1) for item in os.getenv(
+                "CONTEXT_MODEL_BUDGETS", "gemini-1.5-pro=4000,gemini-1.5-flash=6000"
+            ).split(",") if "=" in item
+        )
+    }
     
     # Document Processing
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "512"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "50"))
+    CHUNK_LENGTH_UNIT = os.getenv("CHUNK_LENGTH_UNIT", "tokens")
+    PARENT_CHUNK_SIZE = int(os.getenv("PARENT_CHUNK_SIZE", "1024"))
+    CSV_INGEST_MODE = os.getenv("CSV_INGEST_MODE", "row_group")
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    NEAR_DEDUP_ENABLED = os.getenv("NEAR_DEDUP_ENABLED", "true").lower() == "true"
+    NEAR_DEDUP_THRESHOLD = float(os.getenv("NEAR_DEDUP_THRESHOLD", "0.85"))
+    MINHASH_NUM_PERM = int(os.getenv("MINHASH_NUM_PERM", "128"))
+    MINHASH_BANDS = int(os.getenv("MINHASH_BANDS", "16"))
     
     # Flask
     SECRET_KEY = os.getenv("SECRET_KEY", "secret-key")
@@ -32,6 +74,46 @@ class Config:
     
     # Embedding Model
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "local")
+    EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET", "/tmp/rag_embedding.sock")
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+    EMBEDDING_RUNTIME = os.getenv("EMBEDDING_RUNTIME", "torch")
+    ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "./onnx_models")
+    ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() == "true"
+    ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", "0"))
+    ONNX_PARITY_THRESHOLD = float(os.getenv("ONNX_PARITY_THRESHOLD", "0.99"))
+    LANGUAGE_EMBEDDING_MODELS = dict(
+        item.strip().split("=", 1) for item in os.getenv("LANGUAGE_EMBEDDING_MODELS", "").split(",") if "=" in item
+    )
+    LANGUAGE_FALLBACK = os.getenv("LANGUAGE_FALLBACK", "true").lower() == "true"
+    
+    # Chat
+    CHAT_COALESCING_ENABLED = os.getenv("CHAT_COALESCING_ENABLED", "true").lower() == "true"
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "16"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "5000"))
+    CHAT_DEADLINE_MS = float(os.getenv("CHAT_DEADLINE_MS", "25000"))
+    CHAT_DEADLINE_MAX_MS = float(os.getenv("CHAT_DEADLINE_MAX_MS", "60000"))
+    DEADLINE_STAGE_COSTS_MS = {
+        stage.strip(): float(cost) for stage, cost in (
+            item.split("=", 1) for item in os.getenv(
+                "DEADLINE_STAGE_COSTS_MS", "reflection=2000,routing=1500,retrieval=500,generation=6000"
+            ).split(",") if "=" in item
+        )
+    }
+    GENERATION_TOKENS_PER_SECOND = float(os.getenv("GENERATION_TOKENS_PER_SECOND", "50"))
+    GENERATION_MIN_MS = float(os.getenv("GENERATION_MIN_MS", "1500"))
+    ADMISSION_DEGRADE_DEPTHS = [int(depth) for depth in os.getenv("ADMISSION_DEGRADE_DEPTHS", "8,24,48").split(",") if depth.strip()]
+    
+    # Startup
+    STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background")
+    
+    # ASGI
+    ASYNC_EXECUTOR_WORKERS = int(os.getenv("ASYNC_EXECUTOR_WORKERS", "32"))
+    ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "16"))
     
     # Upload
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "./uploads")
@@ -4,6 +4,7 @@ from typing import Dict, List, Any, Optional, Union, Tuple
 import logging
 import hashlib
 from datetime import datetime
+from utils.fork_safety import register_after_fork
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,7 @@ class MySQLManager:
             self.config = config
             
         self._create_connection_pool()
+        register_after_fork(self._create_connection_pool)
         
     def _create_connection_pool(self, pool_size: int = 5):
         try:
@@ -369,12 +371,14 @@ class MySQLManager:
             VALUES (%s, %s, %s)
             """
             
+            saved = set()
             for source in response.source_documents:
-                doc_id = source.get('id')
                 relevance = source.get('relevance_score', 0.0)
                 
-                if doc_id:
-                    self.execute_query(source_query, (response.id, doc_id, relevance))
+                for doc_id in source.get('source_document_ids') or [source.get('id')]:
+                    if doc_id and doc_id not in saved:
+                        saved.add(doc_id)
+                        self.execute_query(source_query, (response.id, doc_id, relevance))
         
         return response.id
     
@@ -0,0 +1,70 @@
+import gc
+import os
+import sys
+import time
+import subprocess
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true"
+
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+if preload_app:
+    os.environ.setdefault("STARTUP_WARMUP", "eager")
+
+from config.settings import Config
+from utils.fork_safety import reinitialize_after_fork
+
+SIDECAR_START_TIMEOUT = int(os.getenv("SIDECAR_START_TIMEOUT", os.getenv("EMBEDDING_SERVER_START_TIMEOUT", "180")))
+
+_sidecars = []
+
+def _start_sidecar(server, module, socket_path):
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", module],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    _sidecars.append(process)
+    server.log.info(f"Started {module} (pid {process.pid}) on {socket_path}")
+
+    deadline = time.time() + SIDECAR_START_TIMEOUT
+    while not os.path.exists(socket_path):
+        if process.poll() is not None:
+            raise RuntimeError(f"{module} exited with code {process.returncode}")
+        if time.time() > deadline:
+            raise RuntimeError(f"Timed out waiting for {module} to start")
+        time.sleep(0.2)
+
+def on_starting(server):
+    if Config.EMBEDDING_BACKEND == "server":
+        _start_sidecar(server, "services.embedding_server", Config.EMBEDDING_SERVER_SOCKET)
+
+    if Config.VECTOR_STORE_MODE == "server":
+        _start_sidecar(server, "vector_store.retrieval_server", Config.RETRIEVAL_SERVER_SOCKET)
+
+def when_ready(server):
+    if preload_app:
+        gc.collect()
+        gc.freeze()
+        server.log.info(f"Froze {gc.get_freeze_count()} preloaded objects before forking workers")
+
+def post_fork(server, worker):
+    if preload_app:
+        reinitialize_after_fork()
+
+def on_exit(server):
+    for process in _sidecars:
+        if process.poll() is None:
+            process.terminate()
+
+    for process in _sidecars:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
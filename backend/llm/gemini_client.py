@@ -1,3 +1,4 @@
+import asyncio
 import google.generativeai as genai
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.schema import HumanMessage, SystemMessage
@@ -5,27 +6,49 @@ from langchain.schema import HumanMessage, SystemMessage
 class GeminiClient:
     def __init__(self, api_key):
         self.api_key = api_key
+        self.model_name = "gemini-1.5-pro"
+        self.max_output_tokens = 2048
         genai.configure(api_key=api_key)
         
         self.llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-pro", 
+            model=self.model_name, 
             google_api_key=api_key,
             temperature=0.7,
-            max_output_tokens=2048
+            max_output_tokens=self.max_output_tokens
         )
         
-    def generate(self, prompt, system_prompt=None, temperature=None):
+    def _build_messages(self, prompt, system_prompt=None):
         messages = []
         
         if system_prompt:
             messages.append(SystemMessage(content=system_prompt))
             
         messages.append(HumanMessage(content=prompt))
+        return messages
         
+    def _generation_kwargs(self, temperature=None, max_output_tokens=None):
+        generation_config = {}
         if temperature is not None:
-            response = self.llm.generate([messages], temperature=temperature)
+            generation_config["temperature"] = temperature
+        if max_output_tokens is not None:
+            generation_config["max_output_tokens"] = max_output_tokens
+        return {"generation_config": generation_config} if generation_config else {}
+        
+    def generate(self, prompt, system_prompt=None, temperature=None, max_output_tokens=None):
+        messages = self._build_messages(prompt, system_prompt)
+        
+        response = self.llm.generate([messages], **self._generation_kwargs(temperature, max_output_tokens))
+            
+        return response.generations[0][0].text
+        
+    async def agenerate(self, prompt, system_prompt=None, temperature=None, max_output_tokens=None, timeout=None):
+        messages = self._build_messages(prompt, system_prompt)
+        
+        call = self.llm.agenerate([messages], **self._generation_kwargs(temperature, max_output_tokens))
+        if timeout is not None:
+            response = await asyncio.wait_for(call, timeout)
         else:
-            response = self.llm.generate([messages])
+            response = await call
             
         return response.generations[0][0].text
         
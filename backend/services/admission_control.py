@@ -0,0 +1,209 @@
+import math
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional, Sequence
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+DEGRADATION_NONE = 0
+DEGRADATION_SKIP_REFLECTION = 1
+DEGRADATION_LOCAL_ROUTER = 2
+DEGRADATION_EXTRACTIVE = 3
+
+class Overloaded(Exception):
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class Ticket:
+    __slots__ = ("priority", "queued_ms", "degradation", "_started_at")
+
+    def __init__(self, priority: str, queued_ms: float, degradation: int):
+        self.priority = priority
+        self.queued_ms = queued_ms
+        self.degradation = degradation
+        self._started_at = time.perf_counter()
+
+class _Waiter:
+    __slots__ = ("granted", "abandoned", "event", "loop", "future")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.granted = False
+        self.abandoned = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+class AdmissionController:
+
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 64, queue_timeout_ms: float = 5000,
+                 priority_queue_limits: Optional[Dict[str, int]] = None,
+                 degrade_queue_depths: Sequence[int] = (8, 24, 48)):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout_ms / 1000.0
+        self.priority_queue_limits = {
+            "high": max_queue,
+            "normal": max_queue * 3 // 4,
+            "low": max_queue // 4
+        }
+        self.priority_queue_limits.update(priority_queue_limits or {})
+        self.degrade_queue_depths = tuple(degrade_queue_depths)
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queue = []
+        self._waiting = 0
+        self._sequence = itertools.count()
+        self._service_time = 1.0
+
+    def _priority(self, priority: str) -> str:
+        return priority if priority in PRIORITIES else "normal"
+
+    def _degradation(self, depth: int) -> int:
+        return sum(1 for threshold in self.degrade_queue_depths if depth >= threshold)
+
+    def retry_after(self) -> int:
+        backlog = (self._waiting + self._active) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(backlog * self._service_time))
+
+    def _reject(self, priority: str, reason: str):
+        metrics.increment("admission_rejected", labels={"priority": priority, "reason": reason})
+        logger.warning(f"Rejected {priority} request: {reason}")
+        raise Overloaded(reason, self.retry_after())
+
+    def _enqueue(self, priority: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[_Waiter]:
+        with self._lock:
+            if self._active < self.max_concurrent and not self._waiting:
+                self._active += 1
+                return None
+
+            if self._waiting >= self.priority_queue_limits.get(priority, self.max_queue):
+                self._reject(priority, "queue_full")
+
+            waiter = _Waiter(loop)
+            heapq.heappush(self._queue, (PRIORITIES[priority], next(self._sequence), waiter))
+            self._waiting += 1
+            return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        with self._lock:
+            if waiter.granted:
+                return False
+            waiter.abandoned = True
+            self._waiting -= 1
+            return True
+
+    def _admitted(self, priority: str, start_time: float) -> Ticket:
+        queued_ms = (time.perf_counter() - start_time) * 1000
+        with self._lock:
+            degradation = self._degradation(self._waiting)
+
+        metrics.observe("admission_queue_ms", queued_ms, labels={"priority": priority})
+        if degradation:
+            metrics.increment("admission_degraded", labels={"level": str(degradation)})
+        return Ticket(priority, queued_ms, degradation)
+
+    def acquire(self, priority: str = "normal") -> Ticket:
+        priority = self._priority(priority)
+        start_time = time.perf_counter()
+        waiter = self._enqueue(priority)
+
+        if waiter is not None and not waiter.event.wait(self.queue_timeout) and self._abandon(waiter):
+            self._reject(priority, "queue_timeout")
+
+        return self._admitted(priority, start_time)
+
+    async def aacquire(self, priority: str = "normal") -> Ticket:
+        priority = self._priority(priority)
+        start_time = time.perf_counter()
+        waiter = self._enqueue(priority, asyncio.get_running_loop())
+
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+            except asyncio.TimeoutError:
+                if self._abandon(waiter):
+                    self._reject(priority, "queue_timeout")
+            except asyncio.CancelledError:
+                if not self._abandon(waiter):
+                    self.release()
+                raise
+
+        return self._admitted(priority, start_time)
+
+    def release(self, ticket: Optional[Ticket] = None):
+        with self._lock:
+            if ticket is not None:
+                elapsed = time.perf_counter() - ticket._started_at
+                self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+
+            while self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                if waiter.abandoned:
+                    continue
+                waiter.granted = True
+                self._waiting -= 1
+                waiter.wake()
+                return
+
+            self._active -= 1
+
+    @contextmanager
+    def admit(self, priority: str = "normal"):
+        ticket = self.acquire(priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    @asynccontextmanager
+    async def aadmit(self, priority: str = "normal"):
+        ticket = await self.aacquire(priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self._active,
+                "waiting": self._waiting,
+                "max_concurrent": self.max_concurrent,
+                "queue_limits": dict(self.priority_queue_limits),
+                "degradation": self._degradation(self._waiting),
+                "avg_service_seconds": round(self._service_time, 3)
+            }
+
+def resolve_priority(requested: Optional[str], authenticated: bool) -> str:
+    if requested in ("low", "normal"):
+        return requested
+    return "high" if authenticated else "normal"
+
+def overloaded_payload(error: Overloaded, language: str = "vi") -> Dict[str, Any]:
+    if language == "vi":
+        message = "Hệ thống đang quá tải, vui lòng thử lại sau ít phút."
+    else:
+        message = "The system is overloaded, please try again shortly."
+    return {"error": message, "reason": error.reason, "retry_after": error.retry_after}
@@ -1,109 +1,296 @@
 import time
+import asyncio
 import logging
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 from models.query import Query
 from models.response import Response
+from utils.single_flight import AsyncSingleFlight, SingleFlight, SingleFlightTimeout
+from utils.deadline import Deadline
+from services.admission_control import DEGRADATION_EXTRACTIVE, DEGRADATION_LOCAL_ROUTER, DEGRADATION_SKIP_REFLECTION
+from vector_store.retrieval_cache import normalize_query
 
 logger = logging.getLogger(__name__)
 
 class ChatService:
-    def __init__(self, semantic_router, reflection_service, rag_service, llm_client, db_manager=None):
+    def __init__(self, semantic_router, reflection_service, rag_service, llm_client, db_manager=None, coalesce=True):
         self.semantic_router = semantic_router
         self.reflection_service = reflection_service
         self.rag_service = rag_service
         self.llm_client = llm_client
         self.db_manager = db_manager
+        self.single_flight = SingleFlight("chat") if coalesce else None
+        self.async_single_flight = AsyncSingleFlight("chat") if coalesce else None
         
-    def process_query(self, query_text: str, session_id: str = None, user_id: Optional[int] = None, language: str = "vi") -> Dict[str, Any]:
+    def _new_query(self, query_text: str, session_id: str, user_id: Optional[int], language: str) -> Query:
+        return Query(
+            text=query_text,
+            user_id=user_id,
+            session_id=session_id,
+            language=language,
+            created_at=datetime.now().isoformat()
+        )
+    
+    def _chitchat_system_prompt(self, language: str) -> str:
+        return f"Bạn là trợ lý AI hữu ích trả lời bằng {'tiếng Việt' if language == 'vi' else 'English'}."
+    
+    def _busy_chitchat_response(self, language: str) -> str:
+        if language == "vi":
+            return "Xin chào! Hệ thống đang có nhiều người dùng, bạn hãy đặt câu hỏi cụ thể về tuyển sinh để được hỗ trợ nhanh nhất."
+        return "Hello! The system is busy right now, please ask a specific admissions question so we can help you faster."
+    
+    def _build_response(self, query: Query, text: str, source_documents: List[Dict[str, Any]], response_type: str,
+                        start_time: float) -> Response:
+        return Response(
+            query_id=query.id,
+            text=text,
+            query_text=query.text,
+            source_documents=source_documents,
+            response_type=response_type,
+            session_id=query.session_id,
+            user_id=query.user_id,
+            language=query.language,
+            processing_time=time.time() - start_time,
+            created_at=datetime.now().isoformat()
+        )
+    
+    def _to_result(self, query: Query, response: Response) -> Dict[str, Any]:
+        result = {
+            "response": response.text,
+            "source_documents": response.source_documents,
+            "route_type": response.response_type,
+            "query_id": query.id,
+            "response_id": response.id
+        }
+        if response.metadata:
+            result["metadata"] = response.metadata
+        return result
+    
+    def _error_result(self, error: Exception, language: str, start_time: float) -> Dict[str, Any]:
+        logger.error(f"Error processing query: {str(error)}")
+        processing_time = time.time() - start_time
         
-        start_time = time.time()
+        error_message = "Đã xảy ra lỗi khi xử lý câu hỏi" if language == "vi" else "An error occurred while processing your question"
+        
+        return {
+            "response": f"{error_message}: {str(error)}",
+            "source_documents": [],
+            "route_type": "error",
+            "processing_time": processing_time
+        }
+        
+    def _coalesce_key(self, query_text: str, language: str, degradation: int = 0,
+                      mmr_lambda: Optional[float] = None) -> Tuple[str, str, int, Optional[float], int]:
+        return normalize_query(query_text), language, degradation, mmr_lambda, self.rag_service.corpus_version()
+    
+    def _coalesce_timeout(self, deadline: Optional[Deadline]) -> Optional[float]:
+        return deadline.timeout("retrieval") if deadline else None
+    
+    def _chitchat_cap(self, degradation: int, deadline: Optional[Deadline]) -> Optional[int]:
+        if degradation >= DEGRADATION_EXTRACTIVE:
+            return 0
+        if deadline is None:
+            return None
+        return deadline.generation_cap(getattr(self.llm_client, "max_output_tokens", 2048))
+    
+    def _answer(self, query_text: str, session_id: str, language: str, degradation: int = 0,
+                deadline: Optional[Deadline] = None, mmr_lambda: Optional[float] = None) -> Dict[str, Any]:
+        if degradation >= DEGRADATION_SKIP_REFLECTION:
+            enhanced_query = query_text
+        else:
+            enhanced_query = self.reflection_service.enhance_query(query_text, language, deadline=deadline)
         
-        try:
 
-            query = Query(
-                text=query_text,
-                user_id=user_id,
-                session_id=session_id,
-                language=language,
-                created_at=datetime.now().isoformat()
+        context = {"session_id": session_id, "language": language}
+        if degradation >= DEGRADATION_LOCAL_ROUTER:
+            route_type, route_data = self.semantic_router.route_query_local(enhanced_query, context)
+        else:
+            route_type, route_data = self.semantic_router.route_query(enhanced_query, context, deadline=deadline)
+        
+        if route_type == "admission_query":
+
+            result = self.rag_service.process_query(
+                enhanced_query, language, extractive=degradation >= DEGRADATION_EXTRACTIVE, deadline=deadline,
+                mmr_lambda=mmr_lambda
             )
-            
-            enhanced_query = self.reflection_service.enhance_query(query_text, language)
-            query.enhanced_text = enhanced_query
-            
+            text = result["response"]
+            source_documents = [doc.metadata for doc in result.get("source_documents", [])]
+            context_stats = result.get("context")
+        else:
+            max_output_tokens = self._chitchat_cap(degradation, deadline)
+            if max_output_tokens == 0:
+                text = self._busy_chitchat_response(language)
+            else:
+
+                text = self.llm_client.generate(
+                    prompt=query_text,
+                    system_prompt=self._chitchat_system_prompt(language),
+                    max_output_tokens=max_output_tokens
+                )
+            source_documents = []
+            context_stats = None
+        
+        return {
+            "enhanced_query": enhanced_query,
+            "route_type": route_type,
+            "text": text,
+            "source_documents": source_documents,
+            "degradation": degradation,
+            "context": context_stats,
+            "decisions": dict(deadline.decisions) if deadline else {}
+        }
+    
+    async def _aanswer(self, query_text: str, session_id: str, language: str, degradation: int = 0,
+                       deadline: Optional[Deadline] = None, mmr_lambda: Optional[float] = None) -> Dict[str, Any]:
+        if degradation >= DEGRADATION_SKIP_REFLECTION:
+            enhanced_query = query_text
+        else:
+            enhanced_query = await self.reflection_service.aenhance_query(query_text, language, deadline=deadline)
+        
+
+        context = {"session_id": session_id, "language": language}
+        if degradation >= DEGRADATION_LOCAL_ROUTER:
+            route_type, route_data = self.semantic_router.route_query_local(enhanced_query, context)
+        else:
+            route_type, route_data = await self.semantic_router.aroute_query(enhanced_query, context, deadline=deadline)
+        
+        if route_type == "admission_query":
 
-            route_type, route_data = self.semantic_router.route_query(
-                enhanced_query,
-                {"session_id": session_id, "language": language}
+            result = await self.rag_service.aprocess_query(
+                enhanced_query, language, extractive=degradation >= DEGRADATION_EXTRACTIVE, deadline=deadline,
+                mmr_lambda=mmr_lambda
             )
+            text = result["response"]
+            source_documents = [doc.metadata for doc in result.get("source_documents", [])]
+            context_stats = result.get("context")
+        else:
+            max_output_tokens = self._chitchat_cap(degradation, deadline)
+            if max_output_tokens == 0:
+                text = self._busy_chitchat_response(language)
+            else:
+                try:
+
+                    text = await self.llm_client.agenerate(
+                        prompt=query_text,
+                        system_prompt=self._chitchat_system_prompt(language),
+                        max_output_tokens=max_output_tokens,
+                        timeout=deadline.timeout() if deadline else None
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning("Chitchat generation timed out")
+                    deadline.record("generation", "canned_after_timeout")
+                    text = self._busy_chitchat_response(language)
+            source_documents = []
+            context_stats = None
+        
+        return {
+            "enhanced_query": enhanced_query,
+            "route_type": route_type,
+            "text": text,
+            "source_documents": source_documents,
+            "degradation": degradation,
+            "context": context_stats,
+            "decisions": dict(deadline.decisions) if deadline else {}
+        }
+    
+    def _record(self, query: Query, answer: Dict[str, Any], start_time: float,
+                deadline: Optional[Deadline] = None) -> Tuple[Query, Response]:
+        query.enhanced_text = answer["enhanced_query"]
+        query.query_type = "rag" if answer["route_type"] == "admission_query" else "chitchat"
+        
+        response = self._build_response(
+            query,
+            answer["text"],
+            list(answer["source_documents"]),
+            query.query_type,
+            start_time
+        )
+        if answer["degradation"]:
+            response.metadata["degradation"] = answer["degradation"]
+        if answer["context"]:
+            response.metadata["context"] = answer["context"]
+        if deadline is not None:
+            response.metadata["deadline"] = dict(deadline.to_metadata(), decisions=answer["decisions"])
+        return query, response
+        
+    def process_query(self, query_text: str, session_id: str = None, user_id: Optional[int] = None, language: str = "vi",
+                      degradation: int = 0, deadline: Optional[Deadline] = None,
+                      mmr_lambda: Optional[float] = None) -> Dict[str, Any]:
+        
+        start_time = time.time()
+        
+        try:
+
+            query = self._new_query(query_text, session_id, user_id, language)
             
-            query.query_type = "rag" if route_type == "admission_query" else "chitchat"
+            if self.single_flight is not None:
+                try:
+                    answer, shared = self.single_flight.do(
+                        self._coalesce_key(query_text, language, degradation, mmr_lambda),
+                        lambda: self._answer(query_text, session_id, language, degradation, deadline, mmr_lambda),
+                        timeout=self._coalesce_timeout(deadline)
+                    )
+                    if shared:
+                        logger.info(f"Coalesced in-flight query: {query_text}")
+                except SingleFlightTimeout:
+                    logger.warning(f"Coalesced query ran out of time waiting for the leader: {query_text}")
+                    deadline.record("coalesce", "extractive_after_timeout")
+                    answer = self._answer(query_text, session_id, language, DEGRADATION_EXTRACTIVE, deadline, mmr_lambda)
+            else:
+                answer = self._answer(query_text, session_id, language, degradation, deadline, mmr_lambda)
+            
+            query, response = self._record(query, answer, start_time, deadline)
             
+
             if self.db_manager:
                 self.db_manager.save_query(query)
+                self.db_manager.save_response(response)
             
-            if route_type == "admission_query":
+            return self._to_result(query, response)
+            
+        except Exception as e:
+            return self._error_result(e, language, start_time)
+    
+    async def aprocess_query(self, query_text: str, session_id: str = None, user_id: Optional[int] = None, language: str = "vi",
+                             degradation: int = 0, deadline: Optional[Deadline] = None,
+                             mmr_lambda: Optional[float] = None) -> Dict[str, Any]:
+        
+        start_time = time.time()
+        
+        try:
 
-                result = self.rag_service.process_query(enhanced_query, language)
-                
-                response = Response(
-                    query_id=query.id,
-                    text=result["response"],
-                    query_text=query_text,
-                    source_documents=[doc.metadata for doc in result.get("source_documents", [])],
-                    response_type="rag",
-                    session_id=session_id,
-                    user_id=user_id,
-                    language=language,
-                    processing_time=time.time() - start_time,
-                    created_at=datetime.now().isoformat()
-                )
+            query = self._new_query(query_text, session_id, user_id, language)
+            
+            if self.async_single_flight is not None:
+                key = await asyncio.to_thread(self._coalesce_key, query_text, language, degradation, mmr_lambda)
+                try:
+                    answer, shared = await self.async_single_flight.do(
+                        key,
+                        lambda: self._aanswer(query_text, session_id, language, degradation, deadline, mmr_lambda),
+                        timeout=self._coalesce_timeout(deadline)
+                    )
+                    if shared:
+                        logger.info(f"Coalesced in-flight query: {query_text}")
+                except SingleFlightTimeout:
+                    logger.warning(f"Coalesced query ran out of time waiting for the leader: {query_text}")
+                    deadline.record("coalesce", "extractive_after_timeout")
+                    answer = await self._aanswer(
+                        query_text, session_id, language, DEGRADATION_EXTRACTIVE, deadline, mmr_lambda
+                    )
             else:
-
-                system_prompt = f"Bạn là trợ lý AI hữu ích trả lời bằng {'tiếng Việt' if language == 'vi' else 'English'}."
-                chatbot_response = self.llm_client.generate(
-                    prompt=query_text,
-                    system_prompt=system_prompt
-                )
-                
-                response = Response(
-                    query_id=query.id,
-                    text=chatbot_response,
-                    query_text=query_text,
-                    source_documents=[],
-                    response_type="chitchat",
-                    session_id=session_id,
-                    user_id=user_id,
-                    language=language,
-                    processing_time=time.time() - start_time,
-                    created_at=datetime.now().isoformat()
-                )
+                answer = await self._aanswer(query_text, session_id, language, degradation, deadline, mmr_lambda)
+            
+            query, response = self._record(query, answer, start_time, deadline)
             
 
             if self.db_manager:
-                self.db_manager.save_response(response)
+                await asyncio.to_thread(self.db_manager.save_query, query)
+                await asyncio.to_thread(self.db_manager.save_response, response)
             
-            return {
-                "response": response.text,
-                "source_documents": response.source_documents,
-                "route_type": response.response_type,
-                "query_id": query.id,
-                "response_id": response.id
-            }
+            return self._to_result(query, response)
             
         except Exception as e:
-            logger.error(f"Error processing query: {str(e)}")
-            processing_time = time.time() - start_time
-            
-            error_message = "Đã xảy ra lỗi khi xử lý câu hỏi" if language == "vi" else "An error occurred while processing your question"
-            
-            return {
-                "response": f"{error_message}: {str(e)}",
-                "source_documents": [],
-                "route_type": "error",
-                "processing_time": processing_time
-            }
+            return self._error_result(e, language, start_time)
     
     def get_chat_history(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         if not self.db_manager:
@@ -0,0 +1,113 @@
+import time
+import threading
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+class _Component:
+    __slots__ = ("name", "factory", "instance", "status", "init_ms", "error", "lock")
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self.instance = None
+        self.status = "pending"
+        self.init_ms = None
+        self.error = None
+        self.lock = threading.Lock()
+
+class LazyService:
+
+    def __init__(self, container: "ServiceContainer", name: str):
+        object.__setattr__(self, "_container", container)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr: str):
+        return getattr(self._container.get(self._name), attr)
+
+    def __setattr__(self, attr: str, value: Any):
+        setattr(self._container.get(self._name), attr, value)
+
+    def __bool__(self) -> bool:
+        return self._container.get(self._name) is not None
+
+    def __repr__(self) -> str:
+        return f"<LazyService {self._name} ({self._container.status_of(self._name)})>"
+
+class ServiceContainer:
+
+    def __init__(self):
+        self._components = {}
+        self._order = []
+        self._started_at = time.time()
+        self._warmup_thread = None
+
+    def register(self, name: str, factory: Callable[[], Any]) -> LazyService:
+        self._components[name] = _Component(name, factory)
+        self._order.append(name)
+        return LazyService(self, name)
+
+    def get(self, name: str) -> Any:
+        component = self._components[name]
+        if component.status == "loaded":
+            return component.instance
+
+        with component.lock:
+            if component.status == "loaded":
+                return component.instance
+
+            component.status = "loading"
+            start_time = time.perf_counter()
+            try:
+                component.instance = component.factory()
+            except Exception as e:
+                component.status = "failed"
+                component.error = str(e)
+                logger.error(f"Error initializing {name}: {str(e)}")
+                raise
+            finally:
+                component.init_ms = round((time.perf_counter() - start_time) * 1000, 1)
+
+            component.status = "loaded"
+            component.error = None
+            logger.info(f"Initialized {name} in {component.init_ms} ms")
+            return component.instance
+
+    def status_of(self, name: str) -> str:
+        return self._components[name].status
+
+    def warm_up(self, names: Optional[Sequence[str]] = None) -> None:
+        for name in names or self._order:
+            try:
+                self.get(name)
+            except Exception:
+                continue
+
+    def start_warm_up(self, names: Optional[Sequence[str]] = None) -> threading.Thread:
+        if self._warmup_thread is None or not self._warmup_thread.is_alive():
+            self._warmup_thread = threading.Thread(
+                target=self.warm_up, args=(names,), name="service-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+        return self._warmup_thread
+
+    def is_ready(self, names: Optional[Sequence[str]] = None) -> bool:
+        return all(self._components[name].status == "loaded" for name in names or self._order)
+
+    def loaded(self) -> List[str]:
+        return [name for name in self._order if self._components[name].status == "loaded"]
+
+    def status(self) -> Dict[str, Any]:
+        components = {}
+        for name in self._order:
+            component = self._components[name]
+            components[name] = {"status": component.status, "init_ms": component.init_ms}
+            if component.error:
+                components[name]["error"] = component.error
+
+        return {
+            "uptime_seconds": round(time.time() - self._started_at, 1),
+            "warming_up": self._warmup_thread is not None and self._warmup_thread.is_alive(),
+            "components": components
+        }
@@ -0,0 +1,124 @@
+import math
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / 4))
+
+class ContextBuilder:
+
+    def __init__(self, token_counter: Optional[Callable[[str], int]] = None,
+                 model_budgets: Optional[Dict[str, int]] = None, default_budget: int = 3000,
+                 min_k: int = 1, max_k: int = 8, score_gap: float = 0.1, relative_floor: float = 0.8,
+                 min_overlap_chars: int = 40):
+        self.count_tokens = token_counter or estimate_tokens
+        self.model_budgets = dict(model_budgets or {})
+        self.default_budget = default_budget
+        self.min_k = max(1, min_k)
+        self.max_k = max(self.min_k, max_k)
+        self.score_gap = score_gap
+        self.relative_floor = relative_floor
+        self.min_overlap_chars = min_overlap_chars
+
+    def budget_for(self, model_name: Optional[str]) -> int:
+        return self.model_budgets.get(model_name, self.default_budget)
+
+    def select(self, scored_docs: Sequence[Tuple[Document, float]], k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        ranked = sorted(scored_docs, key=lambda item: item[1], reverse=True)[:k or self.max_k]
+        if not ranked:
+            return []
+
+        top_score = ranked[0][1]
+        selected = ranked[:self.min_k]
+        for (_, previous_score), (doc, score) in zip(ranked[self.min_k - 1:], ranked[self.min_k:]):
+            if previous_score - score > self.score_gap or score < top_score * self.relative_floor:
+                break
+            selected.append((doc, score))
+        return selected
+
+    def _overlap(self, left: str, right: str) -> int:
+        probe = right[:self.min_overlap_chars]
+        if len(probe) < self.min_overlap_chars:
+            return 0
+
+        start = left.find(probe)
+        while start != -1:
+            if right.startswith(left[start:]):
+                return len(left) - start
+            start = left.find(probe, start + 1)
+        return 0
+
+    def _merge(self, kept: str, content: str) -> Optional[str]:
+        if content in kept:
+            return kept
+        if kept in content:
+            return content
+
+        overlap = self._overlap(kept, content)
+        if overlap:
+            return kept + content[overlap:]
+
+        overlap = self._overlap(content, kept)
+        if overlap:
+            return content + kept[overlap:]
+        return None
+
+    def deduplicate(self, docs: Sequence[Document]) -> Tuple[List[Document], int]:
+        results = []
+        merged = 0
+        for doc in docs:
+            document_id = doc.metadata.get("id")
+            for i, kept in enumerate(results):
+                same_document = document_id is not None and kept.metadata.get("id") == document_id
+                if not same_document and kept.page_content != doc.page_content:
+                    continue
+                content = self._merge(kept.page_content, doc.page_content)
+                if content is not None:
+                    results[i] = Document(page_content=content, metadata=kept.metadata)
+                    merged += 1
+                    break
+            else:
+                results.append(doc)
+        return results, merged
+
+    def _truncate(self, doc: Document, budget: int) -> Document:
+        content = doc.page_content
+        while content and self.count_tokens(content) > budget:
+            content = content[:int(len(content) * budget / self.count_tokens(content) * 0.95)]
+        return Document(page_content=content, metadata=doc.metadata)
+
+    def pack(self, docs: Sequence[Document], budget: int) -> Tuple[List[Document], int]:
+        packed = []
+        used = 0
+        for doc in docs:
+            tokens = self.count_tokens(doc.page_content)
+            if used + tokens <= budget:
+                packed.append(doc)
+                used += tokens
+
+        if not packed and docs:
+            doc = self._truncate(docs[0], budget)
+            packed.append(doc)
+            used = self.count_tokens(doc.page_content)
+        return packed, used
+
+    def build(self, docs: Sequence[Document], model_name: Optional[str] = None) -> Tuple[List[Document], Dict[str, Any]]:
+        budget = self.budget_for(model_name)
+        unique_docs, merged = self.deduplicate(docs)
+        packed, used = self.pack(unique_docs, budget)
+
+        if len(packed) < len(unique_docs):
+            logger.debug(f"Context budget {budget} tokens fits {len(packed)} of {len(unique_docs)} chunks")
+
+        return packed, {
+            "candidates": len(docs),
+            "merged": merged,
+            "chunks": len(packed),
+            "context_tokens": used,
+            "budget_tokens": budget
+        }
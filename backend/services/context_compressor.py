@@ -0,0 +1,98 @@
+import time
+import logging
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from langchain.schema import Document
+from services.context_builder import estimate_tokens
+from utils.metrics import metrics
+from utils.text_processor import split_into_sentences
+
+logger = logging.getLogger(__name__)
+
+RATIO_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+class ContextCompressor:
+
+    def __init__(self, embeddings_provider: Callable[[str, Optional[str]], Any],
+                 token_counter: Optional[Callable[[str], int]] = None, budget_tokens: int = 1500,
+                 min_sentences: int = 3, prompt_tokens_per_second: float = 2000.0):
+        self.embeddings_provider = embeddings_provider
+        self.count_tokens = token_counter or estimate_tokens
+        self.budget_tokens = budget_tokens
+        self.min_sentences = min_sentences
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+
+    def _score(self, query: str, sentences: List[str], language: str) -> np.ndarray:
+        embeddings = self.embeddings_provider(query, language)
+        query_vector = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+        sentence_vectors = np.asarray(embeddings.embed_documents(sentences), dtype=np.float32)
+
+        norms = np.linalg.norm(sentence_vectors, axis=1) * np.linalg.norm(query_vector)
+        return sentence_vectors @ query_vector / np.maximum(norms, 1e-12)
+
+    def _select(self, sentences: List[str], scores: np.ndarray) -> List[int]:
+        keep = []
+        seen = set()
+        used = 0
+        for index in np.argsort(-scores):
+            if sentences[index] in seen:
+                continue
+            tokens = self.count_tokens(sentences[index])
+            if used + tokens <= self.budget_tokens:
+                keep.append(int(index))
+                seen.add(sentences[index])
+                used += tokens
+        return sorted(keep)
+
+    def compress(self, query: str, docs: Sequence[Document], language: str = "vi") -> Tuple[List[Document], Dict[str, Any]]:
+        start_time = time.perf_counter()
+        original_tokens = sum(self.count_tokens(doc.page_content) for doc in docs)
+        if original_tokens <= self.budget_tokens:
+            return list(docs), {"applied": False, "original_tokens": original_tokens}
+
+        try:
+            spans = [
+                (doc_index, sentence.strip())
+                for doc_index, doc in enumerate(docs)
+                for sentence in split_into_sentences(doc.page_content, language)
+                if sentence.strip()
+            ]
+            if len(spans) <= self.min_sentences:
+                return list(docs), {"applied": False, "original_tokens": original_tokens}
+
+            sentences = [sentence for _, sentence in spans]
+            keep = self._select(sentences, self._score(query, sentences, language))
+
+            kept_by_doc = {}
+            for index in keep:
+                doc_index, sentence = spans[index]
+                kept_by_doc.setdefault(doc_index, []).append(sentence)
+
+            compressed = [
+                Document(page_content=" ".join(kept_by_doc[doc_index]), metadata=doc.metadata)
+                for doc_index, doc in enumerate(docs)
+                if doc_index in kept_by_doc
+            ]
+        except Exception as e:
+            logger.error(f"Error compressing context: {str(e)}")
+            return list(docs), {"applied": False, "original_tokens": original_tokens}
+
+        compressed_tokens = sum(self.count_tokens(doc.page_content) for doc in compressed)
+        compression_ms = (time.perf_counter() - start_time) * 1000
+        saved_ms = (original_tokens - compressed_tokens) / self.prompt_tokens_per_second * 1000 - compression_ms
+        ratio = compressed_tokens / original_tokens
+
+        metrics.observe("context_compression_ratio", ratio, buckets=RATIO_BUCKETS)
+        metrics.observe("context_compression_ms", compression_ms)
+        logger.debug(f"Compressed context from {original_tokens} to {compressed_tokens} tokens in {compression_ms:.1f}ms")
+
+        return compressed, {
+            "applied": True,
+            "sentences": len(sentences),
+            "kept_sentences": len(keep),
+            "original_tokens": original_tokens,
+            "compressed_tokens": compressed_tokens,
+            "ratio": round(ratio, 3),
+            "compression_ms": round(compression_ms, 1),
+            "estimated_saved_ms": round(saved_ms, 1)
+        }
@@ -9,13 +9,21 @@ import tempfile
 from werkzeug.utils import secure_filename
 import logging
 import uuid
+from langchain.schema import Document as LangchainDocument
+from utils.file_utils import compute_file_hash, iter_csv_row_groups
+from utils.text_processor import compute_text_hash
 
 logger = logging.getLogger(__name__)
 
 class DocumentService:
-    def __init__(self, chroma_manager, db_manager=None):
+    def __init__(self, chroma_manager, db_manager=None, hash_index=None, near_duplicate_index=None,
+                 csv_mode="row_group", batch_size=256):
         self.chroma_manager = chroma_manager
         self.db_manager = db_manager
+        self.hash_index = hash_index
+        self.near_duplicate_index = near_duplicate_index if hash_index else None
+        self.csv_mode = csv_mode
+        self.batch_size = batch_size
         self.loaders = {
             '.pdf': PyPDFLoader,
             '.docx': Docx2txtLoader,
@@ -38,28 +46,43 @@ class DocumentService:
             file.save(tmp.name)
             tmp_path = tmp.name
             
+        doc_id = None
         try:
             logger.info(f"Bắt đầu xử lý file: {filename}")
             
-            loader_class = self.loaders[file_ext]
-            loader = loader_class(tmp_path)
-            documents = loader.load()
+            file_hash = None
+            if self.hash_index:
+                file_hash = compute_file_hash(tmp_path)
+                existing_id = self.hash_index.get_document_by_file_hash(file_hash)
+                
+                if existing_id:
+                    logger.info(f"File {filename} trùng nội dung với tài liệu {existing_id}, bỏ qua")
+                    return {
+                        "status": "duplicate",
+                        "document_id": existing_id,
+                        "num_chunks": 0,
+                        "filename": filename
+                    }
             
-            if metadata:
-                for doc in documents:
-                    if not isinstance(doc.metadata, dict):
-                        doc.metadata = {}
-                    doc.metadata.update(metadata)
-                    
             doc_id = metadata.get("id", str(uuid.uuid4()))
             metadata["id"] = doc_id
+            
+            num_chunks = 0
+            num_added = 0
+            batch = []
+            for chunk in self._iter_chunks(tmp_path, file_ext, filename, metadata):
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    num_added += self._add_chunks(batch, doc_id)
+                    num_chunks += len(batch)
+                    batch = []
                     
-            chunked_docs = []
-            for doc in documents:
-                chunks = self.chroma_manager.chunk_document(doc.page_content, doc.metadata)
-                chunked_docs.extend(chunks)
-                
-            self.chroma_manager.add_documents(chunked_docs)
+            if batch:
+                num_added += self._add_chunks(batch, doc_id)
+                num_chunks += len(batch)
+            
+            if self.hash_index:
+                self.hash_index.register_file(file_hash, doc_id)
             
             if self.db_manager and hasattr(self.db_manager, 'save_document'):
                 from models.document import Document
@@ -76,21 +99,115 @@ class DocumentService:
                 
                 self.db_manager.save_document(doc_obj)
             
-            logger.info(f"Đã xử lý thành công file: {filename}, tạo {len(chunked_docs)} chunks")
+            logger.info(
+                f"Đã xử lý thành công file: {filename}, tạo {num_chunks} chunks "
+                f"({num_chunks - num_added} chunks trùng lặp)"
+            )
             
             return {
                 "status": "success",
                 "document_id": doc_id,
-                "num_chunks": len(chunked_docs),
+                "num_chunks": num_chunks,
+                "num_duplicate_chunks": num_chunks - num_added,
                 "filename": filename
             }
             
         except Exception as e:
             logger.error(f"Lỗi xử lý file {filename}: {str(e)}")
+            if doc_id is not None:
+                self._rollback(doc_id)
             raise
         finally:
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
+    
+    def _rollback(self, doc_id):
+        try:
+            self._delete_vectors(doc_id)
+            self.chroma_manager.delete_parents(doc_id)
+            logger.info(f"Đã hoàn tác dữ liệu đã ghi của tài liệu {doc_id}")
+        except Exception as e:
+            logger.error(f"Lỗi khi hoàn tác tài liệu {doc_id}: {str(e)}")
+    
+    def _delete_vectors(self, document_id):
+        if not self.hash_index:
+            self.chroma_manager.delete_documents_where({"id": document_id})
+            return
+        
+        orphaned_ids = self.hash_index.remove_document(document_id)
+        self.chroma_manager.delete_documents(orphaned_ids)
+        
+        if self.near_duplicate_index:
+            self.near_duplicate_index.remove(orphaned_ids)
+    
+    def _iter_chunks(self, file_path, file_ext, filename, metadata):
+        if file_ext == '.csv' and self.csv_mode == "row_group":
+            row_groups = iter_csv_row_groups(
+                file_path,
+                max_length=self.chroma_manager.chunk_size,
+                length_function=self.chroma_manager.length_function
+            )
+            
+            for text, row_start, row_end in row_groups:
+                chunk_metadata = dict(metadata)
+                chunk_metadata.update({"source": filename, "row_start": row_start, "row_end": row_end})
+                yield LangchainDocument(page_content=text, metadata=chunk_metadata)
+            return
+        
+        loader = self.loaders[file_ext](file_path)
+        
+        for doc in loader.lazy_load():
+            if not isinstance(doc.metadata, dict):
+                doc.metadata = {}
+            doc.metadata.update(metadata)
+            
+            yield from self.chroma_manager.chunk_document(doc.page_content, doc.metadata)
+    
+    def _add_chunks(self, chunks, doc_id):
+        if not self.hash_index:
+            self.chroma_manager.add_documents(chunks)
+            return len(chunks)
+        
+        chunk_ids = [compute_text_hash(chunk.page_content) for chunk in chunks]
+        seen = self.hash_index.get_existing_chunks(chunk_ids)
+        
+        new_chunks = []
+        new_ids = []
+        sources = []
+        for chunk, chunk_id in zip(chunks, chunk_ids):
+            if chunk_id in seen:
+                sources.append((chunk_id, doc_id))
+                continue
+            seen.add(chunk_id)
+            
+            if self.near_duplicate_index:
+                signature = self.near_duplicate_index.compute_signature(chunk.page_content)
+                canonical_id = self.near_duplicate_index.find_duplicate(signature)
+                
+                if canonical_id:
+                    sources.append((canonical_id, doc_id))
+                    continue
+                    
+                self.near_duplicate_index.add(chunk_id, signature)
+            
+            sources.append((chunk_id, doc_id))
+            new_chunks.append(chunk)
+            new_ids.append(chunk_id)
+        
+        added = False
+        try:
+            if new_chunks:
+                self.chroma_manager.add_documents(new_chunks, ids=new_ids)
+                added = True
+            self.hash_index.add_chunk_sources(sources)
+        except Exception:
+            if added:
+                self.chroma_manager.delete_documents(new_ids)
+            if self.near_duplicate_index:
+                self.near_duplicate_index.remove(new_ids)
+            raise
+        
+        return len(new_chunks)
                 
     def get_all_documents(self, page=1, limit=10, category=None):
         if not self.db_manager or not hasattr(self.db_manager, 'get_all_documents'):
@@ -113,11 +230,21 @@ class DocumentService:
                 logger.error(f"Lỗi khi xoá tài liệu từ database: {str(e)}")
                 success = False
         
-        # TODO: Xoá từ vector store
+        try:
+            self._delete_vectors(document_id)
+        except Exception as e:
+            logger.error(f"Lỗi khi xoá tài liệu từ vector store: {str(e)}")
+            success = False
+        
+        try:
+            self.chroma_manager.delete_parents(document_id)
+        except Exception as e:
+            logger.error(f"Lỗi khi xoá parent chunks: {str(e)}")
 
         return success
         
     def reindex_all(self):
         # TODO: Triển khai logic đánh chỉ mục lại
-        # Hiện tại chỉ trả về giá trị giả
+        # Hiện tại chỉ làm mới cache truy vấn
+        self.chroma_manager.invalidate_cache()
         return True
\ No newline at end of file
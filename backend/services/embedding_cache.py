@@ -0,0 +1,118 @@
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from utils.metrics import metrics
+from utils.text_processor import clean_text, normalize_unicode
+
+logger = logging.getLogger(__name__)
+
+def normalize_query_key(text: str) -> str:
+    return clean_text(normalize_unicode(text))
+
+class CachedEmbeddings(Embeddings):
+
+    def __init__(self, embeddings: Embeddings, capacity: int = 2048, name: str = "default"):
+        self.embeddings = embeddings
+        self.capacity = capacity
+        self.name = name
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if not self.capacity:
+            return self.embeddings.embed_query(text)
+
+        key = normalize_query_key(text)
+        with self._lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                metrics.increment("query_embedding_cache_hits", labels={"model": self.name})
+                return list(embedding)
+
+        embedding = self.embeddings.embed_query(text)
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = tuple(embedding)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+        metrics.increment("query_embedding_cache_misses", labels={"model": self.name})
+
+        return embedding
+
+    def cache_info(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+_models: Dict[str, CachedEmbeddings] = {}
+_models_lock = threading.Lock()
+
+def create_model(model_name: str, runtime: str = "torch") -> Embeddings:
+    if runtime == "onnx":
+        from config.settings import Config
+        try:
+            from services.onnx_embeddings import OnnxEmbeddings
+            return OnnxEmbeddings(
+                model_name,
+                cache_dir=Config.ONNX_CACHE_DIR,
+                quantize=Config.ONNX_QUANTIZE,
+                num_threads=Config.ONNX_NUM_THREADS,
+                parity_threshold=Config.ONNX_PARITY_THRESHOLD
+            )
+        except Exception as e:
+            logger.warning(f"ONNX runtime unavailable for {model_name}, falling back to PyTorch: {str(e)}")
+    elif runtime != "torch":
+        raise ValueError(f"Unsupported embedding runtime: {runtime}")
+
+    logger.info(f"Loading embedding model: {model_name}")
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"normalize_embeddings": True})
+
+def _create_embeddings(model_name: str, backend: str, server_socket: Optional[str], runtime: str) -> Embeddings:
+    if backend == "server":
+        from services.embedding_server import EmbeddingServerClient
+        logger.info(f"Using embedding server at {server_socket} for model: {model_name}")
+        return EmbeddingServerClient(server_socket, model_name=model_name)
+
+    if backend != "local":
+        raise ValueError(f"Unsupported embedding backend: {backend}")
+
+    return create_model(model_name, runtime)
+
+def load_embeddings(model_name: str, cache_size: int = 2048, backend: str = "local",
+                    server_socket: Optional[str] = None, runtime: str = "torch") -> CachedEmbeddings:
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is None:
+            model = _models[model_name] = CachedEmbeddings(
+                _create_embeddings(model_name, backend, server_socket, runtime),
+                capacity=cache_size,
+                name=model_name
+            )
+        return model
+
+def embedding_cache_stats() -> Dict[str, Dict[str, float]]:
+    with _models_lock:
+        return {name: model.cache_info() for name, model in _models.items()}
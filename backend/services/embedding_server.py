@@ -0,0 +1,252 @@
+import os
+import sys
+import time
+import queue
+import socket
+import argparse
+import threading
+import logging
+from typing import Any, Dict, List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from utils.ipc import connect_unix, recv_message, send_message
+from utils.fork_safety import register_after_fork
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+class _PendingRequest:
+    __slots__ = ("texts", "event", "vectors", "error")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.event = threading.Event()
+        self.vectors = None
+        self.error = None
+
+class EmbeddingServer:
+
+    def __init__(self, socket_path: str, model_name: str, max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 runtime: str = "torch"):
+        self.socket_path = socket_path
+        self.default_model = model_name
+        self.runtime = runtime
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._models = {}
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self._running = False
+        self._sock = None
+
+    def _load_model(self, model_name: str):
+        from services.embedding_cache import create_model
+
+        logger.info(f"Embedding server loading model: {model_name} ({self.runtime})")
+        return create_model(model_name, self.runtime)
+
+    def _get_queue(self, model_name: str) -> queue.Queue:
+        with self._lock:
+            pending = self._queues.get(model_name)
+            if pending is None:
+                self._models[model_name] = self._load_model(model_name)
+                pending = self._queues[model_name] = queue.Queue()
+                threading.Thread(
+                    target=self._batch_loop, args=(model_name, pending),
+                    name=f"embedding-batcher-{len(self._queues)}", daemon=True
+                ).start()
+            return pending
+
+    def _batch_loop(self, model_name: str, pending: queue.Queue):
+        model = self._models[model_name]
+
+        while self._running:
+            try:
+                batch = [pending.get(timeout=1.0)]
+            except queue.Empty:
+                continue
+
+            size = len(batch[0].texts)
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request.texts)
+
+            texts = [text for request in batch for text in request.texts]
+            start_time = time.perf_counter()
+            try:
+                vectors = np.asarray(model.embed_documents(texts), dtype=np.float32)
+                offset = 0
+                for request in batch:
+                    request.vectors = vectors[offset:offset + len(request.texts)]
+                    offset += len(request.texts)
+            except Exception as e:
+                logger.error(f"Embedding batch failed: {str(e)}")
+                for request in batch:
+                    request.error = str(e)
+            finally:
+                for request in batch:
+                    request.event.set()
+
+            metrics.observe("embedding_server_batch_size", len(texts), buckets=BATCH_SIZE_BUCKETS)
+            metrics.observe("embedding_server_requests_per_batch", len(batch), buckets=BATCH_SIZE_BUCKETS)
+            metrics.observe("embedding_server_batch_latency_ms", (time.perf_counter() - start_time) * 1000)
+            metrics.increment("embedding_server_texts", len(texts), labels={"model": model_name})
+
+    def embed(self, texts: List[str], model_name: str = None) -> np.ndarray:
+        request = _PendingRequest(texts)
+        self._get_queue(model_name or self.default_model).put(request)
+        request.event.wait()
+
+        if request.error:
+            raise RuntimeError(request.error)
+        return request.vectors
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = time.time() - self._started_at
+        snapshot = metrics.snapshot()
+        texts = sum(item["value"] for item in snapshot["counters"].get("embedding_server_texts", []))
+        return {
+            "models": list(self._models),
+            "runtime": self.runtime,
+            "uptime_seconds": round(uptime, 1),
+            "texts_per_second": round(texts / uptime, 2) if uptime else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            **snapshot
+        }
+
+    def _handle_connection(self, conn: socket.socket):
+        with conn:
+            while self._running:
+                try:
+                    header, _ = recv_message(conn)
+                except (ConnectionError, OSError):
+                    return
+
+                try:
+                    op = header.get("op")
+                    if op == "embed":
+                        vectors = self.embed(header.get("texts", []), header.get("model"))
+                        send_message(conn, {"status": "ok", "shape": list(vectors.shape)}, vectors.tobytes())
+                    elif op == "stats":
+                        send_message(conn, {"status": "ok", "stats": self.stats()})
+                    elif op == "ping":
+                        send_message(conn, {"status": "ok"})
+                    else:
+                        send_message(conn, {"status": "error", "error": f"Unknown op: {op}"})
+                except (ConnectionError, OSError):
+                    return
+                except Exception as e:
+                    logger.error(f"Embedding request failed: {str(e)}")
+                    send_message(conn, {"status": "error", "error": str(e)})
+
+    def serve_forever(self):
+        self._running = True
+        self._get_queue(self.default_model)
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        tmp_path = f"{self.socket_path}.{os.getpid()}"
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(tmp_path)
+        self._sock.listen(128)
+        os.replace(tmp_path, self.socket_path)
+        logger.info(f"Embedding server listening on {self.socket_path}")
+
+        try:
+            while self._running:
+                try:
+                    conn, _ = self._sock.accept()
+                except OSError:
+                    break
+                threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self._running = False
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+class EmbeddingServerClient(Embeddings):
+
+    def __init__(self, socket_path: str, model_name: str = None, timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.timeout = timeout
+        self._reset_connections()
+        register_after_fork(self._reset_connections)
+
+    def _reset_connections(self):
+        self._local = threading.local()
+
+    def _request(self, header: Dict[str, Any]):
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = self._local.sock = connect_unix(self.socket_path, self.timeout)
+                send_message(sock, header)
+                response, payload = recv_message(sock)
+                break
+            except (ConnectionError, OSError):
+                if sock is not None:
+                    sock.close()
+                self._local.sock = None
+                if attempt:
+                    raise
+        else:
+            raise ConnectionError(f"Cannot reach embedding server at {self.socket_path}")
+
+        if response.get("status") != "ok":
+            raise RuntimeError(f"Embedding server error: {response.get('error')}")
+        return response, payload
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        response, payload = self._request({"op": "embed", "texts": list(texts), "model": self.model_name})
+        return np.frombuffer(payload, dtype=np.float32).reshape(response["shape"]).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return self._request({"op": "stats"})[0]["stats"]
+
+def main(argv=None):
+    from config.settings import Config
+
+    parser = argparse.ArgumentParser(description="Shared micro-batching embedding server")
+    parser.add_argument("--socket", default=Config.EMBEDDING_SERVER_SOCKET)
+    parser.add_argument("--model", default=Config.EMBEDDING_MODEL)
+    parser.add_argument("--max-batch-size", type=int, default=Config.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=Config.EMBEDDING_BATCH_WAIT_MS)
+    parser.add_argument("--runtime", choices=["torch", "onnx"], default=Config.EMBEDDING_RUNTIME)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = EmbeddingServer(args.socket, args.model, args.max_batch_size, args.max_wait_ms, args.runtime)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    sys.exit(main())
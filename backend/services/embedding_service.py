@@ -1,13 +1,20 @@
-from langchain_huggingface import HuggingFaceEmbeddings
 from typing import List, Any, Dict, Optional
 import logging
 import numpy as np
+from services.embedding_cache import load_embeddings
 
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        self.embedding_model = HuggingFaceEmbeddings(model_name=model_name)
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", cache_size: int = 2048,
+                 backend: str = "local", server_socket: Optional[str] = None, runtime: str = "torch"):
+        self.embedding_model = load_embeddings(
+            model_name,
+            cache_size=cache_size,
+            backend=backend,
+            server_socket=server_socket,
+            runtime=runtime
+        )
     
     def get_embeddings(self, texts: List[str]) -> List[List[float]]:
         if not texts:
@@ -31,6 +38,20 @@ class EmbeddingService:
             logger.error(f"Error creating embedding: {str(e)}")
             raise
     
+    def get_cache_info(self) -> Dict[str, float]:
+        return self.embedding_model.cache_info()
+    
+    def get_server_stats(self) -> Optional[Dict[str, Any]]:
+        client = self.embedding_model.embeddings
+        if not hasattr(client, "stats"):
+            return None
+        
+        try:
+            return client.stats()
+        except Exception as e:
+            logger.error(f"Error fetching embedding server stats: {str(e)}")
+            return None
+    
     def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         if not embedding1 or not embedding2:
             return 0.0
@@ -0,0 +1,275 @@
+import os
+import sys
+import time
+import json
+import fcntl
+import argparse
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from utils.metrics import process_memory
+
+logger = logging.getLogger(__name__)
+
+PARITY_SENTENCES = [
+    "Điều kiện xét tuyển vào ngành công nghệ thông tin là gì?",
+    "Học phí năm học này là bao nhiêu?",
+    "Sinh viên cần nộp hồ sơ nhập học trước ngày nào?",
+    "What are the admission requirements for international students?",
+    "How many credits are required to graduate?",
+    "The library is open from 7am to 9pm on weekdays.",
+]
+
+class ParityError(RuntimeError):
+    pass
+
+def _read_rss_mb() -> float:
+    return process_memory().get("rss_mb", 0.0)
+
+class OnnxEmbeddings(Embeddings):
+
+    def __init__(self, model_name: str, cache_dir: str = "./onnx_models", quantize: bool = True,
+                 num_threads: int = 0, batch_size: int = 32, parity_threshold: float = 0.99,
+                 reference_model=None):
+        import onnxruntime as ort
+
+        self.model_name = model_name
+        self.quantize = quantize
+        self.batch_size = batch_size
+        self.model_dir = os.path.join(cache_dir, model_name.replace("/", "__"))
+
+        reference = reference_model
+        if not self._is_exported():
+            if reference is None:
+                from sentence_transformers import SentenceTransformer
+                reference = SentenceTransformer(model_name, device="cpu")
+            self._write_pipeline_config(reference)
+
+        self._load_pipeline_config()
+        if not os.path.exists(self.model_path):
+            with self._file_lock():
+                if not os.path.exists(self.model_path):
+                    self._export(reference)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+        parity_key = "parity_int8" if quantize else "parity_fp32"
+        self.parity = self._config.get(parity_key)
+        if reference is not None:
+            self.parity = self.check_parity(reference)
+            self._config[parity_key] = self.parity
+            self._save_pipeline_config()
+
+        if not self.parity or self.parity["min_cosine"] < parity_threshold:
+            raise ParityError(
+                f"ONNX parity check failed for {model_name}: "
+                f"min cosine {(self.parity or {}).get('min_cosine', 0.0):.4f} < {parity_threshold}"
+            )
+
+        logger.info(
+            f"ONNX embeddings ready for {model_name} "
+            f"({'int8' if quantize else 'fp32'}, min cosine {self.parity['min_cosine']:.4f})"
+        )
+
+    @property
+    def model_path(self) -> str:
+        return os.path.join(self.model_dir, "model.int8.onnx" if self.quantize else "model.onnx")
+
+    @property
+    def config_path(self) -> str:
+        return os.path.join(self.model_dir, "pipeline.json")
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.model_dir, ".lock")
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _is_exported(self) -> bool:
+        return os.path.exists(self.model_path) and os.path.exists(self.config_path)
+
+    def _write_pipeline_config(self, reference):
+        pooling = reference[1].get_pooling_mode_str() if len(reference) > 1 else "mean"
+        if pooling not in ("mean", "cls"):
+            raise ParityError(f"Unsupported pooling mode for ONNX export: {pooling}")
+
+        os.makedirs(self.model_dir, exist_ok=True)
+        reference.tokenizer.save_pretrained(self.model_dir)
+        self._config = {"pooling": pooling, "max_seq_length": reference.max_seq_length}
+        self._save_pipeline_config()
+
+    def _save_pipeline_config(self):
+        tmp_path = self.config_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._config, f)
+        os.replace(tmp_path, self.config_path)
+
+    def _load_pipeline_config(self):
+        from transformers import AutoTokenizer
+
+        with open(self.config_path) as f:
+            self._config = json.load(f)
+
+        self.pooling = self._config["pooling"]
+        self.max_seq_length = self._config["max_seq_length"]
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir, use_fast=True)
+
+    def _export(self, reference):
+        import torch
+
+        logger.info(f"Exporting {self.model_name} to ONNX in {self.model_dir}")
+        transformer = reference[0].auto_model.eval()
+        sample = self.tokenizer(["export sample"], return_tensors="pt", padding=True)
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        fp32_path = os.path.join(self.model_dir, "model.onnx")
+        if os.path.exists(fp32_path):
+            self._quantize(fp32_path)
+            return
+
+        tmp_path = fp32_path + ".tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(sample[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+        os.replace(tmp_path, fp32_path)
+
+        self._quantize(fp32_path)
+
+    def _quantize(self, fp32_path: str):
+        if self.quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            tmp_path = self.model_path + ".tmp"
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, self.model_path)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = self.tokenizer(
+                texts[start:start + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            feed = {name: batch[name].astype(np.int64) for name in self.input_names if name in batch}
+            hidden = self.session.run(["last_hidden_state"], feed)[0]
+
+            if self.pooling == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = batch["attention_mask"][..., None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            outputs.append(pooled / np.clip(norms, 1e-12, None))
+
+        return np.concatenate(outputs).astype(np.float32) if outputs else np.empty((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+    def check_parity(self, reference=None, sentences: Optional[List[str]] = None) -> Dict[str, float]:
+        sentences = sentences or PARITY_SENTENCES
+        if reference is None:
+            return {"min_cosine": 1.0, "mean_cosine": 1.0, "checked": 0}
+
+        expected = np.asarray(reference.encode(sentences, normalize_embeddings=True), dtype=np.float32)
+        cosine = (self._encode(sentences) * expected).sum(axis=1)
+        return {"min_cosine": float(cosine.min()), "mean_cosine": float(cosine.mean()), "checked": len(sentences)}
+
+def _time_encode(encode, texts: List[str], batch_size: int, repeats: int) -> Dict[str, float]:
+    encode(texts[:1])
+
+    single = []
+    for text in texts[:repeats]:
+        start = time.perf_counter()
+        encode([text])
+        single.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        encode(texts[offset:offset + batch_size])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "query_latency_ms_p50": round(float(np.percentile(single, 50)), 2),
+        "query_latency_ms_p95": round(float(np.percentile(single, 95)), 2),
+        "throughput_texts_per_s": round(len(texts) / elapsed, 1)
+    }
+
+def benchmark(model_name: str, cache_dir: str, num_threads: int = 0, n_texts: int = 512,
+              batch_size: int = 32) -> Dict[str, Any]:
+    from sentence_transformers import SentenceTransformer
+
+    texts = [PARITY_SENTENCES[i % len(PARITY_SENTENCES)] + f" ({i})" for i in range(n_texts)]
+    report = {"model": model_name, "texts": n_texts, "batch_size": batch_size}
+
+    rss_start = _read_rss_mb()
+    reference = SentenceTransformer(model_name, device="cpu")
+    report["torch_rss_mb"] = round(_read_rss_mb() - rss_start, 1)
+    report["torch"] = _time_encode(
+        lambda batch: reference.encode(batch, batch_size=batch_size, normalize_embeddings=True),
+        texts, batch_size, repeats=50
+    )
+
+    for quantize in (False, True):
+        rss_start = _read_rss_mb()
+        onnx_model = OnnxEmbeddings(
+            model_name, cache_dir=cache_dir, quantize=quantize, num_threads=num_threads,
+            batch_size=batch_size, parity_threshold=0.0, reference_model=reference
+        )
+        label = "onnx_int8" if quantize else "onnx_fp32"
+        report[f"{label}_rss_mb"] = round(_read_rss_mb() - rss_start, 1)
+        report[label] = dict(_time_encode(onnx_model._encode, texts, batch_size, repeats=50), **onnx_model.parity)
+        del onnx_model
+
+    return report
+
+def main(argv=None):
+    from config.settings import Config
+
+    parser = argparse.ArgumentParser(description="Export, verify and benchmark ONNX sentence embeddings")
+    parser.add_argument("--model", default=Config.EMBEDDING_MODEL)
+    parser.add_argument("--cache-dir", default=Config.ONNX_CACHE_DIR)
+    parser.add_argument("--threads", type=int, default=Config.ONNX_NUM_THREADS)
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(benchmark(args.model, args.cache_dir, args.threads, args.texts, args.batch_size), indent=2))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,33 @@
 
 from langchain.prompts import PromptTemplate
 from langchain.chains import RetrievalQA
-from langchain.schema.runnable import RunnablePassthrough, RunnableLambda
 from langchain.schema import Document
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
+import asyncio
 import logging
+from utils.text_processor import extract_keywords, split_into_sentences, tokenize_text
+from utils.deadline import Deadline
+from utils.metrics import metrics
+from services.context_builder import TOKEN_BUCKETS, ContextBuilder
+from services.context_compressor import ContextCompressor
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class RAGService:
-    def __init__(self, chroma_manager, llm_client):
+    def __init__(self, chroma_manager, llm_client, relevance_threshold: float = 0.0,
+                 context_builder: Optional[ContextBuilder] = None,
+                 context_compressor: Optional[ContextCompressor] = None, chunk_sources=None,
+                 mmr_lambda: Optional[float] = None, mmr_fetch_k: int = 20):
         self.chroma_manager = chroma_manager
         self.llm_client = llm_client
+        self.relevance_threshold = relevance_threshold
+        self.context_builder = context_builder or ContextBuilder()
+        self.context_compressor = context_compressor
+        self.chunk_sources = chunk_sources
+        self.mmr_lambda = mmr_lambda
+        self.mmr_fetch_k = mmr_fetch_k
         
 
         self.prompt_templates = {
@@ -43,10 +57,120 @@ class RAGService:
             )
         }
     
+    def corpus_version(self) -> int:
+        return self.chroma_manager.get_corpus_version()
+    
     def format_documents(self, docs: List[Document]) -> str:
         return "\n\n".join(f"Đoạn {i+1}:\n{doc.page_content}" for i, doc in enumerate(docs))
     
-    def process_query(self, query: str, language: str = "vi") -> Dict[str, Any]:
+    def _not_found_response(self, language: str) -> Dict[str, Any]:
+        if language == "vi":
+            return {
+                "response": "Tôi không tìm thấy thông tin liên quan trong kho kiến thức. Bạn có thể đặt câu hỏi khác hoặc cung cấp thêm thông tin chi tiết.",
+                "source_documents": []
+            }
+        else:
+            return {
+                "response": "I couldn't find relevant information in the knowledge base. You can ask a different question or provide more details.",
+                "source_documents": []
+            }
+    
+    def _error_response(self, error: Exception, language: str) -> Dict[str, Any]:
+        logger.error(f"Error in RAG processing: {str(error)}")
+        
+
+        if language == "vi":
+            error_message = f"Xảy ra lỗi khi xử lý truy vấn: {str(error)}"
+        else:
+            error_message = f"Error processing query: {str(error)}"
+            
+        return {
+            "response": error_message,
+            "source_documents": []
+        }
+    
+    def _retrieval_k(self, deadline: Optional[Deadline]) -> int:
+        k = self.context_builder.max_k
+        if deadline is None or deadline.can_afford("retrieval", "generation") or k <= 3:
+            return k
+        
+        deadline.record("retrieval", {"k": 3})
+        return 3
+    
+    def _generation_cap(self, deadline: Optional[Deadline]) -> Optional[int]:
+        if deadline is None:
+            return None
+        return deadline.generation_cap(getattr(self.llm_client, "max_output_tokens", 2048))
+    
+    def _attach_sources(self, docs: List[Document]) -> None:
+        chunk_ids = [doc.metadata["chunk_id"] for doc in docs if doc.metadata.get("chunk_id")]
+        if not chunk_ids:
+            return
+        
+        try:
+            sources = self.chunk_sources.get_chunk_sources(chunk_ids)
+        except Exception as e:
+            logger.error(f"Error loading chunk sources: {str(e)}")
+            return
+        
+        for doc in docs:
+            document_ids = sources.get(doc.metadata.get("chunk_id"))
+            if not document_ids:
+                continue
+            primary_id = doc.metadata.get("id")
+            doc.metadata["source_document_ids"] = (
+                [primary_id] if primary_id in document_ids else []
+            ) + sorted(document_id for document_id in document_ids if document_id != primary_id)
+    
+    def _retrieve(self, query: str, language: str, k: int = 5,
+                  mmr_lambda: Optional[float] = None) -> Tuple[List[Document], List[Document], Dict[str, Any]]:
+        if mmr_lambda is None:
+            mmr_lambda = self.mmr_lambda
+        scored_docs = self.chroma_manager.similarity_search_with_relevance_scores(
+            query, k=k, language=language, score_threshold=self.relevance_threshold,
+            mmr_lambda=mmr_lambda, fetch_k=self.mmr_fetch_k
+        )
+        if not scored_docs:
+            logger.info(f"No chunks above relevance threshold {self.relevance_threshold} for query: {query}")
+            metrics.increment("rag_below_relevance_threshold")
+            return [], [], {}
+        
+        if mmr_lambda is None:
+            selected = self.context_builder.select(scored_docs, k)
+        else:
+            selected = list(scored_docs)[:k]
+        
+        relevant_docs = []
+        for doc, score in selected:
+            doc.metadata["relevance_score"] = round(score, 4)
+            relevant_docs.append(doc)
+        if self.chunk_sources is not None:
+            self._attach_sources(relevant_docs)
+        
+        context_docs, context = self.context_builder.build(
+            self.chroma_manager.get_parent_documents(relevant_docs),
+            getattr(self.llm_client, "model_name", None)
+        )
+        context["k"] = len(relevant_docs)
+        if mmr_lambda is not None:
+            context["mmr_lambda"] = mmr_lambda
+        packed_tokens = context["context_tokens"]
+        if self.context_compressor is not None:
+            context_docs, context["compression"] = self.context_compressor.compress(query, context_docs, language)
+            if context["compression"]["applied"]:
+                context["context_tokens"] = context["compression"]["compressed_tokens"]
+        metrics.observe("rag_context_chunks", len(context_docs), buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20))
+        metrics.observe("rag_context_tokens_uncompressed", packed_tokens, buckets=TOKEN_BUCKETS)
+        metrics.observe("rag_context_tokens", context["context_tokens"], buckets=TOKEN_BUCKETS)
+        return relevant_docs, context_docs, context
+    
+    def _count_prompt_tokens(self, query: str, context_docs: List[Document], language: str,
+                             context: Dict[str, Any]) -> None:
+        context["prompt_tokens"] = self.context_builder.count_tokens(self._build_prompt(query, context_docs, language))
+        metrics.observe("rag_prompt_tokens", context["prompt_tokens"], buckets=TOKEN_BUCKETS)
+    
+    def process_query(self, query: str, language: str = "vi", extractive: bool = False,
+                      deadline: Optional[Deadline] = None, mmr_lambda: Optional[float] = None) -> Dict[str, Any]:
 
         if language not in self.prompt_templates:
             language = "vi"
@@ -55,64 +179,111 @@ class RAGService:
         
         try:
 
-            retriever = self.chroma_manager.vector_store.as_retriever(
-                search_type="similarity",
-                search_kwargs={"k": 5}
-            )
-            
-            relevant_docs = retriever.get_relevant_documents(query)
+            relevant_docs, context_docs, context = self._retrieve(query, language, self._retrieval_k(deadline), mmr_lambda)
             
             if not relevant_docs:
-
-                if language == "vi":
-                    return {
-                        "response": "Tôi không tìm thấy thông tin liên quan trong kho kiến thức. Bạn có thể đặt câu hỏi khác hoặc cung cấp thêm thông tin chi tiết.",
-                        "source_documents": []
-                    }
-                else:
-                    return {
-                        "response": "I couldn't find relevant information in the knowledge base. You can ask a different question or provide more details.",
-                        "source_documents": []
-                    }
+                return self._not_found_response(language)
             
-
-            rag_chain = (
-                {"context": retriever, "question": RunnablePassthrough()}
-                | self.prompt_templates[language]
-                | self.llm_client.llm
-            )
-            
-            response = rag_chain.invoke(query)
+            max_output_tokens = None if extractive else self._generation_cap(deadline)
+            if extractive or max_output_tokens == 0:
+                response = self.extractive_answer(query, context_docs, language)
+            else:
+                self._count_prompt_tokens(query, context_docs, language, context)
+                response = self.enhance_with_context(query, context_docs, language, max_output_tokens)
             
             logger.info(f"Generated RAG response for query: {query}")
             
             return {
                 "response": response,
-                "source_documents": relevant_docs
+                "source_documents": relevant_docs,
+                "context": context
             }
             
         except Exception as e:
-            logger.error(f"Error in RAG processing: {str(e)}")
+            return self._error_response(e, language)
+    
+    async def aprocess_query(self, query: str, language: str = "vi", extractive: bool = False,
+                             deadline: Optional[Deadline] = None, mmr_lambda: Optional[float] = None) -> Dict[str, Any]:
+
+        if language not in self.prompt_templates:
+            language = "vi"
             
+        logger.info(f"Processing RAG query: {query}")
+        
+        try:
 
-            if language == "vi":
-                error_message = f"Xảy ra lỗi khi xử lý truy vấn: {str(e)}"
+            relevant_docs, context_docs, context = await asyncio.to_thread(
+                self._retrieve, query, language, self._retrieval_k(deadline), mmr_lambda
+            )
+            
+            if not relevant_docs:
+                return self._not_found_response(language)
+            
+            max_output_tokens = None if extractive else self._generation_cap(deadline)
+            if extractive or max_output_tokens == 0:
+                response = await asyncio.to_thread(self.extractive_answer, query, context_docs, language)
             else:
-                error_message = f"Error processing query: {str(e)}"
-                
+                self._count_prompt_tokens(query, context_docs, language, context)
+                try:
+                    response = await self.aenhance_with_context(
+                        query, context_docs, language, max_output_tokens,
+                        timeout=deadline.timeout() if deadline else None
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"RAG generation timed out, returning extractive answer for: {query}")
+                    deadline.record("generation", "extractive_after_timeout")
+                    response = await asyncio.to_thread(self.extractive_answer, query, context_docs, language)
+            
+            logger.info(f"Generated RAG response for query: {query}")
+            
             return {
-                "response": error_message,
-                "source_documents": []
+                "response": response,
+                "source_documents": relevant_docs,
+                "context": context
             }
+            
+        except Exception as e:
+            return self._error_response(e, language)
     
-    def enhance_with_context(self, query: str, context_docs: List[Document], language: str = "vi") -> str:
+    def extractive_answer(self, query: str, context_docs: List[Document], language: str = "vi", max_sentences: int = 3) -> str:
+        keywords = set(extract_keywords(query, language, top_n=20))
+        
+        scored = []
+        for rank, doc in enumerate(context_docs):
+            for sentence in split_into_sentences(doc.page_content, language):
+                overlap = len(keywords & {token.lower() for token in tokenize_text(sentence, language)})
+                if overlap:
+                    scored.append((overlap, -rank, sentence.strip()))
+        
+        sentences = [sentence for _, _, sentence in sorted(scored, reverse=True)[:max_sentences]]
+        if not sentences:
+            sentences = [context_docs[0].page_content[:500].strip()]
+        
+        if language == "vi":
+            header = "Hệ thống đang quá tải, dưới đây là các trích đoạn liên quan nhất từ tài liệu:"
+        else:
+            header = "The system is under heavy load, here are the most relevant excerpts from the documents:"
+        
+        return header + "\n\n" + "\n".join(f"- {sentence}" for sentence in sentences)
+    
+    def _build_prompt(self, query: str, context_docs: List[Document], language: str) -> str:
         formatted_context = self.format_documents(context_docs)
         
-        prompt = self.prompt_templates[language].format(
+        return self.prompt_templates[language].format(
             question=query,
             context=formatted_context
         )
+    
+    def enhance_with_context(self, query: str, context_docs: List[Document], language: str = "vi",
+                             max_output_tokens: Optional[int] = None) -> str:
+        prompt = self._build_prompt(query, context_docs, language)
+        
+        response = self.llm_client.generate(prompt=prompt, max_output_tokens=max_output_tokens)
         
-        response = self.llm_client.generate(prompt=prompt)
+        return response
+    
+    async def aenhance_with_context(self, query: str, context_docs: List[Document], language: str = "vi",
+                                    max_output_tokens: Optional[int] = None, timeout: Optional[float] = None) -> str:
+        prompt = self._build_prompt(query, context_docs, language)
         
-        return response
\ No newline at end of file
+        return await self.llm_client.agenerate(prompt=prompt, max_output_tokens=max_output_tokens, timeout=timeout)
\ No newline at end of file
@@ -1,6 +1,8 @@
 
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from utils.deadline import Deadline
 
 
 logging.basicConfig(level=logging.INFO)
@@ -40,32 +42,65 @@ class ReflectionService:
         Only return the improved query, without any commentary.
         """
     
-    def enhance_query(self, query: str, language: str = "vi") -> str:
-        if len(query.split()) <= 3:
+    def _build_prompt(self, query: str, language: str) -> str:
+        prompt_template = self.reflection_prompt_vi if language == "vi" else self.reflection_prompt_en
+        return prompt_template.format(query=query)
+    
+    def _accept(self, query: str, enhanced_query: str) -> str:
+        if len(enhanced_query) > len(query) * 3:
+
+            logger.warning("Enhanced query too long, using original query")
+            return query
+            
+        logger.info(f"Enhanced query: {enhanced_query}")
+        return enhanced_query
+    
+    def _skip_for_deadline(self, deadline: Optional[Deadline]) -> bool:
+        if deadline is None or deadline.can_afford("reflection", "routing", "retrieval", "generation"):
+            return False
+        
+        logger.info("Skipping query enhancement: not enough time left in the request budget")
+        deadline.record("reflection", "skipped")
+        return True
+    
+    def enhance_query(self, query: str, language: str = "vi", deadline: Optional[Deadline] = None) -> str:
+        if len(query.split()) <= 3 or self._skip_for_deadline(deadline):
             return query
             
         try:
 
-            prompt_template = self.reflection_prompt_vi if language == "vi" else self.reflection_prompt_en
+            enhanced_query = self.llm_client.generate(
+                prompt=self._build_prompt(query, language),
+                temperature=0.3
+            )
+            
+            return self._accept(query, enhanced_query)
             
+        except Exception as e:
+            logger.error(f"Error in query enhancement: {str(e)}")
 
-            prompt = prompt_template.format(query=query)
+            return query
+    
+    async def aenhance_query(self, query: str, language: str = "vi", deadline: Optional[Deadline] = None) -> str:
+        if len(query.split()) <= 3 or self._skip_for_deadline(deadline):
+            return query
             
+        try:
 
-            enhanced_query = self.llm_client.generate(
-                prompt=prompt,
-                temperature=0.3
+            enhanced_query = await self.llm_client.agenerate(
+                prompt=self._build_prompt(query, language),
+                temperature=0.3,
+                timeout=deadline.timeout("routing", "retrieval", "generation") if deadline else None
             )
             
-            if len(enhanced_query) > len(query) * 3:
-
-                logger.warning("Enhanced query too long, using original query")
-                return query
-                
-            logger.info(f"Enhanced query: {enhanced_query}")
-            return enhanced_query
+            return self._accept(query, enhanced_query)
+        
+        except asyncio.TimeoutError:
+            logger.warning("Query enhancement timed out, using original query")
+            deadline.record("reflection", "timed_out")
+            return query
             
         except Exception as e:
             logger.error(f"Error in query enhancement: {str(e)}")
 
-            return query
\ No newline at end of file
+            return query
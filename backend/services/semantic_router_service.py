@@ -1,6 +1,9 @@
 
+import re
+import asyncio
 import logging
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional, Tuple
+from utils.deadline import Deadline
 
 
 logging.basicConfig(level=logging.INFO)
@@ -8,6 +11,12 @@ logger = logging.getLogger(__name__)
 
 class SemanticRouterService:
     
+    chitchat_pattern = re.compile(
+        r"^\W*(xin chào|chào|alo|hello|hi|hey|cảm ơn|cám ơn|thank|thanks|tạm biệt|bye|goodbye|"
+        r"bạn là ai|bạn tên gì|who are you|how are you|bạn khỏe không|ok|oke|vâng|dạ)\b",
+        re.IGNORECASE
+    )
+    
     def __init__(self, llm_client):
         self.llm_client = llm_client
         
@@ -42,35 +51,89 @@ class SemanticRouterService:
         Only respond with "RAG" or "Chitchat", without any explanation.
         """
     
-    def route_query(self, query: str, context: Dict[str, Any] = None) -> Tuple[str, Dict[str, Any]]:
+    def _build_prompt(self, query: str, language: str) -> str:
+        prompt_template = self.classification_prompt_vi if language == "vi" else self.classification_prompt_en
+        return prompt_template.format(query=query)
+    
+    def _to_route(self, query: str, classification: str, context: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        logger.info(f"Query classification: '{query}' -> '{classification}'")
+        
+
+        if "rag" in classification:
+            return "admission_query", {
+                "query": query,
+                "context": context
+            }
+        else:
+            return "chitchat_query", {
+                "query": query,
+                "context": context
+            }
+    
+    def route_query_local(self, query: str, context: Dict[str, Any] = None) -> Tuple[str, Dict[str, Any]]:
         if context is None:
             context = {}
+        
+        is_chitchat = len(query.split()) <= 8 and self.chitchat_pattern.search(query) is not None
+        return self._to_route(query, "local:chitchat" if is_chitchat else "local:rag", context)
+    
+    def _skip_for_deadline(self, deadline: Optional[Deadline]) -> bool:
+        if deadline is None or deadline.can_afford("routing", "retrieval", "generation"):
+            return False
+        
+        logger.info("Using local router: not enough time left in the request budget")
+        deadline.record("routing", "local")
+        return True
+    
+    def route_query(self, query: str, context: Dict[str, Any] = None,
+                    deadline: Optional[Deadline] = None) -> Tuple[str, Dict[str, Any]]:
+        if context is None:
+            context = {}
+        
+        if self._skip_for_deadline(deadline):
+            return self.route_query_local(query, context)
             
         language = context.get("language", "vi")
         
         try:
-            prompt_template = self.classification_prompt_vi if language == "vi" else self.classification_prompt_en
-            
-            prompt = prompt_template.format(query=query)
-            
             classification = self.llm_client.generate(
-                prompt=prompt,
+                prompt=self._build_prompt(query, language),
                 temperature=0.1 
             ).strip().lower()
             
-            logger.info(f"Query classification: '{query}' -> '{classification}'")
+            return self._to_route(query, classification, context)
+                
+        except Exception as e:
+            logger.error(f"Error in query classification: {str(e)}")
             
-
-            if "rag" in classification:
-                return "admission_query", {
-                    "query": query,
-                    "context": context
-                }
-            else:
-                return "chitchat_query", {
-                    "query": query,
-                    "context": context
-                }
+            return "chitchat_query", {
+                "query": query,
+                "context": context
+            }
+    
+    async def aroute_query(self, query: str, context: Dict[str, Any] = None,
+                           deadline: Optional[Deadline] = None) -> Tuple[str, Dict[str, Any]]:
+        if context is None:
+            context = {}
+        
+        if self._skip_for_deadline(deadline):
+            return self.route_query_local(query, context)
+            
+        language = context.get("language", "vi")
+        
+        try:
+            classification = (await self.llm_client.agenerate(
+                prompt=self._build_prompt(query, language),
+                temperature=0.1,
+                timeout=deadline.timeout("retrieval", "generation") if deadline else None
+            )).strip().lower()
+            
+            return self._to_route(query, classification, context)
+        
+        except asyncio.TimeoutError:
+            logger.warning("Query classification timed out, using local router")
+            deadline.record("routing", "local_after_timeout")
+            return self.route_query_local(query, context)
                 
         except Exception as e:
             logger.error(f"Error in query classification: {str(e)}")
@@ -78,4 +141,4 @@ class SemanticRouterService:
             return "chitchat_query", {
                 "query": query,
                 "context": context
-            }
\ No newline at end of file
+            }
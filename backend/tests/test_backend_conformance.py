@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from vector_store.backends.ivf_backend import IVFBackend
+from vector_store.backends.numpy_backend import NumpyFlatBackend
+from vector_store.backends.quantized_backend import QuantizedFlatBackend
+from vector_store.backends.sharded_backend import ShardedBackend
+
+DIM = 32
+CATEGORIES = ("general", "policy", "faq")
+
+def make_chroma(tmp_path):
+    chromadb = pytest.importorskip("chromadb")
+    from vector_store.backends.chroma_backend import ChromaBackend
+
+    return ChromaBackend(chromadb.PersistentClient(path=str(tmp_path / "chroma")))
+
+BACKENDS = {
+    "numpy": lambda tmp_path: NumpyFlatBackend(str(tmp_path / "numpy")),
+    "int8": lambda tmp_path: QuantizedFlatBackend(str(tmp_path / "int8"), "int8"),
+    "binary": lambda tmp_path: QuantizedFlatBackend(str(tmp_path / "binary"), "binary"),
+    "ivf": lambda tmp_path: IVFBackend(str(tmp_path / "ivf"), nlist=4, nprobe=4, train_threshold=100),
+    "sharded_hash": lambda tmp_path: ShardedBackend(
+        {str(i): NumpyFlatBackend(str(tmp_path / f"hash_{i}")) for i in range(3)}, shard_by="hash"
+    ),
+    "sharded_category": lambda tmp_path: ShardedBackend(
+        {name: NumpyFlatBackend(str(tmp_path / name)) for name in CATEGORIES}, shard_by="category"
+    ),
+    "chroma": make_chroma
+}
+
+@pytest.fixture(params=list(BACKENDS))
+def backend(request, tmp_path):
+    backend = BACKENDS[request.param](tmp_path)
+    yield backend
+    backend.close()
+
+@pytest.fixture
+def corpus():
+    embeddings = np.random.RandomState(7).randn(200, DIM).astype(np.float32)
+    ids = [f"chunk-{i}" for i in range(len(embeddings))]
+    texts = [f"text {i}" for i in range(len(embeddings))]
+    metadatas = [{"id": f"doc-{i % 4}", "category": CATEGORIES[i % 3], "page": i} for i in range(len(embeddings))]
+    return ids, texts, embeddings, metadatas
+
+def populate(backend, corpus):
+    ids, texts, embeddings, metadatas = corpus
+    backend.add(ids, texts, embeddings.tolist(), metadatas)
+    retrain_thread = getattr(backend, "_retrain_thread", None)
+    if retrain_thread is not None:
+        retrain_thread.join()
+
+def cosine(left, right):
+    return float(np.dot(left, right) / (np.linalg.norm(left) * np.linalg.norm(right)))
+
+def test_empty_backend_returns_no_results(backend):
+    assert backend.count() == 0
+    assert backend.search(np.ones(DIM).tolist(), 5) == []
+
+def test_add_stores_text_and_metadata(backend, corpus):
+    populate(backend, corpus)
+    ids, texts, embeddings, metadatas = corpus
+
+    assert backend.count() == len(ids)
+    result = backend.search(embeddings[11].tolist(), 1)[0]
+    assert (result.id, result.text) == ("chunk-11", "text 11")
+    assert result.metadata["id"] == "doc-3"
+    assert result.metadata["category"] == "faq"
+    assert result.metadata["page"] == 11
+
+def test_relevance_scores_are_cosine_similarities(backend, corpus):
+    populate(backend, corpus)
+    ids, _, embeddings, _ = corpus
+    query = embeddings[5] + 0.5 * embeddings[9]
+
+    results = backend.search(query.tolist(), 5)
+
+    assert len(results) == 5
+    assert [result.score for result in results] == sorted((result.score for result in results), reverse=True)
+    for result in results:
+        assert result.score == pytest.approx(cosine(query, embeddings[ids.index(result.id)]), abs=1e-3)
+
+    best = int(np.argmax([cosine(query, embedding) for embedding in embeddings]))
+    assert results[0].id == ids[best]
+
+def test_metadata_where_filters_results(backend, corpus):
+    populate(backend, corpus)
+    _, _, embeddings, _ = corpus
+
+    results = backend.search(embeddings[0].tolist(), 10, where={"category": "policy"})
+    assert len(results) == 10
+    assert {result.metadata["category"] for result in results} == {"policy"}
+
+    results = backend.search(embeddings[0].tolist(), 50, where={"$and": [
+        {"category": {"$in": ["general", "faq"]}},
+        {"id": {"$ne": "doc-0"}}
+    ]})
+    assert results
+    assert all(result.metadata["category"] != "policy" and result.metadata["id"] != "doc-0" for result in results)
+
+def test_delete_by_id(backend, corpus):
+    populate(backend, corpus)
+    _, _, embeddings, _ = corpus
+
+    backend.delete(["chunk-3", "chunk-4"])
+
+    assert backend.count() == 198
+    assert "chunk-3" not in {result.id for result in backend.search(embeddings[3].tolist(), 5)}
+    assert backend.get_embeddings(["chunk-3", "chunk-5"]).keys() == {"chunk-5"}
+
+def test_delete_by_document_filter(backend, corpus):
+    populate(backend, corpus)
+    _, _, embeddings, _ = corpus
+
+    assert backend.delete_where({"id": "doc-1"}) == 50
+    assert backend.count() == 150
+    assert backend.delete_where({"id": "doc-1"}) == 0
+    assert all(result.metadata["id"] != "doc-1" for result in backend.search(embeddings[1].tolist(), 200))
+
+def test_get_embeddings_preserves_direction(backend, corpus):
+    populate(backend, corpus)
+    ids, _, embeddings, _ = corpus
+
+    found = backend.get_embeddings(["chunk-2", "chunk-40", "missing"])
+
+    assert found.keys() == {"chunk-2", "chunk-40"}
+    for chunk_id, vector in found.items():
+        assert vector.shape == (DIM,)
+        assert cosine(vector, embeddings[ids.index(chunk_id)]) == pytest.approx(1.0, abs=1e-4)
+
+def test_search_can_return_embeddings(backend, corpus):
+    populate(backend, corpus)
+    ids, _, embeddings, _ = corpus
+
+    for result in backend.search(embeddings[20].tolist(), 3, include_embeddings=True):
+        assert cosine(result.embedding, embeddings[ids.index(result.id)]) == pytest.approx(1.0, abs=1e-4)
@@ -0,0 +1,22 @@
+import sys
+import types
+
+import pytest
+
+from vector_store.backends.factory import BackendFactory
+
+def test_chroma_open_failure_is_raised_and_leaves_the_store_in_place(tmp_path, monkeypatch):
+    persist_directory = tmp_path / "chroma_db"
+    persist_directory.mkdir()
+    (persist_directory / "chroma.sqlite3").write_bytes(b"corpus")
+
+    def locked_client(path):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setitem(sys.modules, "chromadb", types.SimpleNamespace(PersistentClient=locked_client))
+
+    with pytest.raises(RuntimeError, match="locked"):
+        BackendFactory("chroma", str(persist_directory)).create()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["chroma_db"]
+    assert (persist_directory / "chroma.sqlite3").read_bytes() == b"corpus"
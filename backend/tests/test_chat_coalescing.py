@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.chat_service import ChatService
+from utils.deadline import Deadline
+from utils.single_flight import AsyncSingleFlight, SingleFlightTimeout
+
+class SlowRAGService:
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+
+    def corpus_version(self):
+        return 1
+
+    def process_query(self, query, language, extractive=False, deadline=None, mmr_lambda=None):
+        self.calls.append(extractive)
+        self.started.set()
+        time.sleep(0.2)
+        return {"response": "extractive" if extractive else "generated", "source_documents": []}
+
+class AdmissionRouter:
+
+    def route_query(self, query, context, deadline=None):
+        return "admission_query", {}
+
+    def route_query_local(self, query, context):
+        return "admission_query", {}
+
+class PassthroughReflection:
+
+    def enhance_query(self, query, language, deadline=None):
+        return query
+
+def make_service(rag_service):
+    return ChatService(AdmissionRouter(), PassthroughReflection(), rag_service, llm_client=None)
+
+def run_concurrently(service, rag_service, degradations):
+    results = [None] * len(degradations)
+
+    def run(index):
+        results[index] = service.process_query("Học phí ngành CNTT?", degradation=degradations[index])
+
+    threads = [threading.Thread(target=run, args=(0,))]
+    threads[0].start()
+    rag_service.started.wait(1)
+    threads += [threading.Thread(target=run, args=(i,)) for i in range(1, len(degradations))]
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_identical_queries_at_the_same_degradation_share_one_answer():
+    rag_service = SlowRAGService()
+
+    results = run_concurrently(make_service(rag_service), rag_service, [0, 0])
+
+    assert rag_service.calls == [False]
+    assert [result["response"] for result in results] == ["generated", "generated"]
+
+def test_degraded_request_does_not_receive_a_full_answer_and_vice_versa():
+    rag_service = SlowRAGService()
+
+    results = run_concurrently(make_service(rag_service), rag_service, [3, 0])
+
+    assert sorted(rag_service.calls) == [False, True]
+    assert [result["response"] for result in results] == ["extractive", "generated"]
+
+def test_follower_falls_back_to_extractive_when_its_deadline_runs_out():
+    rag_service = SlowRAGService()
+    service = make_service(rag_service)
+    results = [None, None]
+
+    def lead():
+        results[0] = service.process_query("Học phí ngành CNTT?")
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    rag_service.started.wait(1)
+    results[1] = service.process_query("Học phí ngành CNTT?", deadline=Deadline(600, {"retrieval": 500}))
+    leader.join()
+
+    assert sorted(rag_service.calls) == [False, True]
+    assert results[0]["response"] == "generated"
+    assert results[1]["response"] == "extractive"
+    assert results[1]["metadata"]["deadline"]["decisions"]["coalesce"] == "extractive_after_timeout"
+
+def test_async_follower_times_out_without_cancelling_the_leader():
+    async def scenario():
+        single_flight = AsyncSingleFlight("test")
+
+        async def slow():
+            await asyncio.sleep(0.2)
+            return "answer"
+
+        leader = asyncio.ensure_future(single_flight.do("key", slow))
+        await asyncio.sleep(0)
+        with pytest.raises(SingleFlightTimeout):
+            await single_flight.do("key", slow, timeout=0.05)
+        return await leader
+
+    assert asyncio.run(scenario()) == ("answer", False)
@@ -0,0 +1,97 @@
+import pytest
+
+pytest.importorskip("langchain_community")
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+from services.document_service import DocumentService
+from services.rag_service import RAGService
+from vector_store.dedup_index import ContentHashIndex
+from vector_store.near_duplicate import MinHashLSHIndex
+
+POLICY = (
+    "Sinh viên được xét học bổng khuyến khích học tập khi có điểm trung bình học kỳ từ 3.2 trở lên, "
+    "không có học phần nào dưới điểm C, điểm rèn luyện đạt loại tốt và đăng ký tối thiểu 15 tín chỉ "
+    "trong học kỳ xét. Hồ sơ nộp tại phòng công tác sinh viên trước ngày 15 của tháng đầu học kỳ. "
+    "Mức học bổng loại khá bằng 100% học phí, loại giỏi bằng 120% học phí và loại xuất sắc bằng 150% học phí."
+)
+
+class UploadedFile:
+
+    def __init__(self, filename, text):
+        self.filename = filename
+        self.text = text
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.text)
+
+class InMemoryChromaManager:
+
+    def __init__(self):
+        self.chunks = {}
+
+    def chunk_document(self, text, metadata=None):
+        return [Document(page_content=text, metadata=dict(metadata or {}))]
+
+    def add_documents(self, documents, ids=None):
+        for chunk_id, doc in zip(ids, documents):
+            self.chunks[chunk_id] = doc
+        return ids
+
+    def delete_documents(self, ids):
+        for chunk_id in ids:
+            self.chunks.pop(chunk_id, None)
+
+    def delete_parents(self, document_id):
+        return 0
+
+    def similarity_search_with_relevance_scores(self, query, k=5, language=None, score_threshold=None,
+                                                mmr_lambda=None, fetch_k=20):
+        return [
+            (Document(page_content=doc.page_content, metadata=dict(doc.metadata, chunk_id=chunk_id)), 0.9)
+            for chunk_id, doc in self.chunks.items()
+        ][:k]
+
+    def get_parent_documents(self, documents):
+        return documents
+
+class StaticLLM:
+    model_name = "test"
+    max_output_tokens = 2048
+
+    def generate(self, prompt, **kwargs):
+        return "answer"
+
+def test_merged_near_duplicate_is_credited_to_both_documents(tmp_path):
+    chroma_manager = InMemoryChromaManager()
+    hash_index = ContentHashIndex(str(tmp_path / "content_hashes.sqlite3"))
+    document_service = DocumentService(
+        chroma_manager,
+        hash_index=hash_index,
+        near_duplicate_index=MinHashLSHIndex(str(tmp_path / "near_duplicates.sqlite3"), threshold=0.7)
+    )
+
+    first = document_service.process_file(UploadedFile("hoc_bong_2023.txt", POLICY), {"id": "doc-2023"})
+    second = document_service.process_file(
+        UploadedFile("hoc_bong_2024.txt", POLICY.replace("ngày 15", "ngày 20")), {"id": "doc-2024"}
+    )
+    assert first["num_duplicate_chunks"] == 0
+    assert second["num_duplicate_chunks"] == 1
+    assert len(chroma_manager.chunks) == 1
+
+    rag_service = RAGService(chroma_manager, StaticLLM(), chunk_sources=hash_index)
+    result = rag_service.process_query("điều kiện học bổng", language="vi")
+
+    sources = [doc.metadata for doc in result["source_documents"]]
+    assert len(sources) == 1
+    assert sources[0]["id"] == "doc-2023"
+    assert sources[0]["source_document_ids"] == ["doc-2023", "doc-2024"]
+
+def test_sources_are_untouched_without_a_hash_index(tmp_path):
+    chroma_manager = InMemoryChromaManager()
+    chroma_manager.add_documents([Document(page_content=POLICY, metadata={"id": "doc-2023"})], ids=["chunk-1"])
+
+    result = RAGService(chroma_manager, StaticLLM()).process_query("điều kiện học bổng", language="vi")
+
+    assert "source_document_ids" not in result["source_documents"][0].metadata
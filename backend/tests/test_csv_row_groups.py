@@ -0,0 +1,67 @@
+import pytest
+
+from utils.file_utils import iter_csv_row_groups
+
+def write_csv(tmp_path, text, encoding="utf-8"):
+    path = tmp_path / "data.csv"
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+def test_rows_are_grouped_under_the_header(tmp_path):
+    path = write_csv(tmp_path, "ma_nganh,ten_nganh\n7480201,Công nghệ thông tin\n7340101,Quản trị kinh doanh\n")
+
+    groups = list(iter_csv_row_groups(path, max_length=200))
+
+    assert groups == [("ma_nganh,ten_nganh\n7480201,Công nghệ thông tin\n7340101,Quản trị kinh doanh", 0, 1)]
+
+def test_oversized_row_is_split_and_every_piece_repeats_the_header(tmp_path):
+    description = " ".join(f"word{i}" for i in range(200))
+    path = write_csv(tmp_path, f"ma_nganh,mo_ta\n7480201,{description}\n7340101,ngắn\n")
+
+    groups = list(iter_csv_row_groups(path, max_length=120))
+
+    oversized = [group for group in groups if group[1:] == (0, 0)]
+    assert len(oversized) > 1
+    assert all(text.startswith("ma_nganh,mo_ta\n") and len(text) <= 120 for text, _, _ in groups)
+    assert " ".join(text.split("\n", 1)[1] for text, _, _ in oversized) == f"7480201,{description}"
+    assert groups[-1] == ("ma_nganh,mo_ta\n7340101,ngắn", 1, 1)
+
+def test_unbroken_cell_is_cut_to_fit(tmp_path):
+    path = write_csv(tmp_path, "id,blob\n1," + "x" * 500 + "\n")
+
+    groups = list(iter_csv_row_groups(path, max_length=100))
+
+    assert len(groups) > 1
+    assert all(len(text) <= 100 for text, _, _ in groups)
+
+def test_wide_header_is_not_repeated_past_the_limit(tmp_path):
+    header = ",".join(f"cot_{i}" for i in range(30))
+    rows = "\n".join(",".join(f"r{row}c{i}" for i in range(30)) for row in range(3))
+    path = write_csv(tmp_path, f"{header}\n{rows}\n")
+
+    groups = list(iter_csv_row_groups(path, max_length=150))
+
+    assert groups
+    assert all(len(text) <= 150 and not text.startswith(header) for text, _, _ in groups)
+    assert [(start, end) for _, start, end in groups][-1] == (2, 2)
+
+def test_header_and_piece_fit_within_the_limit(tmp_path):
+    header = ",".join(f"cot_{i}" for i in range(8))
+    description = " ".join(f"word{i}" for i in range(100))
+    path = write_csv(tmp_path, f"{header}\n1,{description}\n")
+
+    groups = list(iter_csv_row_groups(path, max_length=len(header) * 2 + 2))
+
+    assert len(groups) > 1
+    assert all(text.startswith(header + "\n") and len(text) <= len(header) * 2 + 2 for text, _, _ in groups)
+
+def test_non_utf8_csv_fails_loudly(tmp_path):
+    path = write_csv(tmp_path, "ten,ghi_chu\nRené,élève\n", encoding="cp1252")
+
+    with pytest.raises(ValueError):
+        list(iter_csv_row_groups(path, max_length=200))
+
+def test_utf16_csv_is_detected(tmp_path):
+    path = write_csv(tmp_path, "ten,ghi_chu\nNguyễn Văn A,điểm cao\n", encoding="utf-16")
+
+    assert list(iter_csv_row_groups(path, max_length=200)) == [("ten,ghi_chu\nNguyễn Văn A,điểm cao", 0, 0)]
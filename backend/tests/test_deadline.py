@@ -0,0 +1,27 @@
+from utils.deadline import Deadline
+
+def make_deadline(remaining_ms, monkeypatch):
+    deadline = Deadline(25000)
+    monkeypatch.setattr(deadline, "remaining_ms", lambda: remaining_ms)
+    return deadline
+
+def test_generation_is_uncapped_while_the_budget_covers_a_typical_generation(monkeypatch):
+    deadline = make_deadline(20000, monkeypatch)
+
+    assert deadline.generation_cap(2048) is None
+    assert deadline.decisions == {}
+
+def test_generation_is_capped_when_the_remaining_budget_is_short(monkeypatch):
+    deadline = make_deadline(4000, monkeypatch)
+
+    assert deadline.generation_cap(2048) == 200
+    assert deadline.decisions == {"generation": {"max_output_tokens": 200}}
+
+def test_cap_never_exceeds_the_model_limit(monkeypatch):
+    assert make_deadline(4000, monkeypatch).generation_cap(128) is None
+
+def test_generation_is_skipped_below_the_minimum(monkeypatch):
+    deadline = make_deadline(1000, monkeypatch)
+
+    assert deadline.generation_cap(2048) == 0
+    assert deadline.decisions == {"generation": "extractive"}
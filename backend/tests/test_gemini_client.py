@@ -0,0 +1,44 @@
+import pytest
+
+chat_models = pytest.importorskip("langchain_google_genai.chat_models")
+
+from llm.gemini_client import GeminiClient
+
+class RequestCaptured(Exception):
+    pass
+
+def requested_generation_config(call_kwargs):
+    request = call_kwargs.get("request")
+    config = getattr(request, "generation_config", None) if request is not None else call_kwargs.get("generation_config")
+    if isinstance(config, dict):
+        return config
+    return {name: getattr(config, name, None) for name in ("max_output_tokens", "temperature")}
+
+@pytest.fixture
+def captured(monkeypatch):
+    calls = []
+
+    def fake_chat_with_retry(**kwargs):
+        calls.append(kwargs)
+        raise RequestCaptured()
+
+    monkeypatch.setattr(chat_models, "_chat_with_retry", fake_chat_with_retry)
+    return calls
+
+def test_generation_cap_reaches_request_payload(captured):
+    client = GeminiClient("test-key")
+
+    with pytest.raises(RequestCaptured):
+        client.generate("hello", max_output_tokens=128, temperature=0.1)
+
+    config = requested_generation_config(captured[0])
+    assert config["max_output_tokens"] == 128
+    assert config["temperature"] == pytest.approx(0.1)
+
+def test_default_request_keeps_client_limit(captured):
+    client = GeminiClient("test-key")
+
+    with pytest.raises(RequestCaptured):
+        client.generate("hello")
+
+    assert requested_generation_config(captured[0])["max_output_tokens"] == client.max_output_tokens
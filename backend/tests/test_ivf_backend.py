@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pytest
+
+from vector_store.backends.ivf_backend import IVFBackend
+
+DIM = 16
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = IVFBackend(str(tmp_path / "ivf"), nlist=4, nprobe=4, train_threshold=10 ** 6)
+    embeddings = np.random.RandomState(5).randn(200, DIM).astype(np.float32)
+    backend.add([str(i) for i in range(200)], [""] * 200, embeddings.tolist(), [{}] * 200)
+    backend.train_threshold = 100
+    backend.embeddings = embeddings
+    return backend
+
+def generations(backend):
+    return sorted(name for name in os.listdir(backend.directory) if name.startswith("ivf_") and name[4:].isdigit())
+
+def test_retrain_keeps_the_previous_generation_for_in_flight_readers(backend):
+    old_dir = backend._list_dir(backend._state["generation"])
+    stale_rows, _ = backend._read_list(old_dir, 0, DIM)
+
+    backend.retrain()
+
+    assert backend._state == {"generation": 1, "dim": DIM, "trained": True}
+    assert generations(backend) == ["ivf_0", "ivf_1"]
+    rows, vectors = backend._read_list(old_dir, 0, DIM)
+    assert len(rows) == len(stale_rows) == 200
+    assert backend.search(backend.embeddings[17].tolist(), 1)[0].id == "17"
+
+def test_previous_generation_is_removed_on_the_next_retrain(backend, monkeypatch):
+    backend.retrain()
+    monkeypatch.setattr(backend, "_needs_retrain", lambda: True)
+
+    backend.retrain()
+
+    assert backend._state["generation"] == 2
+    assert generations(backend) == ["ivf_1", "ivf_2"]
+    assert backend.count() == 200
+    assert backend.search(backend.embeddings[99].tolist(), 1)[0].id == "99"
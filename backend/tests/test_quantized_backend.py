@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from vector_store.backends.numpy_backend import NumpyFlatBackend
+from vector_store.backends.quantized_backend import QuantizedFlatBackend
+
+DIM = 64
+
+@pytest.fixture
+def embeddings():
+    return np.random.RandomState(3).randn(100, DIM).astype(np.float32)
+
+def populate(backend, embeddings):
+    ids = [str(i) for i in range(len(embeddings))]
+    backend.add(ids, [""] * len(ids), embeddings.tolist(), [{}] * len(ids))
+    return backend
+
+@pytest.mark.parametrize("quantization, code_bytes_per_vector", [("int8", DIM + 4), ("binary", DIM // 8)])
+def test_memory_usage_reports_code_size(tmp_path, embeddings, quantization, code_bytes_per_vector):
+    backend = populate(QuantizedFlatBackend(str(tmp_path), quantization), embeddings)
+
+    assert backend.memory_usage() == {
+        "vectors": 100,
+        "float_bytes": 100 * DIM * 4,
+        "code_bytes": 100 * code_bytes_per_vector
+    }
+
+def test_codes_are_rebuilt_after_reopening_a_flat_index(tmp_path, embeddings):
+    populate(NumpyFlatBackend(str(tmp_path)), embeddings)
+
+    backend = QuantizedFlatBackend(str(tmp_path), "int8")
+
+    assert backend.memory_usage()["code_bytes"] == 100 * (DIM + 4)
+    assert backend.search(embeddings[42].tolist(), 1)[0].id == "42"
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+from services import rag_service as rag_module
+from services.context_builder import ContextBuilder
+from services.rag_service import RAGService
+from utils.metrics import MetricsRegistry
+from vector_store.mmr import maximal_marginal_relevance
+
+class StaticChromaManager:
+
+    def __init__(self, scored_docs):
+        self.scored_docs = scored_docs
+
+    def similarity_search_with_relevance_scores(self, query, k=5, language=None, score_threshold=None,
+                                                mmr_lambda=None, fetch_k=20):
+        return [(Document(page_content=doc.page_content, metadata=dict(doc.metadata)), score)
+                for doc, score in self.scored_docs][:k]
+
+    def get_parent_documents(self, documents):
+        return documents
+
+class StaticLLM:
+    model_name = "test"
+    max_output_tokens = 2048
+
+    def generate(self, prompt, **kwargs):
+        return "answer"
+
+class HalvingCompressor:
+
+    def compress(self, query, docs, language="vi"):
+        compressed = [Document(page_content=doc.page_content[:len(doc.page_content) // 2], metadata=doc.metadata)
+                      for doc in docs]
+        return compressed, {
+            "applied": True,
+            "original_tokens": sum(len(doc.page_content) for doc in docs),
+            "compressed_tokens": sum(len(doc.page_content) for doc in compressed)
+        }
+
+def histogram_sum(registry, name):
+    return sum(entry["sum"] for entry in registry.snapshot()["histograms"].get(name, []))
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(rag_module, "metrics", registry)
+    return registry
+
+def test_context_tokens_are_recorded_after_compression(registry):
+    chroma_manager = StaticChromaManager([(Document(page_content="x" * 400, metadata={"id": "a"}), 0.9)])
+    rag_service = RAGService(
+        chroma_manager, StaticLLM(), context_builder=ContextBuilder(token_counter=len),
+        context_compressor=HalvingCompressor()
+    )
+
+    result = rag_service.process_query("học phí", language="vi")
+
+    assert result["context"]["context_tokens"] == 200
+    assert histogram_sum(registry, "rag_context_tokens") == 200
+    assert histogram_sum(registry, "rag_context_tokens_uncompressed") == 400
+
+class MMRChromaManager(StaticChromaManager):
+
+    def __init__(self, scored_docs, embeddings):
+        super().__init__(scored_docs)
+        self.embeddings = embeddings
+
+    def similarity_search_with_relevance_scores(self, query, k=5, language=None, score_threshold=None,
+                                                mmr_lambda=None, fetch_k=20):
+        if mmr_lambda is None:
+            return super().similarity_search_with_relevance_scores(query, k)
+
+        scores = [score for _, score in self.scored_docs]
+        order = maximal_marginal_relevance(scores, np.asarray(self.embeddings, dtype=np.float32), k, mmr_lambda)
+        return [self.scored_docs[i] for i in order]
+
+def test_low_mmr_lambda_keeps_the_diverse_pick_in_the_final_sources(registry):
+    chroma_manager = MMRChromaManager(
+        [
+            (Document(page_content="Học phí ngành CNTT năm 2024 là 30 triệu.", metadata={"id": "fees-2024"}), 0.90),
+            (Document(page_content="Học phí ngành CNTT năm 2024: 30 triệu đồng.", metadata={"id": "fees-faq"}), 0.89),
+            (Document(page_content="Sinh viên có thể đóng học phí theo kỳ.", metadata={"id": "payment"}), 0.70)
+        ],
+        embeddings=[[1.0, 0.0], [0.99, 0.05], [0.3, 0.95]]
+    )
+    rag_service = RAGService(chroma_manager, StaticLLM(), context_builder=ContextBuilder(max_k=2))
+
+    relevance_only = rag_service.process_query("học phí", language="vi")
+    diverse = rag_service.process_query("học phí", language="vi", mmr_lambda=0.3)
+
+    assert [doc.metadata["id"] for doc in relevance_only["source_documents"]] == ["fees-2024", "fees-faq"]
+    assert [doc.metadata["id"] for doc in diverse["source_documents"]] == ["fees-2024", "payment"]
+    assert diverse["context"]["mmr_lambda"] == 0.3
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain")
+
+from vector_store.backends.numpy_backend import NumpyFlatBackend
+from vector_store.chroma_client import ChromaManager
+from vector_store.retrieval_cache import RetrievalCache
+
+class FixedEmbeddings:
+
+    def embed_query(self, query):
+        return [1.0, 0.0, 0.0, 0.0]
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = ChromaManager.__new__(ChromaManager)
+    manager.partitions = {}
+    manager.embeddings = FixedEmbeddings()
+    manager.backend = NumpyFlatBackend(str(tmp_path / "numpy"))
+    manager.retrieval_cache = RetrievalCache(str(tmp_path / "retrieval_cache.sqlite3"))
+    manager.backend.add(
+        ["chunk-0", "chunk-1"], ["first", "second"],
+        np.eye(4, dtype=np.float32)[:2].tolist(), [{"id": "doc-0"}, {"id": "doc-1"}]
+    )
+    yield manager
+    manager.backend.close()
+
+def test_cached_results_do_not_share_metadata_with_callers(manager):
+    first = manager.similarity_search_with_score("học bổng", k=2)
+    for doc, score in first:
+        doc.metadata["relevance_score"] = score
+        doc.metadata["source_document_ids"] = ["mutated"]
+
+    second = manager.similarity_search_with_score("học bổng", k=2)
+
+    assert [doc.page_content for doc, _ in second] == ["first", "second"]
+    for doc, _ in second:
+        assert "relevance_score" not in doc.metadata
+        assert "source_document_ids" not in doc.metadata
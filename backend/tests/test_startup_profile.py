@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from utils.startup_profile import BASELINE_PATH, check_report, load_baseline, profile_startup
+
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+
+def make_report(app_import_ms, heavy_imports=()):
+    return {"app_import_ms": app_import_ms, "heavy_imports": list(heavy_imports)}
+
+def test_check_report_flags_heavy_imports_budget_and_regression():
+    assert check_report(make_report(300.0), 1500, {"app_import_ms": 250.0}, 3.0) == []
+
+    failures = check_report(make_report(1600.0, ["chromadb", "langchain"]), 1500, {"app_import_ms": 250.0}, 3.0)
+
+    assert len(failures) == 3
+    assert "chromadb, langchain" in failures[0]
+
+def test_committed_baseline_is_lazy():
+    baseline = load_baseline(BASELINE_PATH)
+
+    assert baseline["heavy_imports"] == []
+    assert 0 < baseline["app_import_ms"] <= IMPORT_BUDGET_MS
+
+def test_app_import_stays_within_budget_and_lazy():
+    for module in ("flask", "flask_cors", "jwt", "dotenv", "mysql.connector"):
+        pytest.importorskip(module)
+
+    report = profile_startup(top=5)
+
+    assert report["heavy_imports"] == []
+    assert check_report(report, IMPORT_BUDGET_MS, load_baseline(BASELINE_PATH), 3.0) == []
@@ -0,0 +1,68 @@
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_STAGE_COSTS_MS = {"reflection": 2000.0, "routing": 1500.0, "retrieval": 500.0, "generation": 6000.0}
+
+class Deadline:
+
+    def __init__(self, budget_ms: float, stage_costs_ms: Optional[Dict[str, float]] = None,
+                 tokens_per_second: float = 50.0, min_generation_ms: float = 1500.0):
+        self.budget_ms = budget_ms
+        self.stage_costs_ms = dict(DEFAULT_STAGE_COSTS_MS)
+        self.stage_costs_ms.update(stage_costs_ms or {})
+        self.tokens_per_second = tokens_per_second
+        self.min_generation_ms = min_generation_ms
+        self.decisions = {}
+        self._started_at = time.monotonic()
+
+    @classmethod
+    def from_header(cls, value: Optional[str], default_ms: float, max_ms: float, **kwargs) -> "Deadline":
+        try:
+            budget_ms = float(value) if value else default_ms
+        except ValueError:
+            budget_ms = default_ms
+        return cls(min(max(budget_ms, 0.0), max_ms), **kwargs)
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self._started_at) * 1000
+
+    def remaining_ms(self) -> float:
+        return max(0.0, self.budget_ms - self.elapsed_ms())
+
+    def expired(self) -> bool:
+        return self.remaining_ms() <= 0
+
+    def cost_ms(self, *stages: str) -> float:
+        return sum(self.stage_costs_ms.get(stage, 0.0) for stage in stages)
+
+    def can_afford(self, *stages: str) -> bool:
+        return self.remaining_ms() >= self.cost_ms(*stages)
+
+    def timeout(self, *downstream: str) -> float:
+        return max(0.0, self.remaining_ms() - self.cost_ms(*downstream)) / 1000
+
+    def generation_cap(self, max_output_tokens: int) -> Optional[int]:
+        remaining_ms = self.remaining_ms()
+        if remaining_ms < self.min_generation_ms:
+            self.record("generation", "extractive")
+            return 0
+        if remaining_ms >= self.cost_ms("generation"):
+            return None
+
+        cap = int(remaining_ms / 1000 * self.tokens_per_second)
+        if cap >= max_output_tokens:
+            return None
+
+        self.record("generation", {"max_output_tokens": cap})
+        return cap
+
+    def record(self, stage: str, decision: Any) -> None:
+        self.decisions[stage] = decision
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {
+            "budget_ms": round(self.budget_ms, 1),
+            "elapsed_ms": round(self.elapsed_ms(), 1),
+            "remaining_ms": round(self.remaining_ms(), 1),
+            "decisions": dict(self.decisions)
+        }
@@ -1,8 +1,13 @@
 import os
+import io
 import tempfile
 import uuid
+import hashlib
+import csv
+import codecs
+import re
 import logging
-from typing import Optional, Tuple, IO
+from typing import Callable, Iterator, Optional, Tuple, IO
 from werkzeug.utils import secure_filename
 from werkzeug.datastructures import FileStorage
 
@@ -61,4 +66,117 @@ def cleanup_temporary_file(file_path: str) -> None:
         logger.error(f"Error cleaning up temporary file {file_path}: {str(e)}")
         
 def get_file_size(file_path: str) -> int:
-    return os.path.getsize(file_path) if os.path.exists(file_path) else 0
\ No newline at end of file
+    return os.path.getsize(file_path) if os.path.exists(file_path) else 0
+
+def compute_file_hash(file_path: str, block_size: int = 1024 * 1024) -> str:
+    sha256 = hashlib.sha256()
+    
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            sha256.update(block)
+            
+    return sha256.hexdigest()
+
+def _split_line(line: str, budget: int, length_function: Callable[[str], int]) -> Iterator[str]:
+    piece = ""
+    piece_length = 0
+    
+    for word in re.findall(r"\S+\s*", line):
+        word_length = length_function(word)
+        
+        while word_length > budget:
+            if piece:
+                yield piece.rstrip()
+                piece = ""
+                piece_length = 0
+            cut = max(1, int(len(word) * budget / word_length))
+            yield word[:cut]
+            word = word[cut:]
+            word_length = length_function(word)
+            
+        if piece and piece_length + word_length > budget:
+            yield piece.rstrip()
+            piece = ""
+            piece_length = 0
+        piece += word
+        piece_length += word_length
+        
+    if piece.strip():
+        yield piece.rstrip()
+
+def detect_csv_encoding(file_path: str, encoding: str = "utf-8-sig", block_size: int = 1024 * 1024) -> str:
+    with open(file_path, "rb") as f:
+        head = f.read(4)
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16"
+        f.seek(0)
+        
+        decoder = codecs.getincrementaldecoder(encoding)()
+        offset = 0
+        try:
+            for block in iter(lambda: f.read(block_size), b""):
+                decoder.decode(block)
+                offset += len(block)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError as e:
+            raise ValueError(
+                f"File CSV không đúng mã hoá {encoding} (byte lỗi tại vị trí {offset + e.start}), "
+                f"vui lòng lưu lại file dưới dạng UTF-8"
+            )
+    return encoding
+
+def iter_csv_row_groups(file_path: str, max_length: int, length_function: Callable[[str], int] = len,
+                        encoding: Optional[str] = None) -> Iterator[Tuple[str, int, int]]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="")
+    
+    def format_row(row):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        return buffer.getvalue()
+    
+    encoding = encoding or detect_csv_encoding(file_path)
+    
+    with open(file_path, newline="", encoding=encoding) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+            
+        prefix = format_row(header) + "\n"
+        prefix_length = length_function(prefix)
+        if prefix_length > max_length // 2:
+            logger.warning(f"CSV header of {file_path} is too wide to repeat in every chunk, omitting it")
+            prefix, prefix_length = "", 0
+        row_budget = max_length - prefix_length
+        
+        lines = []
+        length = prefix_length
+        row_start = row_end = 0
+        
+        for row_index, row in enumerate(reader):
+            if not any(cell.strip() for cell in row):
+                continue
+                
+            line = format_row(row)
+            line_length = length_function(line) + 1
+            
+            if lines and length + line_length > max_length:
+                yield prefix + "\n".join(lines), row_start, row_end
+                lines = []
+                length = prefix_length
+                
+            if line_length - 1 > row_budget:
+                for piece in _split_line(line, row_budget, length_function):
+                    yield prefix + piece, row_index, row_index
+                continue
+                
+            if not lines:
+                row_start = row_index
+            lines.append(line)
+            length += line_length
+            row_end = row_index
+            
+        if lines:
+            yield prefix + "\n".join(lines), row_start, row_end
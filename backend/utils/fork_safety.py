@@ -0,0 +1,39 @@
+import threading
+import weakref
+import logging
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+_callbacks: List[Callable[[], Callable]] = []
+_lock = threading.Lock()
+
+def register_after_fork(callback: Callable[[], None]) -> None:
+    if hasattr(callback, "__self__"):
+        reference = weakref.WeakMethod(callback)
+    else:
+        reference = lambda: callback
+
+    with _lock:
+        _callbacks.append(reference)
+
+def reinitialize_after_fork() -> int:
+    global _callbacks
+
+    with _lock:
+        callbacks = [reference for reference in _callbacks if reference() is not None]
+        _callbacks = callbacks
+
+    count = 0
+    for reference in callbacks:
+        callback = reference()
+        if callback is None:
+            continue
+        try:
+            callback()
+            count += 1
+        except Exception as e:
+            logger.error(f"Error reinitializing {getattr(callback, '__qualname__', callback)} after fork: {str(e)}")
+
+    logger.info(f"Reinitialized {count} fork-unsafe resources")
+    return count
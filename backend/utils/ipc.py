@@ -0,0 +1,38 @@
+import json
+import socket
+import struct
+from typing import Any, Dict, Tuple
+
+_FRAME_HEADER = struct.Struct("!II")
+MAX_HEADER_BYTES = 16 * 1024 * 1024
+MAX_PAYLOAD_BYTES = 1024 * 1024 * 1024
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if not count:
+            raise ConnectionError("Socket closed before the full message was received")
+        received += count
+    return bytes(buffer)
+
+def send_message(sock: socket.socket, header: Dict[str, Any], payload: bytes = b"") -> None:
+    header_bytes = json.dumps(header, ensure_ascii=False, default=str).encode("utf-8")
+    sock.sendall(_FRAME_HEADER.pack(len(header_bytes), len(payload)) + header_bytes + payload)
+
+def recv_message(sock: socket.socket) -> Tuple[Dict[str, Any], bytes]:
+    header_size, payload_size = _FRAME_HEADER.unpack(_recv_exact(sock, _FRAME_HEADER.size))
+    if header_size > MAX_HEADER_BYTES or payload_size > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"Message too large: header={header_size} payload={payload_size}")
+
+    header = json.loads(_recv_exact(sock, header_size).decode("utf-8"))
+    payload = _recv_exact(sock, payload_size) if payload_size else b""
+    return header, payload
+
+def connect_unix(path: str, timeout: float = 30.0) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(path)
+    return sock
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from utils.metrics import metrics
+
+class SingleFlightTimeout(TimeoutError):
+    pass
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.increment("single_flight_shared", labels={"name": self.name})
+            if not call.event.wait(timeout):
+                metrics.increment("single_flight_timeout", labels={"name": self.name})
+                raise SingleFlightTimeout(f"Timed out after {timeout:.3f}s waiting for in-flight call")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+class AsyncSingleFlight:
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                 timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        task = self._calls.get(key)
+        shared = task is not None
+
+        if shared:
+            metrics.increment("single_flight_shared", labels={"name": self.name})
+        else:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        if not shared or timeout is None:
+            return await asyncio.shield(task), shared
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout), shared
+        except asyncio.TimeoutError:
+            metrics.increment("single_flight_timeout", labels={"name": self.name})
+            raise SingleFlightTimeout(f"Timed out after {timeout:.3f}s waiting for in-flight call")
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,138 @@
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(BACKEND_DIR, "benchmarks", "startup_profile.json")
+
+HEAVY_PACKAGES = (
+    "langchain", "langchain_core", "langchain_community", "langchain_google_genai", "langchain_huggingface",
+    "chromadb", "google.generativeai", "google.ai.generativelanguage", "torch", "transformers",
+    "sentence_transformers", "onnxruntime", "nltk"
+)
+
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+WARMUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app
+import_ms = (time.perf_counter() - start) * 1000
+app.services.warm_up()
+print(json.dumps({"import_ms": import_ms, **app.services.status()}))
+"""
+
+def parse_import_times(stderr: str) -> List[Dict[str, Any]]:
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                "module": module,
+                "depth": (len(indent) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000
+            })
+    return entries
+
+def _run(args: List[str], env: Dict[str, str]) -> subprocess.CompletedProcess:
+    result = subprocess.run(args, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Profiling command failed:\n{result.stderr[-2000:]}")
+    return result
+
+def profile_startup(top: int = 15, warm_up: bool = False) -> Dict[str, Any]:
+    env = dict(os.environ, STARTUP_WARMUP="lazy")
+    result = _run([sys.executable, "-X", "importtime", "-c", "import app"], env)
+
+    entries = parse_import_times(result.stderr)
+    roots = [entry for entry in entries if entry["depth"] == 0]
+
+    packages = {}
+    for entry in entries:
+        if entry["depth"] != 1:
+            continue
+        package = entry["module"].split(".")[0]
+        packages[package] = packages.get(package, 0.0) + entry["cumulative_ms"]
+
+    app_entry = next((entry for entry in roots if entry["module"] == "app"), None)
+    report = {
+        "app_import_ms": round(app_entry["cumulative_ms"], 1) if app_entry else None,
+        "total_import_ms": round(sum(entry["cumulative_ms"] for entry in roots), 1),
+        "modules_imported": len(entries),
+        "heavy_imports": sorted({
+            package for entry in entries for package in HEAVY_PACKAGES
+            if entry["module"] == package or entry["module"].startswith(package + ".")
+        }),
+        "by_package_ms": {
+            name: round(value, 1)
+            for name, value in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "slowest_modules_ms": {
+            entry["module"]: round(entry["self_ms"], 1)
+            for entry in sorted(entries, key=lambda entry: entry["self_ms"], reverse=True)[:top]
+        }
+    }
+
+    if warm_up:
+        result = _run([sys.executable, "-c", WARMUP_SCRIPT], env)
+        status = json.loads(result.stdout.strip().splitlines()[-1])
+        report["warm_up"] = status["components"]
+        report["time_to_ready_ms"] = round(status["import_ms"] + sum(
+            component["init_ms"] or 0.0 for component in status["components"].values()
+        ), 1)
+
+    return report
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def check_report(report: Dict[str, Any], budget_ms: float, baseline: Dict[str, Any],
+                 max_regression: float) -> List[str]:
+    failures = []
+    app_import_ms = report["app_import_ms"] or 0.0
+
+    if report["heavy_imports"]:
+        failures.append(f"importing app pulled in {', '.join(report['heavy_imports'])}")
+    if budget_ms and app_import_ms > budget_ms:
+        failures.append(f"app import took {app_import_ms} ms, budget is {budget_ms} ms")
+    if max_regression and baseline.get("app_import_ms") and app_import_ms > baseline["app_import_ms"] * max_regression:
+        failures.append(
+            f"app import took {app_import_ms} ms, more than {max_regression}x the baseline {baseline['app_import_ms']} ms"
+        )
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile backend startup: import-time breakdown and service warm-up")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--warm-up", action="store_true", help="Also initialize every service and time each one")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500")),
+                        help="Fail if importing app takes longer than this (0 disables the check)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Committed profile to compare against")
+    parser.add_argument("--max-regression", type=float, default=float(os.getenv("STARTUP_MAX_REGRESSION", "3.0")),
+                        help="Fail if importing app is this many times slower than the baseline (0 disables the check)")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = profile_startup(args.top, args.warm_up)
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = check_report(report, args.budget_ms, load_baseline(args.baseline), args.max_regression)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,32 @@
 import re
+import hashlib
 import unicodedata
 from typing import List, Dict, Any, Optional
 import logging
-import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import stopwords
+import threading
 
 logger = logging.getLogger(__name__)
 
+_nltk_lock = threading.Lock()
+_nltk_ready = False
 
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+def ensure_nltk_data() -> None:
+    global _nltk_ready
+    if _nltk_ready:
+        return
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+    with _nltk_lock:
+        if _nltk_ready:
+            return
+
+        import nltk
+
+        for resource, package in (('tokenizers/punkt', 'punkt'), ('corpora/stopwords', 'stopwords')):
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                nltk.download(package)
+        _nltk_ready = True
 
 def clean_text(text: str) -> str:
     if not text:
@@ -32,6 +41,10 @@ def clean_text(text: str) -> str:
 def normalize_unicode(text: str) -> str:
     return unicodedata.normalize('NFKC', text) if text else ""
 
+def compute_text_hash(text: str) -> str:
+    normalized = re.sub(r'\s+', ' ', normalize_unicode(text)).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
 def detect_language(text: str) -> str:
 
     if not text:
@@ -55,6 +68,8 @@ def tokenize_text(text: str, language: str = "vi") -> List[str]:
     
     text = clean_text(text)
     
+    ensure_nltk_data()
+    from nltk.tokenize import word_tokenize
     return word_tokenize(text)
 
 def remove_stopwords(tokens: List[str], language: str = "vi") -> List[str]:
@@ -63,6 +78,8 @@ def remove_stopwords(tokens: List[str], language: str = "vi") -> List[str]:
     
     lang = "vietnamese" if language == "vi" else "english"
     try:
+        ensure_nltk_data()
+        from nltk.corpus import stopwords
         stop_words = set(stopwords.words(lang))
     except:
         stop_words = set()
@@ -102,4 +119,6 @@ def split_into_sentences(text: str, language: str = "vi") -> List[str]:
     
     text = normalize_unicode(text)
 
+    ensure_nltk_data()
+    from nltk.tokenize import sent_tokenize
     return sent_tokenize(text)
\ No newline at end of file
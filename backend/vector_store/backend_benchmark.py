@@ -0,0 +1,131 @@
+import sys
+import json
+import time
+import argparse
+import logging
+import tempfile
+from typing import Any, Dict, Sequence
+import numpy as np
+
+BACKENDS = ("chroma", "numpy", "int8", "binary", "ivf")
+
+def make_corpus(n_vectors: int, dim: int, n_queries: int, n_topics: int = 64, seed: int = 0):
+    generator = np.random.RandomState(seed)
+    centers = generator.randn(n_topics, dim).astype(np.float32)
+    vectors = centers[generator.randint(n_topics, size=n_vectors)] + 0.35 * generator.randn(n_vectors, dim)
+    queries = vectors[generator.choice(n_vectors, n_queries, replace=False)] + 0.2 * generator.randn(n_queries, dim)
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = queries @ normalized.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def create_backend(name: str, directory: str, ivf_nlist: int, ivf_nprobe: int, rescore_factor: int):
+    if name == "chroma":
+        import chromadb
+        from vector_store.backends.chroma_backend import ChromaBackend
+
+        return ChromaBackend(chromadb.PersistentClient(path=directory))
+    if name in ("int8", "binary"):
+        from vector_store.backends.quantized_backend import QuantizedFlatBackend
+
+        return QuantizedFlatBackend(directory, name, rescore_factor)
+    if name == "ivf":
+        from vector_store.backends.ivf_backend import IVFBackend
+
+        return IVFBackend(directory, nlist=ivf_nlist, nprobe=ivf_nprobe)
+
+    from vector_store.backends.numpy_backend import NumpyFlatBackend
+
+    return NumpyFlatBackend(directory)
+
+def benchmark_backend(backend, vectors: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int,
+                      batch_size: int = 5000) -> Dict[str, Any]:
+    ids = [str(i) for i in range(len(vectors))]
+
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), batch_size):
+        batch = slice(offset, offset + batch_size)
+        backend.add(ids[batch], [""] * len(ids[batch]), vectors[batch].tolist(), [{}] * len(ids[batch]))
+    retrain_thread = getattr(backend, "_retrain_thread", None)
+    if retrain_thread is not None:
+        retrain_thread.join()
+    add_seconds = time.perf_counter() - start
+
+    for query in queries[:10]:
+        backend.search(query.tolist(), k)
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        query_start = time.perf_counter()
+        results = backend.search(query.tolist(), k)
+        latencies.append((time.perf_counter() - query_start) * 1000)
+        hits += len({int(result.id) for result in results} & set(expected.tolist()))
+
+    latencies = np.asarray(latencies)
+    report = {
+        "add_vectors_per_s": round(len(vectors) / add_seconds, 1),
+        f"recall@{k}": round(hits / (len(queries) * k), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+        "qps": round(len(queries) / (latencies.sum() / 1000), 1)
+    }
+    if hasattr(backend, "memory_usage"):
+        report["memory"] = backend.memory_usage()
+        report["scan_bytes_per_vector"] = round(
+            report["memory"].get("code_bytes", report["memory"]["float_bytes"]) / max(report["memory"]["vectors"], 1), 1
+        )
+    return report
+
+def benchmark(backends: Sequence[str], n_vectors: int, dim: int, n_queries: int, k: int,
+              ivf_nlist: int = 1024, ivf_nprobe: int = 8, rescore_factor: int = 10) -> Dict[str, Any]:
+    vectors, queries = make_corpus(n_vectors, dim, n_queries)
+    truth = exact_top_k(vectors, queries, k)
+
+    report = {"vectors": n_vectors, "dim": dim, "queries": n_queries, "k": k, "backends": {}}
+    for name in backends:
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                backend = create_backend(name, directory, ivf_nlist, ivf_nprobe, rescore_factor)
+            except ImportError as e:
+                report["backends"][name] = {"skipped": str(e)}
+                continue
+            try:
+                report["backends"][name] = benchmark_backend(backend, vectors, queries, truth, k)
+            finally:
+                backend.close()
+
+    baseline = report["backends"].get("chroma", {})
+    if "p50_ms" in baseline:
+        for name, result in report["backends"].items():
+            if "p50_ms" in result:
+                result["p50_speedup_vs_chroma"] = round(baseline["p50_ms"] / max(result["p50_ms"], 1e-6), 2)
+
+    return report
+
+def main(argv=None):
+    from config.settings import Config
+
+    parser = argparse.ArgumentParser(description="Compare vector store backends: recall@k and query latency against Chroma")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--ivf-nlist", type=int, default=Config.IVF_NLIST)
+    parser.add_argument("--ivf-nprobe", type=int, default=Config.IVF_NPROBE)
+    parser.add_argument("--rescore-factor", type=int, default=Config.QUANTIZATION_RESCORE_FACTOR)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = benchmark(
+        [name.strip() for name in args.backends.split(",") if name.strip()],
+        args.vectors, args.dim, args.queries, args.k, args.ivf_nlist, args.ivf_nprobe, args.rescore_factor
+    )
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, NamedTuple, Optional
+import numpy as np
+
+class SearchResult(NamedTuple):
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+    score: float
+    embedding: Optional[np.ndarray] = None
+
+class VectorStoreBackend(ABC):
+
+    @abstractmethod
+    def add(self, ids: List[str], texts: List[str], embeddings: List[List[float]],
+            metadatas: List[Dict[str, Any]]) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        pass
+
+    @abstractmethod
+    def delete_where(self, where: Dict[str, Any]) -> int:
+        pass
+
+    @abstractmethod
+    def search(self, query_embedding: List[float], k: int, where: Optional[Dict[str, Any]] = None,
+               include_embeddings: bool = False) -> List[SearchResult]:
+        pass
+
+    @abstractmethod
+    def get_embeddings(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    def search_batch(self, query_embeddings: List[List[float]], k: int, where: Optional[Dict[str, Any]] = None,
+                     include_embeddings: bool = False) -> List[List[SearchResult]]:
+        return [self.search(embedding, k, where, include_embeddings) for embedding in query_embeddings]
+
+    def close(self) -> None:
+        pass
+
+def matches_filter(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if operator == "$eq" and value != operand:
+                    return False
+                if operator == "$ne" and value == operand:
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+
+    return True
+
+def normalize_vectors(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    if k >= len(scores):
+        return np.argsort(-scores)
+
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates])]
@@ -0,0 +1,111 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+import numpy as np
+from .base import SearchResult, VectorStoreBackend
+
+logger = logging.getLogger(__name__)
+
+class ChromaBackend(VectorStoreBackend):
+
+    def __init__(self, client, collection_name: str = "langchain"):
+        self.collection_name = collection_name
+        self.reconnect(client)
+
+    def reconnect(self, client) -> None:
+        self.client = client
+        self.collection = client.get_or_create_collection(
+            name=self.collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )
+        self.space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+
+    def _sanitize_metadata(self, metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        sanitized = {}
+        for key, value in (metadata or {}).items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                value = ",".join(str(item) for item in value)
+            elif isinstance(value, dict):
+                value = json.dumps(value, ensure_ascii=False, default=str)
+            elif not isinstance(value, (str, int, float, bool)):
+                value = str(value)
+            sanitized[key] = value
+        return sanitized or None
+
+    def _to_score(self, distance: float) -> float:
+        if self.space == "l2":
+            return 1.0 - distance / 2.0
+        return 1.0 - distance
+
+    def add(self, ids, texts, embeddings, metadatas) -> None:
+        self.collection.add(
+            ids=list(ids),
+            documents=list(texts),
+            embeddings=[list(map(float, embedding)) for embedding in embeddings],
+            metadatas=[self._sanitize_metadata(metadata) for metadata in metadatas]
+        )
+
+    def delete(self, ids) -> None:
+        if ids:
+            self.collection.delete(ids=list(ids))
+
+    def delete_where(self, where) -> int:
+        if not where:
+            return 0
+
+        ids = self.collection.get(where=where, include=[])["ids"]
+        self.delete(ids)
+        return len(ids)
+
+    def search(self, query_embedding, k, where=None, include_embeddings=False) -> List[SearchResult]:
+        return self.search_batch([query_embedding], k, where, include_embeddings)[0]
+
+    def search_batch(self, query_embeddings, k, where=None, include_embeddings=False) -> List[List[SearchResult]]:
+        if not query_embeddings:
+            return []
+
+        include = ["documents", "metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+
+        response = self.collection.query(
+            query_embeddings=[list(map(float, embedding)) for embedding in query_embeddings],
+            n_results=k,
+            where=where or None,
+            include=include
+        )
+
+        results = []
+        for i in range(len(query_embeddings)):
+            embeddings = response.get("embeddings")
+            results.append([
+                SearchResult(
+                    id=chunk_id,
+                    text=text or "",
+                    metadata=metadata or {},
+                    score=self._to_score(distance),
+                    embedding=np.asarray(embeddings[i][j], dtype=np.float32) if include_embeddings else None
+                )
+                for j, (chunk_id, text, metadata, distance) in enumerate(zip(
+                    response["ids"][i],
+                    response["documents"][i],
+                    response["metadatas"][i],
+                    response["distances"][i]
+                ))
+            ])
+        return results
+
+    def get_embeddings(self, ids) -> Dict[str, np.ndarray]:
+        if not ids:
+            return {}
+
+        response = self.collection.get(ids=list(ids), include=["embeddings"])
+        return {
+            chunk_id: np.asarray(embedding, dtype=np.float32)
+            for chunk_id, embedding in zip(response["ids"], response["embeddings"])
+        }
+
+    def count(self) -> int:
+        return self.collection.count()
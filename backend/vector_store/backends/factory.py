@@ -0,0 +1,88 @@
+import os
+import logging
+from typing import Optional, Sequence
+from .base import VectorStoreBackend
+from .chroma_backend import ChromaBackend
+from .numpy_backend import NumpyFlatBackend
+from .quantized_backend import QuantizedFlatBackend
+from .ivf_backend import IVFBackend
+from .sharded_backend import ShardedBackend
+from utils.fork_safety import register_after_fork
+
+logger = logging.getLogger(__name__)
+
+class BackendFactory:
+
+    def __init__(self, backend: str, persist_directory: str, quantization: str = "none", rescore_factor: int = 10,
+                 ivf_nlist: int = 1024, ivf_nprobe: int = 8, shard_by: str = "none", num_shards: int = 4,
+                 shard_categories: Sequence[str] = ("general", "technical", "policy", "faq")):
+        if backend not in ("chroma", "numpy", "ivf"):
+            raise ValueError(f"Vector store backend không được hỗ trợ: {backend}")
+
+        self.backend = backend
+        self.persist_directory = persist_directory
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.ivf_nlist = ivf_nlist
+        self.ivf_nprobe = ivf_nprobe
+        self.shard_by = shard_by
+        self.num_shards = num_shards
+        self.shard_categories = shard_categories
+        self.client = None
+        self._chroma_backends = []
+
+    def create(self, partition: Optional[str] = None) -> VectorStoreBackend:
+        if self.backend == "chroma" and self.client is None:
+            self.client = self._create_chroma_client()
+            register_after_fork(self._reconnect_chroma)
+
+        if self.shard_by == "none":
+            return self._create_shard(partition)
+
+        if self.shard_by == "hash":
+            shard_names = [str(i) for i in range(self.num_shards)]
+        else:
+            shard_names = list(self.shard_categories)
+
+        prefix = f"{partition}_" if partition else ""
+        shards = {name: self._create_shard(prefix + name) for name in shard_names}
+        return ShardedBackend(shards, shard_by=self.shard_by)
+
+    def _create_shard(self, shard_name: Optional[str] = None) -> VectorStoreBackend:
+        suffix = f"_{shard_name}" if shard_name is not None else ""
+
+        if self.backend == "numpy":
+            directory = os.path.join(self.persist_directory, f"numpy_index{suffix}")
+            if self.quantization in ("int8", "binary"):
+                return QuantizedFlatBackend(directory, self.quantization, self.rescore_factor)
+            return NumpyFlatBackend(directory)
+
+        if self.backend == "ivf":
+            return IVFBackend(
+                os.path.join(self.persist_directory, f"ivf_index{suffix}"),
+                nlist=self.ivf_nlist,
+                nprobe=self.ivf_nprobe
+            )
+
+        backend = ChromaBackend(self.client, collection_name=f"langchain{suffix}")
+        self._chroma_backends.append(backend)
+        return backend
+
+    def _reconnect_chroma(self):
+        from chromadb.api.client import SharedSystemClient
+
+        SharedSystemClient.clear_system_cache()
+        self.client = self._create_chroma_client()
+        for backend in self._chroma_backends:
+            backend.reconnect(self.client)
+        logger.info(f"Kết nối lại ChromaDB sau fork ({len(self._chroma_backends)} collections)")
+
+    def _create_chroma_client(self):
+        import chromadb
+
+        os.makedirs(self.persist_directory, exist_ok=True)
+        try:
+            return chromadb.PersistentClient(path=self.persist_directory)
+        except Exception as e:
+            logger.error(f"Lỗi khi mở ChromaDB tại {self.persist_directory}: {str(e)}")
+            raise
@@ -0,0 +1,277 @@
+import os
+import json
+import shutil
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .base import SearchResult, normalize_vectors, top_k_indices
+from .numpy_backend import NumpyFlatBackend
+
+logger = logging.getLogger(__name__)
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 15, seed: int = 0) -> np.ndarray:
+    generator = np.random.RandomState(seed)
+    centroids = vectors[generator.choice(len(vectors), n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), 65536):
+            assignments[start:start + 65536] = np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=n_clusters)
+
+        empty = np.where(counts == 0)[0]
+        if len(empty):
+            sums[empty] = vectors[generator.choice(len(vectors), len(empty), replace=False)]
+
+        centroids = normalize_vectors(sums)
+
+    return centroids
+
+class IVFBackend(NumpyFlatBackend):
+
+    def __init__(self, directory: str, nlist: int = 1024, nprobe: int = 8,
+                 train_threshold: Optional[int] = None, imbalance_factor: float = 4.0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold or nlist * 39
+        self.imbalance_factor = imbalance_factor
+        self.state_path = os.path.join(directory, "ivf_state.json")
+        self._retrain_thread = None
+
+        super().__init__(directory)
+
+    def _read_state(self) -> Dict:
+        if not os.path.exists(self.state_path):
+            return {"generation": 0, "dim": None, "trained": False}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _write_state(self, state: Dict):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _list_dir(self, generation: int) -> str:
+        return os.path.join(self.directory, f"ivf_{generation}")
+
+    def _load(self):
+        super()._load()
+
+        self._state = self._read_state()
+        self._centroids = None
+        if self._state["trained"]:
+            self._centroids = np.load(os.path.join(self._list_dir(self._state["generation"]), "centroids.npy"))
+
+    def _n_lists(self) -> int:
+        return len(self._centroids) if self._centroids is not None else 1
+
+    def _read_list(self, list_dir: str, list_id: int, dim: int) -> Tuple[np.ndarray, np.ndarray]:
+        rows_path = os.path.join(list_dir, f"{list_id}.rows")
+        vec_path = os.path.join(list_dir, f"{list_id}.vec")
+        if not os.path.exists(rows_path) or not os.path.getsize(rows_path) or not os.path.exists(vec_path):
+            return np.empty(0, dtype=np.int64), np.empty((0, dim), dtype=np.float32)
+
+        rows = np.memmap(rows_path, dtype=np.int64, mode="r")
+        vectors = np.memmap(vec_path, dtype=np.float32, mode="r")
+        count = min(len(rows), len(vectors) // dim)
+        return rows[:count], vectors[:count * dim].reshape(count, dim)
+
+    def _list_sizes(self) -> np.ndarray:
+        list_dir = self._list_dir(self._state["generation"])
+        return np.array([
+            os.path.getsize(os.path.join(list_dir, f"{i}.rows")) // 8
+            if os.path.exists(os.path.join(list_dir, f"{i}.rows")) else 0
+            for i in range(self._n_lists())
+        ])
+
+    def _check_dimension(self, dim: int):
+        if self._state["dim"] is None:
+            self._state["dim"] = dim
+            self._write_state(self._state)
+        elif self._state["dim"] != dim:
+            raise ValueError(f"Kích thước vector không khớp: {dim} != {self._state['dim']}")
+
+    def _store_vectors(self, start: int, vectors: np.ndarray):
+        self._check_dimension(vectors.shape[1])
+
+        list_dir = self._list_dir(self._state["generation"])
+        os.makedirs(list_dir, exist_ok=True)
+
+        rows = np.arange(start, start + len(vectors), dtype=np.int64)
+        if self._centroids is None:
+            assignments = np.zeros(len(vectors), dtype=np.int64)
+        else:
+            assignments = np.argmax(vectors @ self._centroids.T, axis=1)
+
+        for list_id in np.unique(assignments):
+            selected = assignments == list_id
+            with open(os.path.join(list_dir, f"{list_id}.vec"), "ab") as f:
+                f.write(vectors[selected].astype(np.float32).tobytes())
+            with open(os.path.join(list_dir, f"{list_id}.rows"), "ab") as f:
+                f.write(rows[selected].tobytes())
+
+    def _on_vectors_added(self, start: int, vectors: np.ndarray):
+        if self._needs_retrain():
+            self._schedule_retrain()
+
+    def _needs_retrain(self) -> bool:
+        total = self.count()
+        if total < self.train_threshold:
+            return False
+        if self._centroids is None:
+            return True
+
+        sizes = self._list_sizes()
+        return sizes.max() > self.imbalance_factor * max(sizes.mean(), 1.0)
+
+    def _schedule_retrain(self):
+        if self._retrain_thread is not None and self._retrain_thread.is_alive():
+            return
+
+        self._retrain_thread = threading.Thread(target=self.retrain, name="ivf-retrain", daemon=True)
+        self._retrain_thread.start()
+
+    def _remove_stale_generations(self, keep: Tuple[int, ...]):
+        for name in os.listdir(self.directory):
+            prefix, _, generation = name.partition("_")
+            if prefix == "ivf" and generation.isdigit() and int(generation) not in keep:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def retrain(self):
+        try:
+            with self._file_lock():
+                with self._lock:
+                    self._refresh()
+                    if not self._needs_retrain():
+                        return
+                    state = dict(self._state)
+                    alive = self._alive.copy()
+                    n_lists = self._n_lists()
+
+                dim = state["dim"]
+                old_dir = self._list_dir(state["generation"])
+                total = int(alive.sum())
+                n_clusters = max(1, min(self.nlist, total // 39))
+                sample_every = max(1, total // (n_clusters * 64))
+
+                logger.info(f"Huấn luyện lại IVF: {total} vectors, {n_clusters} lists")
+
+                samples = []
+                for list_id in range(n_lists):
+                    rows, vectors = self._read_list(old_dir, list_id, dim)
+                    keep = (rows < len(alive))
+                    keep[keep] = alive[rows[keep]]
+                    samples.append(np.asarray(vectors[keep][::sample_every]))
+                centroids = spherical_kmeans(np.concatenate(samples), n_clusters)
+
+                new_generation = state["generation"] + 1
+                new_dir = self._list_dir(new_generation)
+                shutil.rmtree(new_dir, ignore_errors=True)
+                os.makedirs(new_dir)
+                np.save(os.path.join(new_dir, "centroids.npy"), centroids)
+
+                for list_id in range(n_lists):
+                    rows, vectors = self._read_list(old_dir, list_id, dim)
+                    keep = (rows < len(alive))
+                    keep[keep] = alive[rows[keep]]
+                    rows, vectors = np.asarray(rows[keep]), np.asarray(vectors[keep])
+                    if not len(rows):
+                        continue
+
+                    assignments = np.argmax(vectors @ centroids.T, axis=1)
+                    order = np.argsort(assignments, kind="stable")
+                    boundaries = np.searchsorted(assignments[order], np.arange(n_clusters + 1))
+                    for target in range(n_clusters):
+                        block = order[boundaries[target]:boundaries[target + 1]]
+                        if not len(block):
+                            continue
+                        with open(os.path.join(new_dir, f"{target}.vec"), "ab") as f:
+                            f.write(vectors[block].tobytes())
+                        with open(os.path.join(new_dir, f"{target}.rows"), "ab") as f:
+                            f.write(rows[block].tobytes())
+
+                self._write_state({"generation": new_generation, "dim": dim, "trained": True})
+                self.records.bump_version()
+
+                with self._lock:
+                    self._load()
+
+                self._remove_stale_generations(keep=(state["generation"], new_generation))
+
+                logger.info(f"Đã huấn luyện lại IVF (generation {new_generation})")
+        except Exception as e:
+            logger.error(f"Lỗi khi huấn luyện lại IVF: {str(e)}")
+
+    def search(self, query_embedding, k, where=None, include_embeddings=False) -> List[SearchResult]:
+        with self._lock:
+            self._refresh()
+            if not self._size or self._state["dim"] is None:
+                return []
+
+            mask = self._candidate_mask(where)
+            centroids = self._centroids
+            list_dir = self._list_dir(self._state["generation"])
+            dim = self._state["dim"]
+
+        query = normalize_vectors(np.asarray(query_embedding, dtype=np.float32))
+        if centroids is None:
+            probes = [0]
+        else:
+            probes = top_k_indices(centroids @ query, self.nprobe)
+
+        candidate_rows = []
+        candidate_scores = []
+        candidate_vectors = []
+        for list_id in probes:
+            rows, vectors = self._read_list(list_dir, int(list_id), dim)
+            if not len(rows):
+                continue
+
+            keep = rows < len(mask)
+            keep[keep] = mask[rows[keep]]
+            if not keep.any():
+                continue
+
+            rows, vectors = rows[keep], vectors[keep]
+            scores = vectors @ query
+            top = top_k_indices(scores, k)
+            candidate_rows.append(np.asarray(rows[top]))
+            candidate_scores.append(scores[top])
+            if include_embeddings:
+                candidate_vectors.append(np.asarray(vectors[top]))
+
+        if not candidate_rows:
+            return []
+
+        rows = np.concatenate(candidate_rows)
+        scores = np.concatenate(candidate_scores)
+        top = top_k_indices(scores, k)
+        embeddings = np.concatenate(candidate_vectors)[top] if include_embeddings else None
+
+        with self._lock:
+            return self._build_results(rows[top], scores[top], embeddings)
+
+    def memory_usage(self) -> Dict[str, int]:
+        return {
+            "vectors": self._size,
+            "float_bytes": int(self._size * (self._state["dim"] or 0) * 4),
+            "centroid_bytes": int(self._centroids.nbytes if self._centroids is not None else 0)
+        }
+
+    def _get_vectors(self, rows: np.ndarray) -> np.ndarray:
+        dim = self._state["dim"]
+        list_dir = self._list_dir(self._state["generation"])
+        found = {}
+
+        for list_id in range(self._n_lists()):
+            list_rows, vectors = self._read_list(list_dir, list_id, dim)
+            for index in np.where(np.isin(list_rows, rows))[0]:
+                found[int(list_rows[index])] = np.array(vectors[index])
+
+        missing = np.zeros(dim, dtype=np.float32)
+        return np.array([found.get(int(row), missing) for row in rows], dtype=np.float32)
@@ -0,0 +1,318 @@
+import os
+import json
+import fcntl
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .base import SearchResult, VectorStoreBackend, matches_filter, normalize_vectors, top_k_indices
+from utils.fork_safety import register_after_fork
+
+logger = logging.getLogger(__name__)
+
+def write_rows(path: str, start: int, block: np.ndarray, valid_rows: int) -> np.ndarray:
+    end = start + len(block)
+    current = np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+    if current is None or current.shape[0] < end or current.shape[1:] != block.shape[1:]:
+        capacity = max(1024, end * 2)
+        tmp_path = path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=block.dtype, shape=(capacity,) + block.shape[1:])
+        if current is not None and current.shape[1:] == block.shape[1:] and valid_rows:
+            grown[:valid_rows] = current[:valid_rows]
+        grown.flush()
+        del grown, current
+        os.replace(tmp_path, path)
+
+    writable = np.load(path, mmap_mode="r+")
+    writable[start:end] = block
+    writable.flush()
+    del writable
+
+    return np.load(path, mmap_mode="r")
+
+class RecordStore:
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._connect()
+        register_after_fork(self._connect)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS records (
+                    row INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    text TEXT,
+                    metadata TEXT,
+                    deleted INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute("INSERT OR IGNORE INTO state (key, value) VALUES ('version', 0)")
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def get_version(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT value FROM state WHERE key = 'version'").fetchone()[0]
+
+    def _bump_version(self):
+        self._conn.execute("UPDATE state SET value = value + 1 WHERE key = 'version'")
+
+    def bump_version(self) -> None:
+        with self._lock, self._conn:
+            self._bump_version()
+
+    def load_all(self) -> List[Tuple[int, str, Dict[str, Any], bool]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT row, id, metadata, deleted FROM records ORDER BY row").fetchall()
+        return [(row, chunk_id, json.loads(metadata) if metadata else {}, bool(deleted)) for row, chunk_id, metadata, deleted in rows]
+
+    def insert(self, records: List[Tuple[int, str, str, Dict[str, Any]]]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records (row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (row, chunk_id, text, json.dumps(metadata or {}, ensure_ascii=False, default=str))
+                    for row, chunk_id, text, metadata in records
+                ]
+            )
+            self._bump_version()
+
+    def mark_deleted(self, ids: List[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE records SET deleted = 1 WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+            self._bump_version()
+
+    def get_texts(self, rows: List[int]) -> Dict[int, str]:
+        texts = {}
+        with self._lock:
+            for start in range(0, len(rows), 500):
+                batch = [int(row) for row in rows[start:start + 500]]
+                placeholders = ",".join("?" for _ in batch)
+                for row, text in self._conn.execute(
+                    f"SELECT row, text FROM records WHERE row IN ({placeholders})", batch
+                ).fetchall():
+                    texts[row] = text or ""
+        return texts
+
+class NumpyFlatBackend(VectorStoreBackend):
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.npy")
+        self.lock_path = os.path.join(directory, ".lock")
+        self.records = RecordStore(os.path.join(directory, "records.sqlite3"))
+
+        self._lock = threading.RLock()
+        self._version = None
+        self._load()
+        logger.info(f"Khởi tạo NumpyFlatBackend tại: {directory} ({self.count()} vectors)")
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        records = self.records.load_all()
+
+        self._row_by_id = {}
+        self._ids = []
+        self._metadatas = []
+        self._size = records[-1][0] + 1 if records else 0
+        self._alive = np.zeros(self._size, dtype=bool)
+
+        self._ids = [None] * self._size
+        self._metadatas = [{}] * self._size
+        for row, chunk_id, metadata, deleted in records:
+            self._ids[row] = chunk_id
+            self._metadatas[row] = metadata
+            self._row_by_id[chunk_id] = row
+            self._alive[row] = not deleted
+
+        self._vectors = np.load(self.vectors_path, mmap_mode="r") if os.path.exists(self.vectors_path) else None
+        self._filter_cache = {}
+        self._version = self.records.get_version()
+
+    def _refresh(self):
+        if self.records.get_version() != self._version:
+            self._load()
+
+    def _check_dimension(self, dim: int):
+        if self._vectors is not None and self._vectors.shape[1] != dim:
+            raise ValueError(f"Kích thước vector không khớp: {dim} != {self._vectors.shape[1]}")
+
+    def _on_vectors_added(self, start: int, vectors: np.ndarray):
+        pass
+
+    def _apply_local_write(self, expected_version: int) -> bool:
+        version = self.records.get_version()
+        if version != expected_version + 1:
+            self._load()
+            return False
+        self._version = version
+        self._filter_cache = {}
+        return True
+
+    def _store_vectors(self, start: int, vectors: np.ndarray):
+        self._check_dimension(vectors.shape[1])
+        self._vectors = write_rows(self.vectors_path, start, vectors, self._size)
+
+    def add(self, ids, texts, embeddings, metadatas) -> None:
+        with self._file_lock(), self._lock:
+            self._refresh()
+
+            selected = []
+            seen = set()
+            for i, chunk_id in enumerate(ids):
+                row = self._row_by_id.get(chunk_id)
+                if (row is not None and self._alive[row]) or chunk_id in seen:
+                    continue
+                seen.add(chunk_id)
+                selected.append(i)
+
+            if not selected:
+                return
+
+            vectors = normalize_vectors(np.asarray([embeddings[i] for i in selected], dtype=np.float32))
+            start = self._size
+            end = start + len(selected)
+
+            self._store_vectors(start, vectors)
+
+            new_records = [
+                (start + j, ids[i], texts[i], (metadatas[i] if metadatas else None) or {})
+                for j, i in enumerate(selected)
+            ]
+            version = self._version
+            self.records.insert(new_records)
+
+            if self._apply_local_write(version):
+                for row, chunk_id, _, metadata in new_records:
+                    previous = self._row_by_id.get(chunk_id)
+                    if previous is not None:
+                        self._alive[previous] = False
+                    self._row_by_id[chunk_id] = row
+                    self._ids.append(chunk_id)
+                    self._metadatas.append(metadata)
+                self._alive = np.concatenate([self._alive, np.ones(len(new_records), dtype=bool)])
+                self._size = end
+
+            self._on_vectors_added(start, vectors)
+
+    def delete(self, ids) -> None:
+        if not ids:
+            return
+
+        with self._file_lock(), self._lock:
+            self._refresh()
+            self._mark_deleted(ids)
+
+    def _mark_deleted(self, ids) -> None:
+        version = self._version
+        self.records.mark_deleted(list(ids))
+
+        if self._apply_local_write(version):
+            for chunk_id in ids:
+                row = self._row_by_id.get(chunk_id)
+                if row is not None:
+                    self._alive[row] = False
+
+    def delete_where(self, where) -> int:
+        if not where:
+            return 0
+
+        with self._file_lock(), self._lock:
+            self._refresh()
+            ids = [self._ids[row] for row in np.flatnonzero(self._candidate_mask(where))]
+            if ids:
+                self._mark_deleted(ids)
+            return len(ids)
+
+    def _filter_mask(self, where: Dict[str, Any]) -> np.ndarray:
+        key = json.dumps(where, sort_keys=True, default=str)
+        mask = self._filter_cache.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (matches_filter(metadata, where) for metadata in self._metadatas),
+                dtype=bool,
+                count=self._size
+            )
+            self._filter_cache[key] = mask
+        return mask
+
+    def _candidate_mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        mask = self._alive.copy()
+        if where:
+            mask &= self._filter_mask(where)
+        return mask
+
+    def _score(self, query: np.ndarray, mask: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self._vectors[:self._size] @ query
+        scores = np.where(mask, scores, -np.inf)
+        top = top_k_indices(scores, k)
+        top = top[np.isfinite(scores[top])]
+        return top, scores[top]
+
+    def _build_results(self, rows: np.ndarray, scores: np.ndarray,
+                       embeddings: Optional[np.ndarray] = None) -> List[SearchResult]:
+        texts = self.records.get_texts([int(row) for row in rows])
+        return [
+            SearchResult(
+                id=self._ids[row],
+                text=texts.get(int(row), ""),
+                metadata=dict(self._metadatas[row]),
+                score=float(score),
+                embedding=np.array(embeddings[i]) if embeddings is not None else None
+            )
+            for i, (row, score) in enumerate(zip(rows, scores))
+        ]
+
+    def _get_vectors(self, rows: np.ndarray) -> np.ndarray:
+        return np.asarray(self._vectors[rows])
+
+    def search(self, query_embedding, k, where=None, include_embeddings=False) -> List[SearchResult]:
+        with self._lock:
+            self._refresh()
+            if self._vectors is None or not self._size:
+                return []
+
+            query = normalize_vectors(np.asarray(query_embedding, dtype=np.float32))
+            rows, scores = self._score(query, self._candidate_mask(where), k)
+            embeddings = self._get_vectors(rows) if include_embeddings else None
+            return self._build_results(rows, scores, embeddings)
+
+    def get_embeddings(self, ids) -> Dict[str, np.ndarray]:
+        with self._lock:
+            self._refresh()
+            found = [
+                (chunk_id, self._row_by_id[chunk_id])
+                for chunk_id in ids
+                if chunk_id in self._row_by_id and self._alive[self._row_by_id[chunk_id]]
+            ]
+            if not found:
+                return {}
+
+            vectors = self._get_vectors(np.array([row for _, row in found], dtype=np.int64))
+            return {chunk_id: vector for (chunk_id, _), vector in zip(found, vectors)}
+
+    def count(self) -> int:
+        return int(self._alive.sum())
+
+    def memory_usage(self) -> Dict[str, int]:
+        dim = self._vectors.shape[1] if self._vectors is not None else 0
+        return {"vectors": self._size, "float_bytes": int(self._size * dim * 4)}
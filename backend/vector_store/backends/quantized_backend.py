@@ -0,0 +1,106 @@
+import os
+import logging
+from typing import Dict, Tuple
+import numpy as np
+from .base import top_k_indices
+from .numpy_backend import NumpyFlatBackend, write_rows
+
+logger = logging.getLogger(__name__)
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+class QuantizedFlatBackend(NumpyFlatBackend):
+
+    BLOCK_ROWS = 65536
+
+    def __init__(self, directory: str, quantization: str = "int8", rescore_factor: int = 10):
+        if quantization not in ("int8", "binary"):
+            raise ValueError(f"Kiểu lượng tử hoá không được hỗ trợ: {quantization}")
+
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self.codes_path = os.path.join(directory, f"codes_{quantization}.npy")
+        self.scales_path = os.path.join(directory, "scales_int8.npy")
+        self._codes = None
+        self._scales = None
+
+        super().__init__(directory)
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.quantization == "binary":
+            return np.packbits(vectors > 0, axis=1), None
+
+        scales = np.abs(vectors).max(axis=1)
+        scales[scales == 0] = 1.0
+        codes = np.round(vectors / scales[:, None] * 127).astype(np.int8)
+        return codes, (scales / 127).astype(np.float32)
+
+    def _load(self):
+        super()._load()
+
+        codes = np.load(self.codes_path, mmap_mode="r") if os.path.exists(self.codes_path) else None
+        scales = None
+        if self.quantization == "int8" and os.path.exists(self.scales_path):
+            scales = np.load(self.scales_path, mmap_mode="r")
+
+        if self._size and (codes is None or len(codes) < self._size
+                           or (self.quantization == "int8" and (scales is None or len(scales) < self._size))):
+            self._rebuild_codes()
+            return
+
+        self._codes = codes[:self._size] if codes is not None else None
+        self._scales = scales[:self._size] if scales is not None else None
+
+    def _rebuild_codes(self):
+        logger.info(f"Tạo lại mã lượng tử hoá {self.quantization} cho {self._size} vectors")
+
+        for start in range(0, self._size, self.BLOCK_ROWS):
+            block = np.asarray(self._vectors[start:min(start + self.BLOCK_ROWS, self._size)])
+            self._write_codes(start, block)
+
+    def _write_codes(self, start: int, vectors: np.ndarray):
+        codes, scales = self._quantize(vectors)
+        end = start + len(vectors)
+
+        self._codes = write_rows(self.codes_path, start, codes, start)[:end]
+        if scales is not None:
+            self._scales = write_rows(self.scales_path, start, scales, start)[:end]
+
+    def _on_vectors_added(self, start: int, vectors: np.ndarray):
+        self._write_codes(start, vectors)
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        scores = np.empty(self._size, dtype=np.float32)
+
+        if self.quantization == "binary":
+            query_bits = np.packbits(query > 0)
+            for start in range(0, self._size, self.BLOCK_ROWS):
+                block = self._codes[start:start + self.BLOCK_ROWS]
+                hamming = _POPCOUNT[np.bitwise_xor(block, query_bits)].sum(axis=1, dtype=np.int32)
+                scores[start:start + len(block)] = -hamming
+            return scores
+
+        for start in range(0, self._size, self.BLOCK_ROWS):
+            block = self._codes[start:start + self.BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = (block @ query) * self._scales[start:start + len(block)]
+        return scores
+
+    def _score(self, query: np.ndarray, mask: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        approximate = np.where(mask, self._approximate_scores(query), -np.inf)
+        candidates = top_k_indices(approximate, k * self.rescore_factor)
+        candidates = np.sort(candidates[np.isfinite(approximate[candidates])])
+
+        if not len(candidates):
+            return candidates, np.empty(0, dtype=np.float32)
+
+        exact = np.asarray(self._vectors[candidates]) @ query
+        order = top_k_indices(exact, k)
+        return candidates[order], exact[order]
+
+    def memory_usage(self) -> Dict[str, int]:
+        usage = super().memory_usage()
+        usage["code_bytes"] = (
+            int(self._codes.nbytes if self._codes is not None else 0)
+            + int(self._scales.nbytes if self._scales is not None else 0)
+        )
+        return usage
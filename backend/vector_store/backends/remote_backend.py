@@ -0,0 +1,130 @@
+import threading
+import logging
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from utils.ipc import connect_unix, recv_message, send_message
+from utils.fork_safety import register_after_fork
+from .base import SearchResult, VectorStoreBackend
+
+logger = logging.getLogger(__name__)
+
+def pack_vectors(vectors) -> Tuple[List[int], bytes]:
+    array = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+    if array.ndim == 1:
+        array = array.reshape(1, -1)
+    return list(array.shape), array.tobytes()
+
+def unpack_vectors(shape: List[int], payload: bytes) -> np.ndarray:
+    return np.frombuffer(payload, dtype=np.float32).reshape(shape)
+
+class RemoteBackend(VectorStoreBackend):
+
+    def __init__(self, socket_path: str, name: str = "default", timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.name = name
+        self.timeout = timeout
+        self._reset_connections()
+        register_after_fork(self._reset_connections)
+
+    def _reset_connections(self):
+        self._local = threading.local()
+
+    def _request(self, header: Dict[str, Any], payload: bytes = b"") -> Tuple[Dict[str, Any], bytes]:
+        header = dict(header, backend=self.name)
+
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = self._local.sock = connect_unix(self.socket_path, self.timeout)
+                send_message(sock, header, payload)
+                response, response_payload = recv_message(sock)
+                break
+            except (ConnectionError, OSError):
+                if sock is not None:
+                    sock.close()
+                self._local.sock = None
+                if attempt:
+                    raise
+
+        if response.get("status") != "ok":
+            raise RuntimeError(f"Lỗi từ retrieval server: {response.get('error')}")
+        return response, response_payload
+
+    def add(self, ids, texts, embeddings, metadatas) -> None:
+        if not ids:
+            return
+
+        shape, payload = pack_vectors(embeddings)
+        self._request(
+            {
+                "op": "add",
+                "ids": list(ids),
+                "texts": list(texts),
+                "metadatas": [(metadata or {}) for metadata in metadatas] if metadatas else [{} for _ in ids],
+                "shape": shape
+            },
+            payload
+        )
+
+    def delete(self, ids) -> None:
+        if ids:
+            self._request({"op": "delete", "ids": list(ids)})
+
+    def delete_where(self, where) -> int:
+        if not where:
+            return 0
+        return self._request({"op": "delete_where", "where": where})[0]["deleted"]
+
+    def search(self, query_embedding, k, where=None, include_embeddings=False) -> List[SearchResult]:
+        return self.search_batch([query_embedding], k, where, include_embeddings)[0]
+
+    def search_batch(self, query_embeddings, k, where=None, include_embeddings=False) -> List[List[SearchResult]]:
+        if not query_embeddings:
+            return []
+
+        shape, payload = pack_vectors(query_embeddings)
+        response, response_payload = self._request(
+            {"op": "search", "k": k, "where": where, "include_embeddings": include_embeddings, "shape": shape},
+            payload
+        )
+
+        embeddings = None
+        if include_embeddings and response.get("embedding_shape"):
+            embeddings = unpack_vectors(response["embedding_shape"], response_payload)
+
+        results = []
+        offset = 0
+        for query_results in response["results"]:
+            results.append([
+                SearchResult(
+                    id=item["id"],
+                    text=item["text"],
+                    metadata=item["metadata"],
+                    score=item["score"],
+                    embedding=np.array(embeddings[offset + j]) if embeddings is not None else None
+                )
+                for j, item in enumerate(query_results)
+            ])
+            offset += len(query_results)
+        return results
+
+    def get_embeddings(self, ids) -> Dict[str, np.ndarray]:
+        if not ids:
+            return {}
+
+        response, payload = self._request({"op": "get_embeddings", "ids": list(ids)})
+        if not response["ids"]:
+            return {}
+
+        vectors = unpack_vectors(response["shape"], payload)
+        return {chunk_id: np.array(vector) for chunk_id, vector in zip(response["ids"], vectors)}
+
+    def count(self) -> int:
+        return self._request({"op": "count"})[0]["count"]
+
+    def shard_counts(self) -> Dict[str, int]:
+        return self._request({"op": "shard_counts"})[0]["shard_counts"]
+
+    def stats(self) -> Dict[str, Any]:
+        return self._request({"op": "stats"})[0]["stats"]
@@ -0,0 +1,160 @@
+import hashlib
+import heapq
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import numpy as np
+from utils.metrics import metrics
+from utils.fork_safety import register_after_fork
+from .base import SearchResult, VectorStoreBackend
+
+logger = logging.getLogger(__name__)
+
+def hash_shard(chunk_id: str, num_shards: int) -> str:
+    digest = hashlib.blake2b(str(chunk_id).encode("utf-8"), digest_size=8).digest()
+    return str(int.from_bytes(digest, "big") % num_shards)
+
+class ShardedBackend(VectorStoreBackend):
+
+    def __init__(self, shards: Dict[str, VectorStoreBackend], shard_by: str = "category",
+                 shard_key: str = "category", default_shard: Optional[str] = None, max_workers: Optional[int] = None):
+        if shard_by not in ("category", "hash"):
+            raise ValueError(f"Kiểu phân mảnh không được hỗ trợ: {shard_by}")
+        if not shards:
+            raise ValueError("Cần ít nhất một shard")
+
+        self.shards = shards
+        self.shard_by = shard_by
+        self.shard_key = shard_key
+        self.default_shard = default_shard or next(iter(shards))
+        self.max_workers = max_workers or len(shards)
+        self._create_executor()
+        register_after_fork(self._create_executor)
+
+        logger.info(f"Khởi tạo ShardedBackend ({shard_by}) với {len(shards)} shards: {', '.join(shards)}")
+
+    def _create_executor(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="shard-search")
+
+    def _shard_for(self, chunk_id: str, metadata: Optional[Dict[str, Any]]) -> str:
+        if self.shard_by == "hash":
+            return hash_shard(chunk_id, len(self.shards))
+
+        value = (metadata or {}).get(self.shard_key)
+        return value if value in self.shards else self.default_shard
+
+    def _shards_for_filter(self, where: Optional[Dict[str, Any]]) -> List[str]:
+        if self.shard_by != "category" or not where or self.shard_key not in where:
+            return list(self.shards)
+
+        condition = where[self.shard_key]
+        if isinstance(condition, dict):
+            if "$eq" in condition:
+                values = [condition["$eq"]]
+            elif "$in" in condition:
+                values = list(condition["$in"])
+            else:
+                return list(self.shards)
+        else:
+            values = [condition]
+
+        names = {value if value in self.shards else self.default_shard for value in values}
+        return [name for name in self.shards if name in names]
+
+    def _group_by_shard(self, ids) -> Dict[str, List[str]]:
+        if self.shard_by != "hash":
+            return {name: list(ids) for name in self.shards}
+
+        groups = {}
+        for chunk_id in ids:
+            groups.setdefault(hash_shard(chunk_id, len(self.shards)), []).append(chunk_id)
+        return groups
+
+    def add(self, ids, texts, embeddings, metadatas) -> None:
+        groups = {}
+        for i, chunk_id in enumerate(ids):
+            metadata = metadatas[i] if metadatas else None
+            groups.setdefault(self._shard_for(chunk_id, metadata), []).append(i)
+
+        for name, indices in groups.items():
+            self.shards[name].add(
+                [ids[i] for i in indices],
+                [texts[i] for i in indices],
+                [embeddings[i] for i in indices],
+                [(metadatas[i] if metadatas else None) or {} for i in indices]
+            )
+
+    def delete(self, ids) -> None:
+        if not ids:
+            return
+
+        for name, shard_ids in self._group_by_shard(ids).items():
+            self.shards[name].delete(shard_ids)
+
+    def delete_where(self, where) -> int:
+        if not where:
+            return 0
+        return sum(self.shards[name].delete_where(where) for name in self._shards_for_filter(where))
+
+    def _timed_search_batch(self, name: str, query_embeddings, k, where, include_embeddings) -> List[List[SearchResult]]:
+        start_time = time.perf_counter()
+        try:
+            return self.shards[name].search_batch(query_embeddings, k, where, include_embeddings)
+        finally:
+            metrics.observe(
+                "vector_shard_search_latency_ms",
+                (time.perf_counter() - start_time) * 1000,
+                labels={"shard": name}
+            )
+
+    def search(self, query_embedding, k, where=None, include_embeddings=False) -> List[SearchResult]:
+        return self.search_batch([query_embedding], k, where, include_embeddings)[0]
+
+    def search_batch(self, query_embeddings, k, where=None, include_embeddings=False) -> List[List[SearchResult]]:
+        if not query_embeddings:
+            return []
+
+        names = self._shards_for_filter(where)
+        if len(names) == 1:
+            return self._timed_search_batch(names[0], query_embeddings, k, where, include_embeddings)
+
+        futures = [
+            self._executor.submit(self._timed_search_batch, name, query_embeddings, k, where, include_embeddings)
+            for name in names
+        ]
+
+        per_shard = []
+        for name, future in zip(names, futures):
+            try:
+                per_shard.append(future.result())
+            except Exception as e:
+                metrics.increment("vector_shard_search_errors", labels={"shard": name})
+                logger.error(f"Lỗi khi tìm kiếm trên shard {name}: {str(e)}")
+
+        if not per_shard:
+            raise RuntimeError("Tìm kiếm thất bại trên tất cả các shard")
+
+        return [
+            heapq.nlargest(k, (result for results in per_shard for result in results[i]), key=lambda result: result.score)
+            for i in range(len(query_embeddings))
+        ]
+
+    def get_embeddings(self, ids) -> Dict[str, np.ndarray]:
+        found = {}
+        for name, shard_ids in self._group_by_shard(ids).items():
+            missing = [chunk_id for chunk_id in shard_ids if chunk_id not in found]
+            if missing:
+                found.update(self.shards[name].get_embeddings(missing))
+        return found
+
+    def count(self) -> int:
+        return sum(shard.count() for shard in self.shards.values())
+
+    def shard_counts(self) -> Dict[str, int]:
+        return {name: shard.count() for name, shard in self.shards.items()}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        for shard in self.shards.values():
+            shard.close()
@@ -1,97 +1,491 @@
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-import chromadb
+from langchain.schema import Document
+from .docstore import ParentDocstore
+from .backends.factory import BackendFactory
+from .backends.remote_backend import RemoteBackend
+from .retrieval_cache import RetrievalCache
+from .mmr import maximal_marginal_relevance
+from utils.text_processor import detect_language
+from services.embedding_cache import load_embeddings
+import functools
 import logging
+import numpy as np
 import os
-import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
 class ChromaManager:
-    def __init__(self, persist_directory, embedding_model="sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(self, persist_directory, embedding_model="sentence-transformers/all-MiniLM-L6-v2",
+                 chunk_size=512, chunk_overlap=50, length_unit="tokens", parent_chunk_size=0,
+                 backend="chroma", quantization="none", rescore_factor=10, ivf_nlist=1024, ivf_nprobe=8,
+                 shard_by="none", num_shards=4, shard_categories=("general", "technical", "policy", "faq"),
+                 language_models=None, language_fallback=True,
+                 retrieval_cache_size=0, retrieval_cache_disk_size=10000, retrieval_cache_ttl=0,
+                 embedding_cache_size=2048, embedding_backend="local", embedding_server_socket=None, embedding_runtime="torch",
+                 store_mode="local", retrieval_server_socket=None):
         try:
-            self.embeddings = HuggingFaceEmbeddings(model_name=embedding_model)
-            
-            if os.path.exists(persist_directory):
-                try:
-                    self.client = chromadb.PersistentClient(path=persist_directory)
-                    
-                    self.vector_store = Chroma(
-                        persist_directory=persist_directory,
-                        embedding_function=self.embeddings,
-                        client=self.client
-                    )
-                except Exception as e:
-                    logger.warning(f"Lỗi khi kết nối với ChromaDB hiện tại: {str(e)}")
-                    import shutil
-                    backup_dir = f"{persist_directory}_backup_{int(time.time())}"
-                    logger.info(f"Tạo bản sao lưu ChromaDB tại: {backup_dir}")
-                    shutil.move(persist_directory, backup_dir)
-                    os.makedirs(persist_directory, exist_ok=True)
-                    
-                    self.client = chromadb.PersistentClient(path=persist_directory)
-                    self.vector_store = Chroma(
-                        persist_directory=persist_directory,
-                        embedding_function=self.embeddings,
-                        client=self.client
+            self.embedding_cache_size = embedding_cache_size
+            self.embedding_backend = embedding_backend
+            self.embedding_server_socket = embedding_server_socket
+            self.embedding_runtime = embedding_runtime
+            self.embeddings = self._load_embeddings(embedding_model)
+            
+            self.persist_directory = persist_directory
+            self.backend_type = backend
+            self.store_mode = store_mode
+            self.retrieval_server_socket = retrieval_server_socket
+            self.backend_factory = None
+            if store_mode == "local":
+                self.backend_factory = BackendFactory(
+                    backend,
+                    persist_directory,
+                    quantization=quantization,
+                    rescore_factor=rescore_factor,
+                    ivf_nlist=ivf_nlist,
+                    ivf_nprobe=ivf_nprobe,
+                    shard_by=shard_by,
+                    num_shards=num_shards,
+                    shard_categories=shard_categories
+                )
+            elif store_mode != "server":
+                raise ValueError(f"Chế độ vector store không được hỗ trợ: {store_mode}")
+            
+            self.language_fallback = language_fallback
+            self.partitions = {}
+            if language_models:
+                for language, model_name in language_models.items():
+                    self.partitions[language] = (
+                        self._load_embeddings(model_name or embedding_model),
+                        self._create_backend(language)
                     )
+                self.default_language = next(iter(self.partitions))
+                self.backend = self.partitions[self.default_language][1]
             else:
-                os.makedirs(persist_directory, exist_ok=True)
-                self.client = chromadb.PersistentClient(path=persist_directory)
-                self.vector_store = Chroma(
-                    persist_directory=persist_directory,
-                    embedding_function=self.embeddings,
-                    client=self.client
+                self.default_language = None
+                self.backend = self._create_backend()
+            
+            self.corpus_version = 0
+            self.retrieval_cache = None
+            if retrieval_cache_size:
+                self.retrieval_cache = RetrievalCache(
+                    os.path.join(persist_directory, "retrieval_cache.sqlite3"),
+                    capacity=retrieval_cache_size,
+                    disk_capacity=retrieval_cache_disk_size,
+                    ttl=retrieval_cache_ttl
                 )
             
-            self.text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=512,
-                chunk_overlap=50,
-                length_function=len,
-                is_separator_regex=False
-            )
+            self.length_unit = length_unit
+            self.length_functions = {None: (len, None)}
+            self.token_counter = None
+            
+            if length_unit == "tokens":
+                by_model = {}
+                models = [(None, self.embeddings, embedding_model)] + [
+                    (language, self.partitions[language][0], model_name or embedding_model)
+                    for language, model_name in (language_models or {}).items()
+                ]
+                for language, embeddings, model_name in models:
+                    if model_name not in by_model:
+                        count_tokens, max_chunk_size = self._create_token_length_function(embeddings, model_name)
+                        by_model[model_name] = (
+                            count_tokens, functools.lru_cache(maxsize=65536)(count_tokens), max_chunk_size
+                        )
+                    count_tokens, cached_count_tokens, max_chunk_size = by_model[model_name]
+                    self.length_functions[language] = (cached_count_tokens, max_chunk_size)
+                    if language is None:
+                        self.token_counter = count_tokens
+            
+            self.length_function, self.max_chunk_size = self.length_functions[None]
             
-            logger.info(f"ChromaManager khởi tạo thành công với mô hình: {embedding_model}")
+            self.parent_chunk_size = parent_chunk_size
+            self.docstore = None
+            if parent_chunk_size:
+                self.docstore = ParentDocstore(os.path.join(persist_directory, "parents.sqlite3"))
+            
+            self.configure_splitter(chunk_size, chunk_overlap)
+            
+            logger.info(
+                f"ChromaManager khởi tạo thành công với mô hình: {embedding_model} "
+                f"(chunk_size={self.chunk_size} {length_unit})"
+            )
             
         except Exception as e:
             logger.error(f"Lỗi khi khởi tạo ChromaManager: {str(e)}")
             raise
         
-    def add_documents(self, documents, metadatas=None):
+    def _load_embeddings(self, model_name):
+        return load_embeddings(
+            model_name,
+            cache_size=self.embedding_cache_size,
+            backend=self.embedding_backend,
+            server_socket=self.embedding_server_socket,
+            runtime=self.embedding_runtime
+        )
+        
+    @property
+    def client(self):
+        return self.backend_factory.client if self.backend_factory else None
+        
+    def _create_backend(self, partition=None):
+        if self.backend_factory is None:
+            return RemoteBackend(self.retrieval_server_socket, name=partition or "default")
+        return self.backend_factory.create(partition)
+        
+    def _create_token_length_function(self, embeddings, embedding_model):
+        embeddings = getattr(embeddings, "embeddings", embeddings)
+        client = getattr(embeddings, "_client", None) or getattr(embeddings, "client", None) or embeddings
+        tokenizer = getattr(client, "tokenizer", None)
+        max_seq_length = getattr(client, "max_seq_length", None)
+        
+        if tokenizer is None:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(embedding_model, use_fast=True)
+            max_seq_length = tokenizer.model_max_length
+        
+        def count_tokens(text):
+            return len(tokenizer.encode(text, add_special_tokens=False))
+        
+        max_chunk_size = None
+        if max_seq_length and max_seq_length < 100000:
+            max_chunk_size = max_seq_length - tokenizer.num_special_tokens_to_add()
+        
+        return count_tokens, max_chunk_size
+        
+    def _create_splitters(self, chunk_size, chunk_overlap, length_function, max_chunk_size):
+        if max_chunk_size:
+            chunk_size = min(chunk_size, max_chunk_size)
+        chunk_overlap = min(chunk_overlap, chunk_size // 2)
+        
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=length_function,
+            is_separator_regex=False
+        )
+        
+        parent_splitter = None
+        if self.parent_chunk_size and self.parent_chunk_size > chunk_size:
+            parent_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.parent_chunk_size,
+                chunk_overlap=0,
+                length_function=length_function,
+                is_separator_regex=False
+            )
+        
+        return chunk_size, chunk_overlap, text_splitter, parent_splitter
+        
+    def configure_splitter(self, chunk_size, chunk_overlap):
+        self.splitters = {None: self._create_splitters(chunk_size, chunk_overlap, *self.length_functions[None])}
+        for language in self.partitions:
+            self.splitters[language] = self._create_splitters(
+                chunk_size, chunk_overlap, *self.length_functions.get(language, self.length_functions[None])
+            )
+        
+        self.chunk_size, self.chunk_overlap, self.text_splitter, self.parent_splitter = self.splitters[None]
+        
+    def add_documents(self, documents, metadatas=None, ids=None):
         try:
             texts = [doc.page_content for doc in documents]
             metadata_list = [doc.metadata for doc in documents] if not metadatas else metadatas
+            ids = ids or [str(uuid.uuid4()) for _ in texts]
+            
+            if not self.partitions:
+                embeddings = self.embeddings.embed_documents(texts)
+                self.backend.add(ids, texts, embeddings, metadata_list)
+            else:
+                self._add_partitioned(ids, texts, metadata_list)
+            
+            self.invalidate_cache()
             
-            result = self.vector_store.add_texts(texts=texts, metadatas=metadata_list)
-            logger.info(f"Đã thêm {len(texts)} tài liệu vào ChromaDB")
-            return result
+            logger.info(f"Đã thêm {len(texts)} tài liệu vào vector store ({self.backend_type})")
+            return ids
         except Exception as e:
             logger.error(f"Lỗi khi thêm tài liệu: {str(e)}")
             raise
         
+    def _resolve_language(self, text, language=None):
+        if language in self.partitions:
+            return language
+        
+        language = detect_language(text)
+        return language if language in self.partitions else self.default_language
+        
+    def get_embeddings_model(self, text, language=None):
+        if not self.partitions:
+            return self.embeddings
+        return self.partitions[self._resolve_language(text, language)][0]
+        
+    def _add_partitioned(self, ids, texts, metadata_list):
+        groups = {}
+        for i, text in enumerate(texts):
+            metadata = dict(metadata_list[i] or {}) if metadata_list else {}
+            language = self._resolve_language(text, metadata.get("language"))
+            metadata["language"] = language
+            groups.setdefault(language, []).append((ids[i], text, metadata))
+        
+        for language, records in groups.items():
+            embeddings_model, backend = self.partitions[language]
+            group_texts = [text for _, text, _ in records]
+            backend.add(
+                [chunk_id for chunk_id, _, _ in records],
+                group_texts,
+                embeddings_model.embed_documents(group_texts),
+                [metadata for _, _, metadata in records]
+            )
+            logger.debug(f"Đã thêm {len(records)} chunks vào phân vùng ngôn ngữ '{language}'")
+        
+    def _backends(self):
+        if not self.partitions:
+            return [self.backend]
+        return [backend for _, backend in self.partitions.values()]
+        
+    def delete_documents(self, ids):
+        try:
+            if not ids:
+                return
+            for backend in self._backends():
+                backend.delete(ids)
+            self.invalidate_cache()
+            logger.info(f"Đã xóa {len(ids)} chunks khỏi vector store ({self.backend_type})")
+        except Exception as e:
+            logger.error(f"Lỗi khi xóa chunks: {str(e)}")
+            raise
+        
+    def delete_documents_where(self, where):
+        try:
+            deleted = sum(backend.delete_where(where) for backend in self._backends())
+            if deleted:
+                self.invalidate_cache()
+            logger.info(f"Đã xóa {deleted} chunks khớp bộ lọc {where} khỏi vector store ({self.backend_type})")
+            return deleted
+        except Exception as e:
+            logger.error(f"Lỗi khi xóa chunks theo bộ lọc: {str(e)}")
+            raise
+        
     def chunk_document(self, text, metadata=None):
         try:
-            chunks = self.text_splitter.create_documents([text], [metadata] if metadata else None)
+            language = None
+            if self.partitions:
+                language = self._resolve_language(text, (metadata or {}).get("language"))
+                metadata = dict(metadata or {}, language=language)
+            _, _, text_splitter, parent_splitter = self.splitters[language]
+            
+            if parent_splitter is None or self.docstore is None:
+                chunks = text_splitter.create_documents([text], [metadata] if metadata else None)
+            else:
+                chunks = self._chunk_with_parents(text, metadata, text_splitter, parent_splitter)
+                
             logger.debug(f"Đã chia tài liệu thành {len(chunks)} chunks")
             return chunks
         except Exception as e:
             logger.error(f"Lỗi khi chia tài liệu thành chunks: {str(e)}")
             raise
         
-    def similarity_search(self, query, k=5):
+    def _chunk_with_parents(self, text, metadata, text_splitter, parent_splitter):
+        parents = parent_splitter.create_documents([text], [metadata] if metadata else None)
+        
+        chunks = []
+        records = []
+        for parent in parents:
+            parent_id = uuid.uuid4().hex
+            records.append((parent_id, parent.metadata.get("id"), parent.page_content, parent.metadata))
+            
+            child_metadata = dict(parent.metadata)
+            child_metadata["parent_id"] = parent_id
+            chunks.extend(text_splitter.create_documents([parent.page_content], [child_metadata]))
+            
+        self.docstore.add(records)
+        return chunks
+        
+    def get_parent_documents(self, documents):
+        if self.docstore is None:
+            return documents
+        
+        try:
+            parent_ids = [doc.metadata.get("parent_id") for doc in documents if doc.metadata.get("parent_id")]
+            parents = self.docstore.get(parent_ids) if parent_ids else {}
+        except Exception as e:
+            logger.error(f"Lỗi khi lấy parent chunks: {str(e)}")
+            return documents
+        
+        results = []
+        seen = set()
+        for doc in documents:
+            parent_id = doc.metadata.get("parent_id")
+            
+            if parent_id in parents:
+                if parent_id in seen:
+                    continue
+                seen.add(parent_id)
+                content, parent_metadata = parents[parent_id]
+                results.append(Document(page_content=content, metadata=parent_metadata))
+            else:
+                results.append(doc)
+                
+        logger.debug(f"Gộp {len(documents)} child chunks thành {len(results)} đoạn ngữ cảnh")
+        return results
+        
+    def delete_parents(self, document_id):
+        if self.docstore is None:
+            return 0
+        return self.docstore.delete_document(document_id)
+        
+    def _to_document(self, result):
+        metadata = dict(result.metadata)
+        metadata["chunk_id"] = result.id
+        return Document(page_content=result.text, metadata=metadata)
+        
+    def _search_partitions(self, query, k, filter=None, language=None, include_embeddings=False):
+        language = self._resolve_language(query, language)
+        order = [language]
+        if self.language_fallback:
+            order.extend(other for other in self.partitions if other != language)
+        
+        results = []
+        for partition in order:
+            if len(results) >= k:
+                break
+            if partition != language:
+                logger.debug(f"Tìm kiếm dự phòng trên phân vùng '{partition}' cho truy vấn '{query[:50]}...'")
+            
+            embeddings_model, backend = self.partitions[partition]
+            results.extend(backend.search(
+                embeddings_model.embed_query(query), k - len(results), where=filter, include_embeddings=include_embeddings
+            ))
+        return results
+        
+    def _search(self, query, k, filter=None, language=None, include_embeddings=False):
+        if not self.partitions:
+            query_embedding = self.embeddings.embed_query(query)
+            return self.backend.search(query_embedding, k, where=filter, include_embeddings=include_embeddings)
+        return self._search_partitions(query, k, filter, language, include_embeddings)
+        
+    def invalidate_cache(self):
+        self.corpus_version += 1
+        if self.retrieval_cache is not None:
+            version = self.retrieval_cache.bump_version()
+            logger.debug(f"Cập nhật phiên bản chỉ mục: {version}")
+        
+    def get_corpus_version(self):
+        if self.retrieval_cache is not None:
+            return self.retrieval_cache.get_version()
+        return self.corpus_version
+        
+    def similarity_search_with_score(self, query, k=5, filter=None, language=None):
         try:
-            results = self.vector_store.similarity_search(query, k=k)
+            cache_key = None
+            if self.retrieval_cache is not None:
+                version = self.retrieval_cache.get_version()
+                cache_key = self.retrieval_cache.make_key(query, k, filter, language)
+                cached = self.retrieval_cache.get(cache_key, version)
+                if cached is not None:
+                    return [
+                        (Document(page_content=text, metadata=dict(metadata)), score)
+                        for text, metadata, score in cached
+                    ]
+            
+            results = self._search(query, k, filter, language)
+            
             logger.debug(f"Tìm kiếm tương tự cho '{query[:50]}...' - Tìm thấy {len(results)} kết quả")
-            return results
+            documents = [(self._to_document(result), result.score) for result in results]
+            
+            if cache_key is not None:
+                self.retrieval_cache.set(
+                    cache_key, version,
+                    [(doc.page_content, dict(doc.metadata), score) for doc, score in documents]
+                )
+            return documents
         except Exception as e:
             logger.error(f"Lỗi khi tìm kiếm tương tự: {str(e)}")
             raise
         
-    def hybrid_search(self, query, k=5):
-        return self.similarity_search(query, k)
+    def _with_embeddings(self, results):
+        missing = [result.id for result in results if result.embedding is None]
+        found = self.get_embeddings(missing) if missing else {}
+        
+        complete = []
+        for result in results:
+            if result.embedding is None and result.id in found:
+                result = result._replace(embedding=found[result.id])
+            if result.embedding is not None:
+                complete.append(result)
+        return complete
+        
+    def max_marginal_relevance_search_with_score(self, query, k=5, fetch_k=20, lambda_mult=0.5, filter=None,
+                                                 language=None, score_threshold=None):
+        try:
+            results = self._search(query, max(k, fetch_k), filter, language, include_embeddings=True)
+            if score_threshold is not None:
+                results = [result for result in results if result.score >= score_threshold]
+            
+            candidates, fallback = results, []
+            if self.partitions:
+                language = self._resolve_language(query, language)
+                candidates = [result for result in results if result.metadata.get("language") == language]
+                fallback = [result for result in results if result.metadata.get("language") != language]
+            
+            candidates = self._with_embeddings(candidates)
+            selected = []
+            if candidates:
+                order = maximal_marginal_relevance(
+                    [result.score for result in candidates],
+                    np.stack([np.asarray(result.embedding, dtype=np.float32) for result in candidates]),
+                    k,
+                    lambda_mult
+                )
+                selected = [candidates[i] for i in order]
+            selected.extend(fallback[:k - len(selected)])
+            
+            logger.debug(f"Tìm kiếm MMR cho '{query[:50]}...' - Chọn {len(selected)}/{len(results)} ứng viên (lambda={lambda_mult})")
+            return [(self._to_document(result), result.score) for result in selected]
+        except Exception as e:
+            logger.error(f"Lỗi khi tìm kiếm MMR: {str(e)}")
+            raise
+        
+    def max_marginal_relevance_search(self, query, k=5, fetch_k=20, lambda_mult=0.5, filter=None, language=None):
+        return [
+            doc for doc, _ in self.max_marginal_relevance_search_with_score(
+                query, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter, language=language
+            )
+        ]
+        
+    def similarity_search_with_relevance_scores(self, query, k=5, filter=None, language=None, score_threshold=None,
+                                                mmr_lambda=None, fetch_k=20):
+        if mmr_lambda is None:
+            scored = self.similarity_search_with_score(query, k=k, filter=filter, language=language)
+        else:
+            scored = self.max_marginal_relevance_search_with_score(
+                query, k=k, fetch_k=fetch_k, lambda_mult=mmr_lambda, filter=filter, language=language,
+                score_threshold=score_threshold
+            )
+        
+        results = [(doc, min(1.0, max(0.0, float(score)))) for doc, score in scored]
+        if score_threshold is None:
+            return results
+        
+        relevant = [(doc, score) for doc, score in results if score >= score_threshold]
+        if len(relevant) < len(results):
+            logger.debug(f"Loại {len(results) - len(relevant)} kết quả dưới ngưỡng liên quan {score_threshold}")
+        return relevant
+        
+    def similarity_search(self, query, k=5, filter=None, language=None):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter, language=language)]
+        
+    def get_embeddings(self, ids):
+        found = {}
+        for backend in self._backends():
+            found.update(backend.get_embeddings([chunk_id for chunk_id in ids if chunk_id not in found]))
+        return found
+        
+    def hybrid_search(self, query, k=5, language=None):
+        return self.similarity_search(query, k, language=language)
         
     def delete_collection(self, collection_name="langchain"):
+        if self.client is None:
+            logger.warning(f"Backend {self.backend_type} không hỗ trợ xóa collection")
+            return
+        
         try:
             self.client.delete_collection(collection_name)
             logger.info(f"Đã xóa collection: {collection_name}")
@@ -100,6 +494,9 @@ class ChromaManager:
             raise
         
     def list_collections(self):
+        if self.client is None:
+            return []
+        
         try:
             collections = self.client.list_collections()
             logger.debug(f"Danh sách collections: {collections}")
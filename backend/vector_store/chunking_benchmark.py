@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import numpy as np
+
+def _distribution(lengths: Sequence[int]) -> Dict[str, float]:
+    if not lengths:
+        return {}
+    values = np.asarray(lengths, dtype=np.float64)
+    return {
+        "min": int(values.min()),
+        "p50": round(float(np.percentile(values, 50)), 1),
+        "p95": round(float(np.percentile(values, 95)), 1),
+        "max": int(values.max()),
+        "mean": round(float(values.mean()), 1),
+        "std": round(float(values.std()), 1)
+    }
+
+def load_texts(paths: Sequence[str], loaders: Dict[str, Any]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in sorted(names)
+            )
+        else:
+            files.append(path)
+
+    texts = []
+    for file_path in files:
+        loader = loaders.get(os.path.splitext(file_path)[1].lower())
+        if loader is not None:
+            texts.extend(doc.page_content for doc in loader(file_path).lazy_load())
+    return texts
+
+def benchmark_unit(manager, texts: Sequence[str], count_tokens: Callable[[str], int],
+                   max_tokens: Optional[int] = None, repeats: int = 3) -> Dict[str, Any]:
+    timings = []
+    for _ in range(max(1, repeats)):
+        start = time.perf_counter()
+        chunks = [chunk for text in texts for chunk in manager.chunk_document(text)]
+        timings.append(time.perf_counter() - start)
+
+    seconds = timings[0]
+    token_lengths = [count_tokens(chunk.page_content) for chunk in chunks]
+    report = {
+        "chunk_size": manager.chunk_size,
+        "chunk_overlap": manager.chunk_overlap,
+        "chunks": len(chunks),
+        "seconds": round(seconds, 3),
+        "warm_seconds": round(min(timings[1:]), 3) if len(timings) > 1 else None,
+        "chunks_per_s": round(len(chunks) / seconds, 1) if seconds else None,
+        "chars_per_s": round(sum(len(text) for text in texts) / seconds, 1) if seconds else None,
+        "chars": _distribution([len(chunk.page_content) for chunk in chunks]),
+        "tokens": _distribution(token_lengths)
+    }
+    if max_tokens:
+        report["over_model_limit"] = sum(length > max_tokens for length in token_lengths)
+    return report
+
+def benchmark(paths: Sequence[str], embedding_model: str, chars_chunk_size: int, tokens_chunk_size: int,
+              chunk_overlap: int, repeats: int = 3) -> Dict[str, Any]:
+    from vector_store.chroma_client import ChromaManager
+    from services.document_service import DocumentService
+
+    report = {"model": embedding_model}
+    with tempfile.TemporaryDirectory() as persist_directory:
+        managers = {
+            unit: ChromaManager(
+                os.path.join(persist_directory, unit),
+                embedding_model=embedding_model,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_unit=unit,
+                parent_chunk_size=0,
+                backend="numpy"
+            )
+            for unit, chunk_size in (("chars", chars_chunk_size), ("tokens", tokens_chunk_size))
+        }
+        count_tokens = managers["tokens"].token_counter
+        max_tokens = managers["tokens"].max_chunk_size
+
+        texts = load_texts(paths, DocumentService(managers["chars"]).loaders)
+        report["documents"] = len(texts)
+        report["total_chars"] = sum(len(text) for text in texts)
+        report["model_max_tokens"] = max_tokens
+
+        for unit, manager in managers.items():
+            report[unit] = benchmark_unit(manager, texts, count_tokens, max_tokens, repeats)
+
+    return report
+
+def main(argv=None):
+    from config.settings import Config
+
+    parser = argparse.ArgumentParser(description="Compare chunking throughput and chunk lengths for chars vs tokens")
+    parser.add_argument("paths", nargs="+", help="Files or directories to chunk (.txt, .pdf, .docx, .csv)")
+    parser.add_argument("--model", default=Config.EMBEDDING_MODEL)
+    parser.add_argument("--chars-chunk-size", type=int, default=2000)
+    parser.add_argument("--tokens-chunk-size", type=int, default=Config.CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=Config.CHUNK_OVERLAP)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = benchmark(
+        args.paths, args.model, args.chars_chunk_size, args.tokens_chunk_size, args.chunk_overlap, args.repeats
+    )
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    sys.exit(main())
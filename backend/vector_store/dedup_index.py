@@ -0,0 +1,128 @@
+import sqlite3
+import threading
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from utils.fork_safety import register_after_fork
+
+logger = logging.getLogger(__name__)
+
+class ContentHashIndex:
+
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self._connect()
+        register_after_fork(self._connect)
+        self._create_tables()
+        logger.info(f"Khởi tạo ContentHashIndex tại: {db_path}")
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS file_hashes (
+                    file_hash TEXT PRIMARY KEY,
+                    document_id TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunk_sources (
+                    chunk_id TEXT NOT NULL,
+                    document_id TEXT NOT NULL,
+                    PRIMARY KEY (chunk_id, document_id)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chunk_sources_document ON chunk_sources (document_id)"
+            )
+
+    def get_document_by_file_hash(self, file_hash: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT document_id FROM file_hashes WHERE file_hash = ?",
+                (file_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def register_file(self, file_hash: str, document_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (file_hash, document_id) VALUES (?, ?)",
+                (file_hash, document_id)
+            )
+
+    def get_existing_chunks(self, chunk_ids: Iterable[str]) -> Set[str]:
+        chunk_ids = list(set(chunk_ids))
+        existing = set()
+
+        with self._lock:
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                placeholders = ",".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT DISTINCT chunk_id FROM chunk_sources WHERE chunk_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+                existing.update(row[0] for row in rows)
+
+        return existing
+
+    def add_chunk_sources(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chunk_sources (chunk_id, document_id) VALUES (?, ?)",
+                list(pairs)
+            )
+
+    def get_chunk_sources(self, chunk_ids: Iterable[str]) -> Dict[str, List[str]]:
+        sources = {}
+        chunk_ids = list(set(chunk_ids))
+
+        with self._lock:
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                placeholders = ",".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT chunk_id, document_id FROM chunk_sources WHERE chunk_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for chunk_id, document_id in rows:
+                    sources.setdefault(chunk_id, []).append(document_id)
+
+        return sources
+
+    def remove_document(self, document_id: str) -> List[str]:
+        with self._lock, self._conn:
+            chunk_ids = [
+                row[0] for row in self._conn.execute(
+                    "SELECT chunk_id FROM chunk_sources WHERE document_id = ?",
+                    (document_id,)
+                ).fetchall()
+            ]
+
+            self._conn.execute("DELETE FROM chunk_sources WHERE document_id = ?", (document_id,))
+            self._conn.execute("DELETE FROM file_hashes WHERE document_id = ?", (document_id,))
+
+            orphaned = []
+            for chunk_id in chunk_ids:
+                remaining = self._conn.execute(
+                    "SELECT 1 FROM chunk_sources WHERE chunk_id = ? LIMIT 1",
+                    (chunk_id,)
+                ).fetchone()
+                if not remaining:
+                    orphaned.append(chunk_id)
+
+        logger.debug(f"Xoá tài liệu {document_id} khỏi chỉ mục hash: {len(orphaned)} chunk không còn nguồn")
+        return orphaned
@@ -0,0 +1,73 @@
+import sqlite3
+import threading
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from utils.fork_safety import register_after_fork
+
+logger = logging.getLogger(__name__)
+
+class ParentDocstore:
+
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self._connect()
+        register_after_fork(self._connect)
+        self._create_tables()
+        logger.info(f"Khởi tạo ParentDocstore tại: {db_path}")
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS parents (
+                    parent_id TEXT PRIMARY KEY,
+                    document_id TEXT,
+                    content TEXT NOT NULL,
+                    metadata TEXT
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_parents_document ON parents (document_id)")
+
+    def add(self, records: Iterable[Tuple[str, Optional[str], str, Dict[str, Any]]]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO parents (parent_id, document_id, content, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (parent_id, document_id, content, json.dumps(metadata or {}, ensure_ascii=False, default=str))
+                    for parent_id, document_id, content, metadata in records
+                ]
+            )
+
+    def get(self, parent_ids: List[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        parent_ids = list(set(parent_ids))
+        parents = {}
+
+        with self._lock:
+            for start in range(0, len(parent_ids), 500):
+                batch = parent_ids[start:start + 500]
+                placeholders = ",".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT parent_id, content, metadata FROM parents WHERE parent_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for parent_id, content, metadata in rows:
+                    parents[parent_id] = (content, json.loads(metadata) if metadata else {})
+
+        return parents
+
+    def delete_document(self, document_id: str) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM parents WHERE document_id = ?", (document_id,))
+        return cursor.rowcount
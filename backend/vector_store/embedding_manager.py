@@ -6,8 +6,8 @@ logger = logging.getLogger(__name__)
 
 class EmbeddingManager:
 
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        self.service = EmbeddingService(model_name=model_name)
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", service: Optional[EmbeddingService] = None):
+        self.service = service or EmbeddingService(model_name=model_name)
     
     def get_document_embeddings(self, texts: List[str]) -> List[List[float]]:
 
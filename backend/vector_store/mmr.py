@@ -0,0 +1,28 @@
+from typing import List, Sequence
+import numpy as np
+from .backends.base import normalize_vectors
+
+def maximal_marginal_relevance(relevance: Sequence[float], embeddings: np.ndarray, k: int,
+                               lambda_mult: float = 0.5) -> List[int]:
+    relevance = np.asarray(relevance, dtype=np.float32)
+    k = min(k, len(relevance))
+    if k <= 0:
+        return []
+
+    vectors = normalize_vectors(embeddings)
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(len(relevance), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        index = int(np.argmax(scores))
+        selected.append(index)
+        available[index] = False
+        np.maximum(max_similarity, similarity[index], out=max_similarity)
+
+    return selected
@@ -0,0 +1,156 @@
+import sqlite3
+import threading
+import hashlib
+import logging
+import os
+from typing import Iterable, Optional
+import numpy as np
+from utils.text_processor import clean_text
+from utils.fork_safety import register_after_fork
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+class MinHashLSHIndex:
+
+    def __init__(self, db_path: str, num_perm: int = 128, bands: int = 16,
+                 threshold: float = 0.85, shingle_size: int = 5, seed: int = 1):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm phải chia hết cho bands")
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = generator.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+        self._connect()
+        register_after_fork(self._connect)
+        self._create_tables()
+        logger.info(f"Khởi tạo MinHashLSHIndex tại: {db_path} (threshold={threshold})")
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS minhash_signatures (
+                    chunk_id TEXT PRIMARY KEY,
+                    signature BLOB NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS lsh_buckets (
+                    bucket TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_buckets_bucket ON lsh_buckets (bucket)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_buckets_chunk ON lsh_buckets (chunk_id)")
+
+    def _shingles(self, text: str):
+        tokens = clean_text(text).lower().split()
+        if not tokens:
+            return set()
+        if len(tokens) <= self.shingle_size:
+            return {" ".join(tokens)}
+        return {
+            " ".join(tokens[i:i + self.shingle_size])
+            for i in range(len(tokens) - self.shingle_size + 1)
+        }
+
+    def compute_signature(self, text: str) -> Optional[np.ndarray]:
+        shingles = self._shingles(text)
+        if not shingles:
+            return None
+
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+                for s in shingles
+            ),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+
+        with np.errstate(over="ignore"):
+            permuted = ((hashes[:, None] * self._a[None, :] + self._b[None, :]) % _MERSENNE_PRIME) & _MAX_HASH
+
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _bucket_keys(self, signature: np.ndarray):
+        return [
+            f"{band}:{hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).hexdigest()}"
+            for band in range(self.bands)
+        ]
+
+    def find_duplicate(self, signature: Optional[np.ndarray]) -> Optional[str]:
+        if signature is None:
+            return None
+
+        keys = self._bucket_keys(signature)
+        placeholders = ",".join("?" for _ in keys)
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT s.chunk_id, s.signature FROM minhash_signatures s
+                WHERE s.chunk_id IN (SELECT DISTINCT chunk_id FROM lsh_buckets WHERE bucket IN ({placeholders}))
+                """,
+                keys
+            ).fetchall()
+
+        if not rows:
+            return None
+
+        candidate_ids = [row[0] for row in rows]
+        candidates = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.uint32).reshape(len(rows), self.num_perm)
+        similarities = (candidates == signature[None, :]).mean(axis=1)
+
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            logger.debug(f"Chunk gần trùng với {candidate_ids[best]} (jaccard ~ {similarities[best]:.2f})")
+            return candidate_ids[best]
+
+        return None
+
+    def add(self, chunk_id: str, signature: Optional[np.ndarray]) -> None:
+        if signature is None:
+            return
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO minhash_signatures (chunk_id, signature) VALUES (?, ?)",
+                (chunk_id, signature.astype(np.uint32).tobytes())
+            )
+            self._conn.executemany(
+                "INSERT INTO lsh_buckets (bucket, chunk_id) VALUES (?, ?)",
+                [(key, chunk_id) for key in self._bucket_keys(signature)]
+            )
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        chunk_ids = list(chunk_ids)
+        if not chunk_ids:
+            return
+
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM minhash_signatures WHERE chunk_id = ?", [(c,) for c in chunk_ids])
+            self._conn.executemany("DELETE FROM lsh_buckets WHERE chunk_id = ?", [(c,) for c in chunk_ids])
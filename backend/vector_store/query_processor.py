@@ -12,7 +12,8 @@ class QueryProcessor:
         self.embedding_manager = embedding_manager or EmbeddingManager()
         logger.info("Khởi tạo QueryProcessor thành công")
     
-    def process_query(self, query: str, top_k: int = 5, use_hybrid: bool = False):
+    def process_query(self, query: str, top_k: int = 5, use_hybrid: bool = False, language: Optional[str] = None,
+                      mmr_lambda: Optional[float] = None, fetch_k: int = 20):
         try:
             if not query:
                 logger.warning("Truy vấn trống")
@@ -20,10 +21,14 @@ class QueryProcessor:
                 
             logger.info(f"Xử lý truy vấn: '{query[:50]}...'")
             
-            if use_hybrid:
-                return self.chroma_manager.hybrid_search(query, k=top_k)
+            if mmr_lambda is not None:
+                return self.chroma_manager.max_marginal_relevance_search(
+                    query, k=top_k, fetch_k=fetch_k, lambda_mult=mmr_lambda, language=language
+                )
+            elif use_hybrid:
+                return self.chroma_manager.hybrid_search(query, k=top_k, language=language)
             else:
-                return self.chroma_manager.similarity_search(query, k=top_k)
+                return self.chroma_manager.similarity_search(query, k=top_k, language=language)
                 
         except Exception as e:
             logger.error(f"Lỗi khi xử lý truy vấn: {str(e)}")
@@ -0,0 +1,139 @@
+import sqlite3
+import threading
+import hashlib
+import logging
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from utils.metrics import metrics
+from utils.text_processor import normalize_unicode
+from utils.fork_safety import register_after_fork
+
+logger = logging.getLogger(__name__)
+
+CachedResult = Tuple[str, Dict[str, Any], float]
+
+def normalize_query(query: str) -> str:
+    return re.sub(r'\s+', ' ', normalize_unicode(query)).strip().casefold()
+
+class RetrievalCache:
+
+    def __init__(self, db_path: str, capacity: int = 1024, disk_capacity: int = 10000, ttl: int = 0):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.capacity = capacity
+        self.disk_capacity = disk_capacity
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._writes = 0
+        self._connect()
+        register_after_fork(self._connect)
+        self._create_tables()
+        logger.info(f"Khởi tạo RetrievalCache tại: {db_path} (version {self.get_version()})")
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute("INSERT OR IGNORE INTO state (key, value) VALUES ('version', 0)")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_created ON entries (created_at)")
+
+    def make_key(self, query: str, k: int, filter: Optional[Dict[str, Any]] = None, language: Optional[str] = None) -> str:
+        payload = json.dumps(
+            [normalize_query(query), k, filter or {}, language],
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_version(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT value FROM state WHERE key = 'version'").fetchone()[0]
+
+    def bump_version(self) -> int:
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE state SET value = value + 1 WHERE key = 'version'")
+            version = self._conn.execute("SELECT value FROM state WHERE key = 'version'").fetchone()[0]
+            self._conn.execute("DELETE FROM entries WHERE version < ?", (version,))
+            self._memory.clear()
+        return version
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl) and time.time() - created_at > self.ttl
+
+    def get(self, key: str, version: int) -> Optional[List[CachedResult]]:
+        with self._lock:
+            entry = self._memory.get((key, version))
+            if entry is not None and not self._expired(entry[0]):
+                self._memory.move_to_end((key, version))
+                metrics.increment("retrieval_cache_hits", labels={"tier": "memory"})
+                return entry[1]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ? AND version = ?",
+                (key, version)
+            ).fetchone()
+
+            if row is None or self._expired(row[1]):
+                metrics.increment("retrieval_cache_misses")
+                return None
+
+            value = [tuple(item) for item in json.loads(row[0])]
+            self._remember(key, version, row[1], value)
+            metrics.increment("retrieval_cache_hits", labels={"tier": "disk"})
+            return value
+
+    def _remember(self, key: str, version: int, created_at: float, value: List[CachedResult]):
+        self._memory[(key, version)] = (created_at, value)
+        self._memory.move_to_end((key, version))
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def set(self, key: str, version: int, value: List[CachedResult]) -> None:
+        created_at = time.time()
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+
+        with self._lock:
+            self._remember(key, version, created_at, value)
+
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, version, value, created_at) VALUES (?, ?, ?, ?)",
+                    (key, version, payload, created_at)
+                )
+
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._evict()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        if count > self.disk_capacity:
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY created_at LIMIT ?)",
+                (count - self.disk_capacity,)
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._memory.clear()
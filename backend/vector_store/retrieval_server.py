@@ -0,0 +1,278 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+import logging
+from typing import Any, Dict, List
+import numpy as np
+from utils.ipc import recv_message, send_message
+from utils.metrics import metrics
+from .backends.base import VectorStoreBackend
+from .backends.factory import BackendFactory
+from .backends.remote_backend import pack_vectors, unpack_vectors
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+class _PendingSearch:
+    __slots__ = ("queries", "k", "where", "include_embeddings", "event", "results", "error")
+
+    def __init__(self, queries: np.ndarray, k: int, where, include_embeddings: bool):
+        self.queries = queries
+        self.k = k
+        self.where = where
+        self.include_embeddings = include_embeddings
+        self.event = threading.Event()
+        self.results = None
+        self.error = None
+
+    def group_key(self):
+        return self.k, json.dumps(self.where, sort_keys=True, default=str), self.include_embeddings
+
+class RetrievalServer:
+
+    def __init__(self, socket_path: str, factory: BackendFactory, max_batch_size: int = 16, max_wait_ms: float = 2.0):
+        self.socket_path = socket_path
+        self.factory = factory
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._backends = {}
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self._running = False
+        self._sock = None
+
+    def _get_backend(self, name: str) -> VectorStoreBackend:
+        with self._lock:
+            backend = self._backends.get(name)
+            if backend is None:
+                backend = self._backends[name] = self.factory.create(None if name == "default" else name)
+                pending = self._queues[name] = queue.Queue()
+                threading.Thread(
+                    target=self._batch_loop, args=(backend, pending),
+                    name=f"retrieval-batcher-{name}", daemon=True
+                ).start()
+                logger.info(f"Retrieval server đã mở chỉ mục '{name}' ({backend.count()} vectors)")
+            return backend
+
+    def _batch_loop(self, backend: VectorStoreBackend, pending: queue.Queue):
+        while self._running:
+            try:
+                batch = [pending.get(timeout=1.0)]
+            except queue.Empty:
+                continue
+
+            size = len(batch[0].queries)
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request.queries)
+
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.group_key(), []).append(request)
+
+            start_time = time.perf_counter()
+            for requests in groups.values():
+                first = requests[0]
+                try:
+                    queries = np.concatenate([request.queries for request in requests])
+                    results = backend.search_batch(list(queries), first.k, first.where, first.include_embeddings)
+                    offset = 0
+                    for request in requests:
+                        request.results = results[offset:offset + len(request.queries)]
+                        offset += len(request.queries)
+                except Exception as e:
+                    logger.error(f"Lỗi khi tìm kiếm theo lô: {str(e)}")
+                    for request in requests:
+                        request.error = str(e)
+                finally:
+                    for request in requests:
+                        request.event.set()
+
+            metrics.observe("retrieval_server_batch_size", size, buckets=BATCH_SIZE_BUCKETS)
+            metrics.observe("retrieval_server_batch_latency_ms", (time.perf_counter() - start_time) * 1000)
+            metrics.increment("retrieval_server_queries", size)
+
+    def search(self, name: str, queries: np.ndarray, k: int, where=None, include_embeddings=False):
+        self._get_backend(name)
+        request = _PendingSearch(queries, k, where, include_embeddings)
+        self._queues[name].put(request)
+        request.event.wait()
+
+        if request.error:
+            raise RuntimeError(request.error)
+        return request.results
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = time.time() - self._started_at
+        with self._lock:
+            counts = {name: backend.count() for name, backend in self._backends.items()}
+        return {
+            "backend": self.factory.backend,
+            "indexes": counts,
+            "uptime_seconds": round(uptime, 1),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            **metrics.snapshot()
+        }
+
+    def _handle_request(self, header: Dict[str, Any], payload: bytes):
+        op = header.get("op")
+        name = header.get("backend") or "default"
+
+        if op == "search":
+            results = self.search(
+                name,
+                unpack_vectors(header["shape"], payload),
+                header["k"],
+                header.get("where"),
+                header.get("include_embeddings", False)
+            )
+            response = {
+                "status": "ok",
+                "results": [
+                    [
+                        {"id": result.id, "text": result.text, "metadata": result.metadata, "score": result.score}
+                        for result in query_results
+                    ]
+                    for query_results in results
+                ]
+            }
+
+            embeddings = [result.embedding for query_results in results for result in query_results]
+            if header.get("include_embeddings") and embeddings:
+                response["embedding_shape"], response_payload = pack_vectors(embeddings)
+                return response, response_payload
+            return response, b""
+
+        backend = self._get_backend(name)
+
+        if op == "add":
+            embeddings = unpack_vectors(header["shape"], payload)
+            backend.add(header["ids"], header["texts"], list(embeddings), header["metadatas"])
+            return {"status": "ok"}, b""
+
+        if op == "delete":
+            backend.delete(header["ids"])
+            return {"status": "ok"}, b""
+
+        if op == "delete_where":
+            return {"status": "ok", "deleted": backend.delete_where(header["where"])}, b""
+
+        if op == "get_embeddings":
+            found = backend.get_embeddings(header["ids"])
+            if not found:
+                return {"status": "ok", "ids": []}, b""
+            shape, response_payload = pack_vectors(list(found.values()))
+            return {"status": "ok", "ids": list(found), "shape": shape}, response_payload
+
+        if op == "count":
+            return {"status": "ok", "count": backend.count()}, b""
+
+        if op == "shard_counts":
+            counts = backend.shard_counts() if hasattr(backend, "shard_counts") else {name: backend.count()}
+            return {"status": "ok", "shard_counts": counts}, b""
+
+        if op == "stats":
+            return {"status": "ok", "stats": self.stats()}, b""
+
+        return {"status": "error", "error": f"Thao tác không được hỗ trợ: {op}"}, b""
+
+    def _handle_connection(self, conn: socket.socket):
+        with conn:
+            while self._running:
+                try:
+                    header, payload = recv_message(conn)
+                except (ConnectionError, OSError):
+                    return
+
+                try:
+                    response, response_payload = self._handle_request(header, payload)
+                except Exception as e:
+                    logger.error(f"Lỗi khi xử lý yêu cầu retrieval: {str(e)}")
+                    response, response_payload = {"status": "error", "error": str(e)}, b""
+
+                try:
+                    send_message(conn, response, response_payload)
+                except (ConnectionError, OSError):
+                    return
+
+    def serve_forever(self):
+        self._running = True
+        self._get_backend("default")
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        tmp_path = f"{self.socket_path}.{os.getpid()}"
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(tmp_path)
+        self._sock.listen(128)
+        os.replace(tmp_path, self.socket_path)
+        logger.info(f"Retrieval server đang lắng nghe tại {self.socket_path}")
+
+        try:
+            while self._running:
+                try:
+                    conn, _ = self._sock.accept()
+                except OSError:
+                    break
+                threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self._running = False
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        with self._lock:
+            for backend in self._backends.values():
+                backend.close()
+            self._backends = {}
+
+def main(argv=None):
+    from config.settings import Config
+
+    parser = argparse.ArgumentParser(description="Retrieval server owning the vector index")
+    parser.add_argument("--socket", default=Config.RETRIEVAL_SERVER_SOCKET)
+    parser.add_argument("--max-batch-size", type=int, default=Config.RETRIEVAL_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=Config.RETRIEVAL_BATCH_WAIT_MS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    factory = BackendFactory(
+        Config.VECTOR_BACKEND,
+        Config.CHROMA_DB_PATH,
+        quantization=Config.VECTOR_QUANTIZATION,
+        rescore_factor=Config.QUANTIZATION_RESCORE_FACTOR,
+        ivf_nlist=Config.IVF_NLIST,
+        ivf_nprobe=Config.IVF_NPROBE,
+        shard_by=Config.SHARD_BY,
+        num_shards=Config.NUM_SHARDS,
+        shard_categories=Config.SHARD_CATEGORIES
+    )
+    server = RetrievalServer(args.socket, factory, args.max_batch_size, args.max_wait_ms)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    sys.exit(main())